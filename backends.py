@@ -0,0 +1,433 @@
+import sys
+import time
+import ctypes
+from functools import partial
+
+# Key names passed to backends are pyautogui's lowercase names ('enter', 'f5', ...)
+
+
+# --- Input Backends ---
+class InputBackend:
+    """Everything the replay engine needs from the OS input layer"""
+
+    name = "base"
+    # Seconds between the characters of a 'type' action
+    type_interval = 0.05
+    # Whether write() can type text outside ASCII (Persian, ...)
+    unicode_keys = False
+
+    def move(self, x, y, duration=0.0):
+        raise NotImplementedError
+
+    def click(self, x, y, button='left'):
+        raise NotImplementedError
+
+    def scroll(self, x, y, clicks):
+        """Turn the wheel `clicks` notches at (x, y); positive scrolls up"""
+        raise NotImplementedError
+
+    def write(self, text, interval=0.0):
+        """Type `text`, waiting `interval` seconds after each character"""
+        raise NotImplementedError
+
+    def press(self, key):
+        raise NotImplementedError
+
+    def hotkey(self, *keys):
+        """Hold `keys` down in order, then release them in reverse (a chord)"""
+        raise NotImplementedError
+
+    def flush(self):
+        """Called once after every action; backends that queue events send them here"""
+        pass
+
+    def screen_size(self):
+        """(width, height) of the screen input goes to, or None when unknown"""
+        return None
+
+    def close(self):
+        pass
+
+
+class PyAutoGuiBackend(InputBackend):
+    name = "pyautogui"
+
+    def __init__(self, pause=None):
+        import pyautogui
+        pyautogui.FAILSAFE = False
+        # pyautogui would sleep its process-wide PAUSE (0.1 s by default) after
+        # every call; this backend sleeps its own pause once per action instead
+        self.pause = pyautogui.PAUSE if pause is None else pause
+        self.pyautogui = pyautogui
+        # Bind once so the replay program holds direct references
+        self.move = partial(pyautogui.moveTo, _pause=False)
+        self.click = partial(pyautogui.click, _pause=False)
+        self.write = partial(pyautogui.write, _pause=False)
+        self.press = partial(pyautogui.press, _pause=False)
+        self.hotkey = partial(pyautogui.hotkey, _pause=False)
+
+    def scroll(self, x, y, clicks):
+        self.pyautogui.scroll(clicks, x=x, y=y, _pause=False)
+
+    def flush(self):
+        if self.pause:
+            time.sleep(self.pause)
+
+    def screen_size(self):
+        width, height = self.pyautogui.size()
+        return width, height
+
+
+class NullBackend(InputBackend):
+    """Swallows all input; measures nothing but the engine itself"""
+
+    name = "null"
+    type_interval = 0.0
+    unicode_keys = True
+
+    def move(self, x, y, duration=0.0):
+        pass
+
+    def click(self, x, y, button='left'):
+        pass
+
+    def scroll(self, x, y, clicks):
+        pass
+
+    def write(self, text, interval=0.0):
+        pass
+
+    def press(self, key):
+        pass
+
+    def hotkey(self, *keys):
+        pass
+
+
+class RecordingBackend(InputBackend):
+    """Keeps every event as (seconds since start, name, args) instead of sending it"""
+
+    name = "recording"
+    unicode_keys = True
+
+    def __init__(self, screen=None):
+        self.events = []
+        self.start = time.perf_counter()
+        # Screen size to report, for replays that fit coordinates to it
+        self.screen = screen
+
+    def reset(self):
+        self.events = []
+        self.start = time.perf_counter()
+
+    def move(self, x, y, duration=0.0):
+        self.events.append((time.perf_counter() - self.start, 'move', (x, y)))
+
+    def click(self, x, y, button='left'):
+        self.events.append((time.perf_counter() - self.start, 'click', (x, y, button)))
+
+    def scroll(self, x, y, clicks):
+        self.events.append((time.perf_counter() - self.start, 'scroll', (x, y, clicks)))
+
+    def write(self, text, interval=0.0):
+        self.events.append((time.perf_counter() - self.start, 'write', (text,)))
+
+    def press(self, key):
+        self.events.append((time.perf_counter() - self.start, 'press', (key,)))
+
+    def hotkey(self, *keys):
+        self.events.append((time.perf_counter() - self.start, 'hotkey', keys))
+
+    def screen_size(self):
+        return self.screen
+
+    def timestamps(self, name=None):
+        return [t for t, ev, _ in self.events if name is None or ev == name]
+# ----------------------------------
+
+# --- X11 XTest Backend ---
+# pyautogui names -> X keysym names, for the keys where they differ
+X_KEY_NAMES = {
+    "enter": "Return",
+    "return": "Return",
+    "backspace": "BackSpace",
+    "delete": "Delete",
+    "del": "Delete",
+    "tab": "Tab",
+    "esc": "Escape",
+    "escape": "Escape",
+    "ctrl": "Control_L",
+    "ctrlleft": "Control_L",
+    "ctrlright": "Control_R",
+    "shift": "Shift_L",
+    "shiftleft": "Shift_L",
+    "shiftright": "Shift_R",
+    "alt": "Alt_L",
+    "altleft": "Alt_L",
+    "altright": "Alt_R",
+    "win": "Super_L",
+    "winleft": "Super_L",
+    "super": "Super_L",
+    "space": "space",
+    "up": "Up",
+    "down": "Down",
+    "left": "Left",
+    "right": "Right",
+    "home": "Home",
+    "end": "End",
+    "pageup": "Prior",
+    "pagedown": "Next",
+    "insert": "Insert",
+}
+
+# X pointer buttons; 4/5 are one wheel notch up/down
+X_BUTTONS = {"left": 1, "middle": 2, "right": 3}
+X_WHEEL_UP = 4
+X_WHEEL_DOWN = 5
+
+XK_SHIFT_L = 0xffe1
+XK_RETURN = 0xff0d
+XK_TAB = 0xff09
+
+
+def _char_keysym(ch):
+    code = ord(ch)
+    if ch == "\n":
+        return XK_RETURN
+    if ch == "\t":
+        return XK_TAB
+    # Latin-1 keysyms equal the code point; everything else uses the Unicode range
+    if 0x20 <= code <= 0x7e or 0xa0 <= code <= 0xff:
+        return code
+    return 0x01000000 | code
+
+
+class XTestBackend(InputBackend):
+    """Injects input straight through libXtst, queueing events until flush().
+
+    There are no hidden sleeps: every pause is one of the attributes below
+    and they all default to zero. Characters that have no key on the
+    current layout (Persian text on a US keymap, say) are typed by
+    temporarily binding them to otherwise unused keycodes.
+    """
+
+    name = "xtest"
+    type_interval = 0.0
+    unicode_keys = True
+
+    def __init__(self, display=None, click_hold=0.0, key_hold=0.0):
+        if not sys.platform.startswith("linux"):
+            raise OSError("XTest backend is only available on Linux/X11")
+        # Not at module level: it pulls in subprocess & co. for every replay
+        import ctypes.util
+        x11_path = ctypes.util.find_library("X11")
+        xtst_path = ctypes.util.find_library("Xtst")
+        if not x11_path or not xtst_path:
+            raise OSError("libX11 / libXtst not found")
+        self.click_hold = click_hold
+        self.key_hold = key_hold
+
+        x11 = ctypes.cdll.LoadLibrary(x11_path)
+        xtst = ctypes.cdll.LoadLibrary(xtst_path)
+        x11.XOpenDisplay.restype = ctypes.c_void_p
+        x11.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        x11.XFlush.argtypes = [ctypes.c_void_p]
+        x11.XSync.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        x11.XCloseDisplay.argtypes = [ctypes.c_void_p]
+        x11.XStringToKeysym.restype = ctypes.c_ulong
+        x11.XStringToKeysym.argtypes = [ctypes.c_char_p]
+        x11.XKeysymToKeycode.restype = ctypes.c_ubyte
+        x11.XKeysymToKeycode.argtypes = [ctypes.c_void_p, ctypes.c_ulong]
+        x11.XDisplayKeycodes.argtypes = [ctypes.c_void_p, ctypes.POINTER(ctypes.c_int),
+                                         ctypes.POINTER(ctypes.c_int)]
+        x11.XGetKeyboardMapping.restype = ctypes.POINTER(ctypes.c_ulong)
+        x11.XGetKeyboardMapping.argtypes = [ctypes.c_void_p, ctypes.c_ubyte, ctypes.c_int,
+                                            ctypes.POINTER(ctypes.c_int)]
+        x11.XChangeKeyboardMapping.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_int,
+                                               ctypes.POINTER(ctypes.c_ulong), ctypes.c_int]
+        x11.XFree.argtypes = [ctypes.c_void_p]
+        x11.XDefaultScreen.argtypes = [ctypes.c_void_p]
+        x11.XDisplayWidth.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        x11.XDisplayHeight.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        xtst.XTestFakeMotionEvent.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_int,
+                                              ctypes.c_int, ctypes.c_ulong]
+        xtst.XTestFakeButtonEvent.argtypes = [ctypes.c_void_p, ctypes.c_uint, ctypes.c_int,
+                                              ctypes.c_ulong]
+        xtst.XTestFakeKeyEvent.argtypes = [ctypes.c_void_p, ctypes.c_uint, ctypes.c_int,
+                                           ctypes.c_ulong]
+        self.x11 = x11
+        self.xtst = xtst
+
+        self.dpy = x11.XOpenDisplay(display.encode() if display else None)
+        if not self.dpy:
+            raise OSError(f"Cannot open X display {display or ''}".strip())
+
+        self._key_cache = {}
+        self._char_cache = {}
+        self._scratch_codes = []
+        self._scratch_next = 0
+        self._scratch_used = {}
+        self._load_keymap()
+        self.shift_code = self._keymap.get(XK_SHIFT_L, (0, 0))[0]
+
+    def _load_keymap(self):
+        """Map keysym -> (keycode, needs_shift) and find keycodes with no keysym"""
+        lo, hi = ctypes.c_int(), ctypes.c_int()
+        self.x11.XDisplayKeycodes(self.dpy, ctypes.byref(lo), ctypes.byref(hi))
+        count = hi.value - lo.value + 1
+        per_code = ctypes.c_int()
+        syms = self.x11.XGetKeyboardMapping(self.dpy, lo.value, count, ctypes.byref(per_code))
+        self._keymap = {}
+        try:
+            for i in range(count):
+                row = [syms[i * per_code.value + j] for j in range(per_code.value)]
+                code = lo.value + i
+                if not any(row):
+                    self._scratch_codes.append(code)
+                    continue
+                for level in (0, 1):
+                    if level < len(row) and row[level] and row[level] not in self._keymap:
+                        self._keymap[row[level]] = (code, level == 1)
+        finally:
+            self.x11.XFree(syms)
+
+    def _fake_key(self, code, down):
+        self.xtst.XTestFakeKeyEvent(self.dpy, code, down, 0)
+
+    def _tap(self, code, shift=False):
+        if shift and self.shift_code:
+            self._fake_key(self.shift_code, True)
+        self._fake_key(code, True)
+        if self.key_hold:
+            self.flush()
+            time.sleep(self.key_hold)
+        self._fake_key(code, False)
+        if shift and self.shift_code:
+            self._fake_key(self.shift_code, False)
+
+    def _key_code(self, key):
+        """(keycode, needs_shift) for a pyautogui key name or a single character"""
+        if len(key) == 1:
+            # Not kept in _key_cache: scratch keycodes are rebound round-robin,
+            # so only keymap hits may be remembered (_char_key does that)
+            return self._char_key(key)
+        code = self._key_cache.get(key)
+        if code is None:
+            name = X_KEY_NAMES.get(key)
+            if name is None:
+                # f1..f12 and anything else X knows by name
+                name = key.upper() if key[:1] == "f" and key[1:].isdigit() else key
+            keysym = self.x11.XStringToKeysym(name.encode())
+            code = self.x11.XKeysymToKeycode(self.dpy, keysym) if keysym else 0
+            if not code:
+                raise ValueError(f"No keycode for key: {key}")
+            self._key_cache[key] = code
+        return code, False
+
+    def _char_key(self, ch):
+        cached = self._char_cache.get(ch)
+        if cached is not None:
+            return cached
+        keysym = _char_keysym(ch)
+        mapped = self._keymap.get(keysym)
+        if mapped is not None:
+            self._char_cache[ch] = mapped
+            return mapped
+        return self._bind_scratch(ch, keysym)
+
+    def _bind_scratch(self, ch, keysym):
+        code = self._scratch_used.get(ch)
+        if code is not None:
+            return code, False
+        if not self._scratch_codes:
+            raise ValueError(f"Cannot type {ch!r}: no free keycode to bind it to")
+        code = self._scratch_codes[self._scratch_next]
+        self._scratch_next = (self._scratch_next + 1) % len(self._scratch_codes)
+        for old_ch, old_code in list(self._scratch_used.items()):
+            if old_code == code:
+                # Reusing a keycode: make sure its previous events went out first
+                del self._scratch_used[old_ch]
+                self.x11.XSync(self.dpy, 0)
+        syms = (ctypes.c_ulong * 1)(keysym)
+        self.x11.XChangeKeyboardMapping(self.dpy, code, 1, syms, 1)
+        self.x11.XSync(self.dpy, 0)
+        self._scratch_used[ch] = code
+        return code, False
+
+    def move(self, x, y, duration=0.0):
+        # The pointer jumps; there is no tweening to wait for
+        self.xtst.XTestFakeMotionEvent(self.dpy, -1, int(x), int(y), 0)
+
+    def click(self, x, y, button='left'):
+        code = X_BUTTONS[button]
+        self.xtst.XTestFakeMotionEvent(self.dpy, -1, int(x), int(y), 0)
+        self.xtst.XTestFakeButtonEvent(self.dpy, code, True, 0)
+        if self.click_hold:
+            self.flush()
+            time.sleep(self.click_hold)
+        self.xtst.XTestFakeButtonEvent(self.dpy, code, False, 0)
+
+    def scroll(self, x, y, clicks):
+        code = X_WHEEL_UP if clicks > 0 else X_WHEEL_DOWN
+        self.xtst.XTestFakeMotionEvent(self.dpy, -1, int(x), int(y), 0)
+        for _ in range(abs(int(clicks))):
+            self.xtst.XTestFakeButtonEvent(self.dpy, code, True, 0)
+            self.xtst.XTestFakeButtonEvent(self.dpy, code, False, 0)
+
+    def write(self, text, interval=0.0):
+        for ch in text:
+            code, shift = self._char_key(ch)
+            self._tap(code, shift)
+            if interval:
+                self.flush()
+                time.sleep(interval)
+
+    def press(self, key):
+        code, shift = self._key_code(key)
+        self._tap(code, shift)
+
+    def hotkey(self, *keys):
+        codes = [self._key_code(key)[0] for key in keys]
+        for code in codes:
+            self._fake_key(code, True)
+        if self.key_hold:
+            self.flush()
+            time.sleep(self.key_hold)
+        for code in reversed(codes):
+            self._fake_key(code, False)
+
+    def flush(self):
+        self.x11.XFlush(self.dpy)
+
+    def screen_size(self):
+        screen = self.x11.XDefaultScreen(self.dpy)
+        return self.x11.XDisplayWidth(self.dpy, screen), self.x11.XDisplayHeight(self.dpy, screen)
+
+    def close(self):
+        if self.dpy:
+            if self._scratch_used:
+                # Give the borrowed keycodes back
+                empty = (ctypes.c_ulong * 1)(0)
+                for code in set(self._scratch_used.values()):
+                    self.x11.XChangeKeyboardMapping(self.dpy, code, 1, empty, 1)
+                self._scratch_used.clear()
+            self.x11.XSync(self.dpy, 0)
+            self.x11.XCloseDisplay(self.dpy)
+            self.dpy = None
+# ----------------------------------
+
+
+BACKENDS = {
+    "pyautogui": PyAutoGuiBackend,
+    "null": NullBackend,
+    "recording": RecordingBackend,
+    "xtest": XTestBackend,
+}
+
+
+def create_backend(name="pyautogui", **options):
+    try:
+        backend_class = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown input backend: {name}") from None
+    return backend_class(**options)
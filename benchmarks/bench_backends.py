@@ -0,0 +1,52 @@
+"""Per-action overhead of the real input backends.
+
+Needs an X display; run it under Xvfb so nothing lands on your desktop:
+    xvfb-run -a python benchmarks/bench_backends.py [actions]
+Backends that cannot start (missing library, no display) are skipped.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backends import create_backend
+
+CONFIGS = [
+    ("pyautogui (default PAUSE)", "pyautogui", {}),
+    ("pyautogui (PAUSE=0)", "pyautogui", {"pause": 0.0}),
+    ("xtest", "xtest", {}),
+]
+
+
+def per_action_ms(backend, count, action):
+    t = time.perf_counter()
+    for i in range(count):
+        action(backend, i)
+        backend.flush()
+    return (time.perf_counter() - t) * 1000 / count
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    cases = [
+        ("move", lambda b, i: b.move(10 + i % 50, 10, 0.0)),
+        ("click", lambda b, i: b.click(10 + i % 50, 10)),
+        ("press", lambda b, i: b.press("shift")),
+        ("write 10 chars", lambda b, i: b.write("abcdefghij")),
+    ]
+    print(f"{'backend':28}" + "".join(f"{name:>16}" for name, _ in cases))
+    for label, name, options in CONFIGS:
+        try:
+            backend = create_backend(name, **options)
+        except Exception as e:
+            print(f"{label:28}  skipped: {e}")
+            continue
+        try:
+            row = [per_action_ms(backend, count, action) for _, action in cases]
+        finally:
+            backend.close()
+        print(f"{label:28}" + "".join(f"{ms:13.3f} ms" for ms in row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Replay dispatch overhead: compiled program vs. the old if/elif loop.
+
+Input calls go to the no-op NullBackend, so the numbers are pure interpreter
+overhead per step. Run with:  python benchmarks/bench_dispatch.py [steps] [runs]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backends import NullBackend
+from replay import ReplayControl, compile_actions, run_program
+from tracing import ReplayTrace
+
+
+def make_actions(n):
+    kinds = [
+        ('move', 100, 200),
+        ('click', 300, 400),
+        ('shortcut', 'Enter'),
+        ('show_screen', 1920, 1080),
+        ('type', 'ab', 10, 20),
+    ]
+    return [kinds[i % len(kinds)] for i in range(n)]
+
+
+def legacy_loop(actions, replay_count, delay, backend):
+    """The replay loop as it was before compilation (minus the sleeps)"""
+    for run in range(replay_count):
+        for i, action in enumerate(actions):
+            act_type = action[0]
+            if act_type == 'move':
+                _, x, y = action
+                duration = min(0.5, delay)
+                backend.move(x, y, duration=duration)
+            elif act_type == 'click':
+                _, x, y = action
+                backend.click(x, y)
+            elif act_type == 'shortcut':
+                key_map = {
+                    "Enter": "enter", "Backspace": "backspace", "Delete": "delete",
+                    "Tab": "tab", "Esc": "esc", "Ctrl": "ctrl", "Shift": "shift",
+                    "Alt": "alt", "Space": "space", "F1": "f1", "F2": "f2",
+                    "F3": "f3", "F4": "f4", "F5": "f5", "F6": "f6", "F7": "f7",
+                    "F8": "f8", "F9": "f9", "F10": "f10", "F11": "f11", "F12": "f12"
+                }
+                backend.press(key_map.get(action[1], action[1].lower()))
+            elif act_type == 'type':
+                _, text, x, y = action
+                backend.click(x, y)
+                backend.write(text)
+            if not (run == replay_count - 1 and i == len(actions) - 1):
+                pass
+
+
+def main():
+    steps = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    actions = make_actions(steps)
+    total = steps * runs
+
+    t = time.perf_counter()
+    legacy_loop(actions, runs, 0.0, NullBackend())
+    legacy = time.perf_counter() - t
+
+    control = ReplayControl()
+    t = time.perf_counter()
+    program = compile_actions(actions, 0.0, control, NullBackend(), type_interval=0)
+    compile_time = time.perf_counter() - t
+    t = time.perf_counter()
+    run_program(program, runs, control)
+    compiled = time.perf_counter() - t
+    trace = ReplayTrace()
+    t = time.perf_counter()
+    run_program(program, runs, control, trace=trace)
+    traced = time.perf_counter() - t
+
+    print(f"steps: {steps} x {runs} runs")
+    print(f"legacy loop:  {total / legacy:12,.0f} steps/s")
+    print(f"compiled:     {total / compiled:12,.0f} steps/s  (compile {compile_time * 1000:.1f} ms, once per replay)")
+    print(f"traced:       {total / traced:12,.0f} steps/s  ({(traced - compiled) / total * 1e9:.0f} ns/step to record)")
+    # The one-off compile is repaid by what each run saves over the legacy loop
+    saved_per_run = (legacy - compiled) / runs
+    if saved_per_run > 0:
+        print(f"per run:      {compiled / runs * 1000:.1f} ms vs {legacy / runs * 1000:.1f} ms legacy; "
+              f"compiling pays off after {compile_time / saved_per_run:.1f} runs")
+    else:
+        print("per run:      compiled is not faster than the legacy loop")
+
+
+if __name__ == "__main__":
+    main()
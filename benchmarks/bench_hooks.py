@@ -0,0 +1,82 @@
+"""Per-event Qt signals vs. the ring buffer + frame-rate batches of InputHub.
+
+A producer thread plays the part of a hook, pushing mouse moves at a high
+rate. Reported: events delivered, GUI callbacks run, mean/max latency
+from event to GUI thread.
+
+Run with:  QT_QPA_PLATFORM=offscreen python benchmarks/bench_hooks.py [events]
+"""
+import os
+import sys
+import time
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from PySide6.QtCore import QCoreApplication, QObject, QTimer, Signal
+from hooks import EventRing
+
+
+class Emitter(QObject):
+    event = Signal(float, int, int)
+
+
+def produce(push, n):
+    clock = time.perf_counter
+    for i in range(n):
+        push(clock(), i % 1920, i % 1080)
+        if i % 50 == 0:
+            time.sleep(0.0005)
+
+
+def run_signals(app, n):
+    emitter = Emitter()
+    latencies = []
+    emitter.event.connect(lambda t, x, y: latencies.append(time.perf_counter() - t))
+    thread = threading.Thread(target=produce, args=(emitter.event.emit, n))
+    thread.start()
+    while thread.is_alive() or len(latencies) < n:
+        app.processEvents()
+    thread.join()
+    return len(latencies), len(latencies), latencies
+
+
+def run_ring(app, n, frame_rate=60):
+    ring = EventRing()
+    latencies = []
+    callbacks = [0]
+
+    def deliver():
+        events = ring.drain()
+        if events:
+            callbacks[0] += 1
+            now = time.perf_counter()
+            latencies.extend(now - ev[0] for ev in events)
+
+    timer = QTimer()
+    timer.setInterval(int(1000 / frame_rate))
+    timer.timeout.connect(deliver)
+    timer.start()
+    thread = threading.Thread(target=produce, args=(lambda t, x, y: ring.push((t, 'move', x, y)), n))
+    thread.start()
+    while thread.is_alive() or len(latencies) < n:
+        app.processEvents()
+    thread.join()
+    timer.stop()
+    return len(latencies), callbacks[0], latencies
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+    print(f"{n:,} events")
+    print(f"{'delivery':12}{'events':>10}{'callbacks':>11}{'mean ms':>10}{'max ms':>10}{'wall s':>9}")
+    for name, run in [("signal/event", run_signals), ("ring@60fps", run_ring)]:
+        t = time.perf_counter()
+        delivered, callbacks, latencies = run(app, n)
+        wall = time.perf_counter() - t
+        mean = sum(latencies) / len(latencies) * 1000
+        print(f"{name:12}{delivered:10}{callbacks:11}{mean:10.2f}{max(latencies) * 1000:10.2f}{wall:9.2f}")
+
+
+if __name__ == "__main__":
+    main()
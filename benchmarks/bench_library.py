@@ -0,0 +1,86 @@
+"""Macro library: index a folder of generated .rec files, rescan it, search it.
+
+Times the first full index, a rescan with nothing changed, a rescan
+after touching 1% of the files, and search latency over a set of
+queries. Exits 1 when the median search is slower than the target.
+
+Run with:  python benchmarks/bench_library.py [files] [target ms]
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import recfile
+from library import MacroLibrary
+
+TARGET_MS = 10
+ACTIONS_PER_FILE = 60
+WORDS = ("invoice", "report", "customer", "order", "فاکتور", "گزارش", "مشتری", "سفارش",
+         "total", "monthly", "export", "login", "password", "archive", "ticket", "شماره")
+QUERIES = ("invoice", "گزارش", "cust", "monthly total", "ctrl", "login pass", "zzz", "order_17")
+
+
+def make_files(folder, count):
+    rnd = random.Random(1)
+    for n in range(count):
+        sub = os.path.join(folder, f"team{n % 20}")
+        os.makedirs(sub, exist_ok=True)
+        actions = [('show_screen', 1920, 1080)]
+        for i in range(ACTIONS_PER_FILE):
+            r = i % 6
+            if r == 0:
+                actions.append(('type', " ".join(rnd.sample(WORDS, 3)) + f" order_{n}",
+                                rnd.randrange(1920), rnd.randrange(1080)))
+            elif r == 1:
+                actions.append(('shortcut', rnd.choice(("Enter", "Tab", "Ctrl+S", "Ctrl+C"))))
+            else:
+                actions.append(('click', rnd.randrange(1920), rnd.randrange(1080)))
+        recfile.save_actions(os.path.join(sub, f"macro_{n}.rec"), actions)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    target = float(sys.argv[2]) if len(sys.argv) > 2 else TARGET_MS
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = os.path.join(tmp, "macros")
+        make_files(folder, count)
+        with MacroLibrary(os.path.join(tmp, "library.sqlite")) as library:
+            first, t_first = timed(lambda: library.update(folder))
+            again, t_again = timed(lambda: library.update(folder))
+            for n in range(0, count, 100):
+                path = os.path.join(folder, f"team{n % 20}", f"macro_{n}.rec")
+                recfile.save_actions(path, [('type', f"changed {n}")])
+            touched, t_touched = timed(lambda: library.update(folder))
+
+            latencies = {}
+            for query in QUERIES:
+                library.search(query)
+                samples = [timed(lambda: library.search(query))[1] * 1000 for _ in range(20)]
+                latencies[query] = (statistics.median(samples), len(library.search(query)))
+
+    print(f"{count} files, {ACTIONS_PER_FILE} actions each")
+    print(f"{'full index':22}{t_first * 1000:10.1f} ms   read {first[0]}")
+    print(f"{'rescan, no changes':22}{t_again * 1000:10.1f} ms   read {again[0]}")
+    print(f"{'rescan, 1% changed':22}{t_touched * 1000:10.1f} ms   read {touched[0]}")
+    print(f"\n{'query':16}{'results':>8}{'median ms':>11}")
+    for query, (ms, hits) in latencies.items():
+        print(f"{query:16}{hits:8}{ms:11.2f}")
+    median = statistics.median(ms for ms, _ in latencies.values())
+    ok = median <= target
+    print(f"search median {median:.2f} ms, target {target:g} ms: {'ok' if ok else 'FAILED'}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
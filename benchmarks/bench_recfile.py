@@ -0,0 +1,72 @@
+"""Save/load cost of the .rec formats on a large synthetic macro.
+
+Run with:  python benchmarks/bench_recfile.py [actions]   (default 1,000,000)
+"""
+import os
+import sys
+import json
+import time
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import recfile
+
+
+def make_actions(n):
+    kinds = [
+        lambda i: ('move', i % 1920, i % 1080),
+        lambda i: ('click', i % 1920, i % 1080),
+        lambda i: ('shortcut', ('Enter', 'Tab', 'F5')[i % 3]),
+        lambda i: ('show_screen', 1920, 1080),
+        lambda i: ('type', f"record {i % 500}", i % 1920, i % 1080),
+    ]
+    return [kinds[i % len(kinds)](i) for i in range(n)]
+
+
+def timed(fn):
+    t = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - t, result
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    actions = make_actions(n)
+    tmp = tempfile.mkdtemp()
+    v1 = os.path.join(tmp, "v1.rec")
+    v2 = os.path.join(tmp, "v2.rec")
+    v3 = os.path.join(tmp, "v3.rec")
+
+    def save_v1():
+        with open(v1, 'w', encoding='utf-8') as f:
+            json.dump(actions, f, ensure_ascii=False, indent=2)
+
+    rows = [
+        ("json v1", save_v1, v1),
+        ("jsonl v2", lambda: recfile.save_actions(v2, actions), v2),
+        ("binary v3", lambda: recfile.save_actions_binary(v3, actions), v3),
+    ]
+    print(f"{n:,} actions")
+    print(f"{'format':12}{'size MB':>10}{'save s':>10}{'load s':>10}")
+    for name, save, path in rows:
+        save_time, _ = timed(save)
+        load_time, loaded = timed(lambda: recfile.load_actions(path))
+        assert len(loaded) == n
+        print(f"{name:12}{os.path.getsize(path) / 1e6:10.1f}{save_time:10.2f}{load_time:10.2f}")
+
+    open_time, rec = timed(lambda: recfile.BinaryRecFile(v3))
+    first_page, _ = timed(lambda: rec[:50])
+    random_access, _ = timed(lambda: [rec[i] for i in range(0, n, max(1, n // 1000))])
+    rec.close()
+    print(f"binary v3 mmap: open {open_time * 1000:.2f} ms, first 50 rows {first_page * 1000:.2f} ms, "
+          f"1000 random rows {random_access * 1000:.2f} ms")
+
+    convert_time, _ = timed(lambda: recfile.convert(v1, v3, recfile.VERSION_BINARY))
+    print(f"convert v1 -> v3: {convert_time:.2f} s")
+    for path in (v1, v2, v3):
+        os.remove(path)
+    os.rmdir(tmp)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Cold start of the headless runner: `main.py run` on a tiny macro, null backend.
+
+Each sample is a fresh interpreter, timed from launch to exit, next to a
+bare `python -c pass` for reference. Also checks that none of the GUI /
+heavy modules got imported. Exits 1 when the median is over the target.
+Byte-compile first (python -m compileall .) or the numbers include that.
+
+Run with:  python benchmarks/bench_startup.py [samples] [target ms]
+"""
+import os
+import sys
+import time
+import tempfile
+import subprocess
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import recfile
+
+TARGET_MS = 150
+HEAVY = ("PySide6", "pynput", "pyautogui", "numpy")
+
+PROBE = """
+import runpy, sys
+sys.argv = ["main.py"] + sys.argv[1:]
+try:
+    runpy.run_path(sys.argv[0], run_name="__main__")
+except SystemExit:
+    pass
+print(",".join(m for m in %r if m in sys.modules), file=sys.stderr)
+""" % (HEAVY,)
+
+
+def sample(cmd, samples):
+    times = []
+    for _ in range(samples):
+        t = time.perf_counter()
+        subprocess.run(cmd, cwd=ROOT, check=True, stdout=subprocess.DEVNULL)
+        times.append((time.perf_counter() - t) * 1000)
+    return times
+
+
+def main():
+    samples = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    target = float(sys.argv[2]) if len(sys.argv) > 2 else TARGET_MS
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "job.rec")
+        recfile.save_actions(path, [('move', 10, 10), ('click', 10, 10), ('type', 'hello')])
+        run = ["run", path, "--backend", "null", "--delay", "0", "-q"]
+
+        bare = sample([sys.executable, "-c", "pass"], samples)
+        cli = sample([sys.executable, "main.py"] + run, samples)
+        probe = subprocess.run([sys.executable, "-c", PROBE] + run, cwd=ROOT, check=True,
+                               capture_output=True, text=True)
+    loaded = probe.stderr.strip().splitlines()[-1] if probe.stderr.strip() else ""
+
+    print(f"{'command':22}{'min ms':>9}{'median ms':>11}")
+    print(f"{'python -c pass':22}{min(bare):9.1f}{statistics.median(bare):11.1f}")
+    print(f"{'main.py run':22}{min(cli):9.1f}{statistics.median(cli):11.1f}")
+    print(f"heavy modules loaded: {loaded or 'none'}")
+    ok = statistics.median(cli) <= target and not loaded
+    print(f"target {target:g} ms: {'ok' if ok else 'FAILED'}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+"""Memory and operation cost of ActionStore against a list of tuples.
+
+Run with:  python benchmarks/bench_store.py [actions]   (default 1,000,000)
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from store import ActionStore
+
+
+def make_actions(n):
+    for i in range(n):
+        kind = i % 5
+        if kind == 0:
+            yield ('move', i % 1920, i % 1080)
+        elif kind == 1:
+            yield ('click', 1000 + i % 920, 500 + i % 580)
+        elif kind == 2:
+            yield ('shortcut', 'Enter')
+        elif kind == 3:
+            yield ('show_screen', 1920, 1080)
+        else:
+            yield ('type', f"record {i % 500}", i % 1920, i % 1080)
+
+
+def measure(build):
+    tracemalloc.start()
+    t = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - t
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size, elapsed
+
+
+def ops(actions, n):
+    t = time.perf_counter()
+    for _ in range(1000):
+        actions.append(('click', 1, 2))
+        actions.pop()
+    tail = (time.perf_counter() - t) / 2000 * 1e6
+    t = time.perf_counter()
+    for _ in range(100):
+        actions.insert(n // 2, ('click', 1, 2))
+        actions.pop(n // 2)
+    middle = (time.perf_counter() - t) / 200 * 1e6
+    return tail, middle
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    print(f"{n:,} actions")
+    print(f"{'container':14}{'memory MB':>12}{'build s':>10}{'append/pop us':>16}{'mid insert us':>16}")
+    for name, build in [("list[tuple]", lambda: list(make_actions(n))),
+                        ("ActionStore", lambda: ActionStore(make_actions(n)))]:
+        actions, size, elapsed = measure(build)
+        tail, middle = ops(actions, n)
+        print(f"{name:14}{size / 1e6:12.1f}{elapsed:10.2f}{tail:16.2f}{middle:16.2f}")
+        del actions
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""Replay pacing accuracy, measured headless with the RecordingBackend.
+
+Replays a short macro with a fixed delay and compares the recorded gaps
+between actions with the configured delay, plus the scheduler's own
+per-step lateness figures.
+Run with:  python benchmarks/bench_timing.py [delay] [steps]
+"""
+import os
+import sys
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backends import RecordingBackend
+from replay import ReplayControl, run_actions, lateness_summary
+
+
+def main():
+    delay = float(sys.argv[1]) if len(sys.argv) > 1 else 0.01
+    steps = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    actions = [('click', i % 800, i % 600) for i in range(steps)]
+
+    backend = RecordingBackend()
+    lateness = []
+    elapsed = run_actions(actions, 1, delay, ReplayControl(), backend=backend, lateness=lateness)
+
+    stamps = backend.timestamps('click')
+    errors = [(b - a - delay) * 1000 for a, b in zip(stamps, stamps[1:])]
+    print(f"steps: {steps}, delay {delay * 1000:.1f} ms, total {elapsed:.3f} s "
+          f"(ideal {delay * (steps - 1):.3f} s)")
+    print(f"gap error  mean {statistics.mean(errors):7.3f} ms   "
+          f"stdev {statistics.pstdev(errors):7.3f} ms   max {max(errors):7.3f} ms")
+    print(f"drift over run: {(elapsed - delay * (steps - 1)) * 1000:.1f} ms")
+    late = lateness_summary(lateness)
+    print(f"lateness   p50 {late['p50'] * 1000:7.3f} ms   p95 {late['p95'] * 1000:7.3f} ms   "
+          f"max {late['max'] * 1000:7.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Cost of one wait_until poll: region grab, downscale and compare.
+
+The grab is simulated by cropping a prepared image, so the numbers are
+the probe's own overhead (a real screenshot adds the OS grab on top).
+Run with:  python benchmarks/bench_wait.py [polls]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from PIL import Image
+import screen
+from screen import RegionProbe
+
+SCREEN = Image.effect_noise((1920, 1080), 64).convert('RGB')
+
+
+def grab(region):
+    x, y, w, h = region
+    return SCREEN.crop((x, y, x + w, y + h))
+
+
+def measure(probe, region, polls):
+    base = probe.sample(region)
+    t = time.perf_counter()
+    for _ in range(polls):
+        probe.same(base, probe.sample(region))
+    return (time.perf_counter() - t) / polls * 1000
+
+
+def main():
+    polls = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    regions = [(0, 0, 200, 100), (100, 100, 800, 600), (0, 0, 1920, 1080)]
+    numpy = screen.load_numpy()
+    print(f"{'region':>12}{'scale':>7}{'numpy ms':>10}{'hash ms':>10}")
+    for region in regions:
+        for scale in (1, 4):
+            screen.numpy = numpy
+            with_numpy = measure(RegionProbe(grab, scale), region, polls)
+            screen.numpy = None
+            with_hash = measure(RegionProbe(grab, scale), region, polls)
+            print(f"{region[2]:>6}x{region[3]:<5}{scale:7}{with_numpy:10.3f}{with_hash:10.3f}")
+    screen.numpy = numpy
+
+
+if __name__ == "__main__":
+    main()
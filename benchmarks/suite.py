@@ -0,0 +1,281 @@
+"""Benchmark suite: file formats, list model, editor reorder and replay dispatch at several sizes.
+
+Synthetic macros mix every action type. Each case is timed best-of-N and
+the results are written as JSON, so two commits can be compared:
+
+    python benchmarks/suite.py --out before.json
+    git checkout <other commit>
+    python benchmarks/suite.py --out after.json --compare before.json
+
+--compare prints the ratio per case and exits 1 when any case got slower
+than --tolerance (default 1.25x). Qt cases run on the offscreen platform
+and are skipped when PySide6 is not installed.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import tempfile
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+import recfile
+from store import ActionStore
+from backends import NullBackend
+from replay import ReplayControl, action_meta, compile_actions, run_program
+from optimize import optimize
+import geometry
+
+SIZES = (1000, 100000, 1000000)
+DEFAULT_TOLERANCE = 1.25
+# Case timings shorter than this are repeated and the best kept
+MIN_SAMPLE_TIME = 0.2
+MAX_REPEATS = 500
+
+
+def make_actions(n):
+    """`n` actions cycling through every action type, some with recorded gaps"""
+    kinds = [
+        lambda i: ('move', i % 1920, i % 1080, {'dt': 0.016}),
+        lambda i: ('click', i % 1920, i % 1080),
+        lambda i: ('click', i % 1920, i % 1080, 'right'),
+        lambda i: ('scroll', i % 1920, i % 1080, -3),
+        lambda i: ('shortcut', ('Enter', 'Tab', 'Ctrl+S')[i % 3]),
+        lambda i: ('show_screen', 1920, 1080),
+        lambda i: ('type', f"record {i % 500}", i % 1920, i % 1080),
+        lambda i: ('type', f"note {i % 100}", {'entry': 'batch'}),
+        lambda i: ('wait_until', 'change', 0, 0, 200, 100, 0.0, 10.0, 0.05),
+    ]
+    return [kinds[i % len(kinds)](i) for i in range(n)]
+
+
+def best_of(fn, setup=None):
+    """Best wall time of fn(); repeated while samples are short"""
+    best = None
+    spent = 0.0
+    for _ in range(MAX_REPEATS):
+        arg = setup() if setup is not None else None
+        t = time.perf_counter()
+        fn(arg)
+        elapsed = time.perf_counter() - t
+        best = elapsed if best is None else min(best, elapsed)
+        spent += elapsed
+        if spent >= MIN_SAMPLE_TIME:
+            break
+    return best
+
+
+# --- Cases ---
+# Each case takes (actions, tmp dir) and returns seconds, or None to skip
+def case_save_jsonl(actions, tmp):
+    path = os.path.join(tmp, "v2.rec")
+    return best_of(lambda _: recfile.save_actions(path, actions))
+
+
+def case_load_jsonl(actions, tmp):
+    path = os.path.join(tmp, "v2.rec")
+    recfile.save_actions(path, actions)
+    return best_of(lambda _: recfile.load_actions(path))
+
+
+def case_save_binary(actions, tmp):
+    path = os.path.join(tmp, "v3.rec")
+    return best_of(lambda _: recfile.save_actions_binary(path, actions))
+
+
+def case_load_binary(actions, tmp):
+    path = os.path.join(tmp, "v3.rec")
+    recfile.save_actions_binary(path, actions)
+    return best_of(lambda _: recfile.load_actions(path))
+
+
+def case_store_build(actions, tmp):
+    return best_of(lambda _: ActionStore(actions))
+
+
+def _qt():
+    try:
+        from PySide6.QtWidgets import QApplication
+    except ImportError:
+        return None
+    import gui
+    app = QApplication.instance() or QApplication([])
+    return app, gui
+
+
+def case_list_populate(actions, tmp):
+    """Swap a store into the shared model with a visible list view and paint it"""
+    qt = _qt()
+    if qt is None:
+        return None
+    app, gui = qt
+    model = gui.ActionListModel(ActionStore())
+    view = gui.ActionListView(model)
+    view.resize(360, 540)
+    view.show()
+    app.processEvents()
+
+    def populate(store):
+        model.set_store(store)
+        view.repaint()
+        app.processEvents()
+    seconds = best_of(populate, lambda: ActionStore(actions))
+    view.close()
+    return seconds
+
+
+def case_editor_reorder(actions, tmp):
+    """200 moves of a row through the undo history, then undone"""
+    qt = _qt()
+    if qt is None:
+        return None
+    app, gui = qt
+    from history import History, MoveAction
+    model = gui.ActionListModel(ActionStore(actions))
+    history = History(model)
+    middle = len(actions) // 2
+
+    def reorder(_):
+        for i in range(100):
+            history.do(MoveAction(middle + i, middle + i + 1))
+            history.do(MoveAction(middle - i, middle - i - 1))
+        for _ in range(200):
+            history.undo()
+    return best_of(reorder)
+
+
+def case_optimize(actions, tmp):
+    return best_of(lambda _: optimize(actions))
+
+
+def case_fit_screen(actions, tmp):
+    """Map a 1920x1080 recording to 1366x768, cache cleared every time"""
+    def fit(_):
+        geometry._fit_cache.clear()
+        geometry.fit_to_screen(actions, (1366, 768))
+    return best_of(fit)
+
+
+def case_compile(actions, tmp):
+    control = ReplayControl()
+    backend = NullBackend()
+    return best_of(lambda _: compile_actions(actions, 0.0, control, backend, type_interval=0))
+
+
+def case_dispatch(actions, tmp):
+    """One replay run against the no-op backend, no pauses.
+
+    Recorded gaps are stripped (they would be slept) and wait steps left
+    out (they grab the screen).
+    """
+    control = ReplayControl()
+    runnable = [action_meta(a)[0] for a in actions if a[0] != 'wait_until']
+    program = compile_actions(runnable, 0.0, control, NullBackend(), type_interval=0)
+    return best_of(lambda _: run_program(program, 1, control))
+
+
+CASES = {
+    'save_jsonl': case_save_jsonl,
+    'load_jsonl': case_load_jsonl,
+    'save_binary': case_save_binary,
+    'load_binary': case_load_binary,
+    'store_build': case_store_build,
+    'list_populate': case_list_populate,
+    'editor_reorder': case_editor_reorder,
+    'optimize': case_optimize,
+    'fit_screen': case_fit_screen,
+    'compile': case_compile,
+    'dispatch': case_dispatch,
+}
+# ----------------------------------
+
+
+def _commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                             capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def run_suite(sizes, cases):
+    results = []
+    tmp = tempfile.mkdtemp()
+    try:
+        for size in sizes:
+            actions = make_actions(size)
+            for name in cases:
+                seconds = CASES[name](actions, tmp)
+                results.append({
+                    'case': name,
+                    'size': size,
+                    'seconds': seconds,
+                    'ns_per_action': None if seconds is None else seconds / size * 1e9,
+                })
+                shown = "skipped" if seconds is None else f"{seconds * 1000:10.2f} ms"
+                print(f"{name:16}{size:>10,}  {shown}", flush=True)
+    finally:
+        shutil.rmtree(tmp)
+    return {
+        'commit': _commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'time': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'results': results,
+    }
+
+
+def compare(report, baseline, tolerance):
+    """Print new/old ratios; returns the number of cases slower than `tolerance`"""
+    old = {(r['case'], r['size']): r['seconds'] for r in baseline['results']}
+    slower = 0
+    print(f"\nvs {baseline.get('commit') or 'baseline'}:")
+    for r in report['results']:
+        before = old.get((r['case'], r['size']))
+        if r['seconds'] is None or not before:
+            continue
+        ratio = r['seconds'] / before
+        flag = ""
+        if ratio > tolerance:
+            flag = "  SLOWER"
+            slower += 1
+        print(f"{r['case']:16}{r['size']:>10,}  {ratio:6.2f}x{flag}")
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=",".join(str(s) for s in SIZES),
+                        help="comma-separated macro sizes")
+    parser.add_argument("--cases", default=",".join(CASES), help="comma-separated case names")
+    parser.add_argument("--out", help="write the results as JSON here")
+    parser.add_argument("--compare", metavar="BASELINE", help="JSON results of an earlier run")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="slowdown ratio counted as a regression")
+    args = parser.parse_args(argv)
+    sizes = [int(s) for s in args.sizes.split(",")]
+    cases = args.cases.split(",")
+    unknown = [c for c in cases if c not in CASES]
+    if unknown:
+        parser.error(f"unknown case(s): {', '.join(unknown)}")
+
+    report = run_suite(sizes, cases)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+from replay import compile_actions, with_meta, total_pause
+from screen import RegionProbe, WaitTimeout, wait_for_stable
+
+# The screen counts as settled once it has not changed for this long
+SETTLE_HOLD = 0.15
+SETTLE_POLL = 0.02
+SETTLE_TIMEOUT = 5.0
+# Tuned delay = observed settle time x margin, never below MIN_DELAY
+SAFETY_MARGIN = 1.25
+MIN_DELAY = 0.02
+# Calibration watches the whole screen, so it samples it coarser
+CALIBRATION_SCALE = 8
+
+
+def calibrate_actions(actions, control, on_progress=None, backend=None, probe=None,
+                      hold=SETTLE_HOLD, timeout=SETTLE_TIMEOUT, margin=SAFETY_MARGIN,
+                      min_delay=MIN_DELAY, region=None, delay=0.0, base_dir=None):
+    """Replay `actions` once and measure how long the screen takes to settle after each.
+
+    Returns one delay per action: the settle time with a safety margin,
+    or None where no delay applies (wait_until steps time themselves,
+    show_screen sends nothing) or the screen never settled within `timeout` (the global delay is kept).
+    The settle time counts from the start of the step, as a tuned delay
+    is scheduled, so it includes the action's own duration; `delay` is
+    the global delay of the real replay, which sets how long moves take.
+    `region` limits the watching to part of the screen; None is all of it.
+    Relative sub-macro paths are looked up in `base_dir`.
+    """
+    if probe is None:
+        probe = RegionProbe(scale=CALIBRATION_SCALE)
+    program = compile_actions(actions, delay, control, backend, probe=probe, base_dir=base_dir)
+    delays = [None] * len(actions)
+    start = control.clock()
+    for index, call, pause in program:
+        if control.interrupted:
+            control.checkpoint()
+        if on_progress is not None:
+            on_progress(0, index, control.clock() - start)
+        started = control.clock()
+        if call is not None:
+            call()
+        if pause is None:
+            continue
+        try:
+            wait_for_stable(probe, control, region, hold, timeout, SETTLE_POLL)
+        except WaitTimeout:
+            continue
+        # The last change was seen `hold` seconds before the wait returned
+        settle = max(0.0, control.clock() - started - hold)
+        delays[index] = round(max(min_delay, settle * margin), 3)
+    return delays
+
+
+def apply_delays(actions, delays):
+    """The actions with their tuned 'delay' set from `delays` (None clears it)"""
+    return [with_meta(action, delay=delay) for action, delay in zip(actions, delays)]
+
+
+def time_saved(actions, tuned_actions, delay):
+    """(pause per run before, pause per run after) in seconds"""
+    return total_pause(actions, delay), total_pause(tuned_actions, delay)
@@ -0,0 +1,249 @@
+import math
+
+DEFAULT_TOLERANCE = 3.0        # pixels a simplified path may stray from the real one
+DEFAULT_PAUSE_THRESHOLD = 0.25  # seconds without movement that end a stroke
+MAX_STROKE_POINTS = 256         # a pointer that never rests is simplified in pieces this long
+
+
+def rdp_simplify(points, tolerance):
+    """Ramer-Douglas-Peucker over (t, x, y) points; the end points are always kept"""
+    n = len(points)
+    if n < 3:
+        return list(points)
+    keep = [False] * n
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        _, x1, y1 = points[first]
+        _, x2, y2 = points[last]
+        dx = x2 - x1
+        dy = y2 - y1
+        length = math.hypot(dx, dy)
+        max_dist = -1.0
+        index = first
+        for i in range(first + 1, last):
+            _, x, y = points[i]
+            if length:
+                dist = abs(dy * x - dx * y + x2 * y1 - y2 * x1) / length
+            else:
+                dist = math.hypot(x - x1, y - y1)
+            if dist > max_dist:
+                max_dist = dist
+                index = i
+        if max_dist > tolerance:
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+    return [p for p, k in zip(points, keep) if k]
+
+
+# --- Continuous Recorder ---
+class ContinuousRecorder:
+    """Turns a raw stream of pointer events into a short list of actions.
+
+    Moves are gathered into strokes; a stroke ends at a click or scroll, or
+    once the pointer rests for `pause_threshold` seconds. A stroke that
+    reaches `max_points` is finished too and the next one continues from
+    its last point, so RDP never runs over more than that. Each finished
+    stroke is reduced with Ramer-Douglas-Peucker before it becomes 'move'
+    actions, and a burst of wheel ticks at one spot becomes one 'scroll'.
+    Every feed_* call returns the (t, action) pairs it completed.
+    """
+
+    def __init__(self, tolerance=DEFAULT_TOLERANCE, pause_threshold=DEFAULT_PAUSE_THRESHOLD,
+                 max_points=MAX_STROKE_POINTS):
+        self.tolerance = tolerance
+        self.pause_threshold = pause_threshold
+        self.max_points = max_points
+        self.stroke = []
+        # The stroke's first point was already sent as the end of the previous piece
+        self.continued = False
+        self.scroll = None
+        self.raw_events = 0
+        self.actions_out = 0
+
+    def _finish_stroke(self):
+        if not self.stroke:
+            return []
+        points = rdp_simplify(self.stroke, self.tolerance)
+        if self.continued:
+            points = points[1:]
+            self.continued = False
+        self.stroke = []
+        self.actions_out += len(points)
+        return [(t, ('move', x, y)) for t, x, y in points]
+
+    def _finish_scroll(self):
+        if self.scroll is None:
+            return []
+        t, x, y, dy = self.scroll
+        self.scroll = None
+        self.actions_out += 1
+        return [(t, ('scroll', x, y, dy))]
+
+    def feed_move(self, t, x, y):
+        self.raw_events += 1
+        out = self._finish_scroll()
+        if self.stroke and t - self.stroke[-1][0] >= self.pause_threshold:
+            out += self._finish_stroke()
+        self.stroke.append((t, x, y))
+        if len(self.stroke) >= self.max_points:
+            last = self.stroke[-1]
+            out += self._finish_stroke()
+            self.stroke = [last]
+            self.continued = True
+        return out
+
+    def feed_click(self, t, x, y, button='left'):
+        self.raw_events += 1
+        out = self._finish_scroll() + self._finish_stroke()
+        # The click moves the pointer itself, so a final move onto the same spot is redundant
+        if out and out[-1][1] == ('move', x, y):
+            out.pop()
+            self.actions_out -= 1
+        action = ('click', x, y) if button == 'left' else ('click', x, y, button)
+        out.append((t, action))
+        self.actions_out += 1
+        return out
+
+    def feed_scroll(self, t, x, y, dy):
+        self.raw_events += 1
+        out = self._finish_stroke()
+        if self.scroll is not None:
+            st, sx, sy, sdy = self.scroll
+            if (sx, sy) == (x, y) and t - st < self.pause_threshold:
+                self.scroll = (st, x, y, sdy + dy)
+                return out
+            out += self._finish_scroll()
+        self.scroll = (t, x, y, dy)
+        return out
+
+    def flush(self):
+        return self._finish_scroll() + self._finish_stroke()
+
+    @property
+    def reduction(self):
+        """Fraction of raw events that did not become an action"""
+        if not self.raw_events:
+            return 0.0
+        return 1.0 - self.actions_out / self.raw_events
+# ----------------------------------
+
+
+# --- Keystroke Recorder ---
+# pynput Key names -> names used in 'shortcut' actions
+MODIFIER_NAMES = {
+    'ctrl': 'Ctrl', 'ctrl_l': 'Ctrl', 'ctrl_r': 'Ctrl',
+    'shift': 'Shift', 'shift_l': 'Shift', 'shift_r': 'Shift',
+    'alt': 'Alt', 'alt_l': 'Alt', 'alt_r': 'Alt',
+    'cmd': 'Win', 'cmd_l': 'Win', 'cmd_r': 'Win',
+}
+MODIFIER_ORDER = ('Ctrl', 'Shift', 'Alt', 'Win')
+
+SPECIAL_KEY_NAMES = {
+    'enter': 'Enter', 'backspace': 'Backspace', 'delete': 'Delete', 'tab': 'Tab',
+    'esc': 'Esc', 'space': 'Space', 'up': 'Up', 'down': 'Down', 'left': 'Left',
+    'right': 'Right', 'home': 'Home', 'end': 'End', 'page_up': 'PageUp',
+    'page_down': 'PageDown', 'insert': 'Insert',
+}
+
+
+class KeystrokeRecorder:
+    """Turns key press/release events into 'type' and 'shortcut' actions.
+
+    Runs of printable keys (Shift allowed) become one ('type', text);
+    Backspace inside a run just takes the last character back. A key
+    pressed while Ctrl, Alt or Win is held becomes one chord such as
+    ('shortcut', 'Ctrl+Shift+S'), and lone special keys become
+    ('shortcut', 'Enter'). Keys are pynput Key/KeyCode objects.
+    """
+
+    def __init__(self):
+        self.held = set()
+        self.text = []
+        self.text_t = None
+        self.raw_events = 0
+        self.actions_out = 0
+
+    def _finish_text(self):
+        if not self.text:
+            return []
+        out = [(self.text_t, ('type', ''.join(self.text)))]
+        self.text = []
+        self.actions_out += 1
+        return out
+
+    def _shortcut(self, t, name):
+        out = self._finish_text()
+        mods = [m for m in MODIFIER_ORDER if m in self.held]
+        out.append((t, ('shortcut', '+'.join(mods + [name]))))
+        self.actions_out += 1
+        return out
+
+    def feed_key(self, t, key, pressed):
+        self.raw_events += 1
+        key_name = getattr(key, 'name', None)
+        modifier = MODIFIER_NAMES.get(key_name)
+        if modifier is not None:
+            if pressed:
+                self.held.add(modifier)
+            else:
+                self.held.discard(modifier)
+            return []
+        if not pressed:
+            return []
+        char = getattr(key, 'char', None)
+        if key_name == 'space':
+            char = ' '
+        chord = bool(self.held - {'Shift'})
+        if char and not chord:
+            if not self.text:
+                self.text_t = t
+            self.text.append(char)
+            return []
+        if key_name == 'backspace' and self.text and not chord:
+            self.text.pop()
+            return []
+        if char:
+            # With Ctrl held some platforms report a control character (Ctrl+S -> '\x13')
+            if ord(char) < 32:
+                char = chr(ord(char) + 64)
+            return self._shortcut(t, char.upper())
+        if key_name in SPECIAL_KEY_NAMES:
+            return self._shortcut(t, SPECIAL_KEY_NAMES[key_name])
+        if key_name and key_name[:1] == 'f' and key_name[1:].isdigit():
+            return self._shortcut(t, key_name.upper())
+        return []
+
+    def flush(self):
+        return self._finish_text()
+
+    @property
+    def reduction(self):
+        """Fraction of raw key events that did not become an action"""
+        if not self.raw_events:
+            return 0.0
+        return 1.0 - self.actions_out / self.raw_events
+# ----------------------------------
+
+
+class OffsetStamper:
+    """Drops the timestamps of (t, action) pairs, keeping the gaps as {'dt': seconds}.
+
+    The first action gets no offset, so a recording appended to a macro
+    starts after the usual delay.
+    """
+
+    def __init__(self):
+        self.last = None
+
+    def __call__(self, timed):
+        actions = []
+        for t, action in timed:
+            if self.last is None:
+                actions.append(action)
+            else:
+                actions.append(action + ({'dt': round(t - self.last, 4)},))
+            self.last = t
+        return actions
@@ -0,0 +1,260 @@
+"""Headless replay:  python main.py run job.rec --repeat N --delay 0.1
+Macro library:    python main.py index FOLDER...  /  python main.py search TEXT
+
+Only the replay engine is imported here. PySide6 and pynput never load,
+and pyautogui only when it is the chosen backend. Data files, parallel
+displays and the optimizer are imported when their options are used.
+"""
+import os
+import sys
+import argparse
+from backends import BACKENDS, create_backend
+from replay import (ReplayControl, ReplayAborted, CONTROL_KINDS, run_actions, run_stream,
+                    lateness_summary)
+import recfile
+
+EXIT_OK = 0
+EXIT_FAILED = 1       # the replay itself went wrong
+EXIT_USAGE = 2        # bad arguments or an unreadable file (argparse uses 2 as well)
+EXIT_INTERRUPTED = 130
+
+DEFAULT_DELAY = 0.3
+
+
+class ReplayFailed(Exception):
+    """An error raised once playback has started; the command line was fine"""
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="main.py", description="Aut0mate without the window")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="replay a .rec file")
+    run.add_argument("path", help=".rec file to replay")
+    run.add_argument("--repeat", type=int, default=1, help="number of runs (default 1)")
+    run.add_argument("--delay", type=float, default=DEFAULT_DELAY,
+                     help=f"seconds between actions (default {DEFAULT_DELAY})")
+    run.add_argument("--speed", type=float, default=1.0, help="replay speed factor")
+    run.add_argument("--backend", choices=sorted(BACKENDS), default="pyautogui")
+    run.add_argument("--no-optimize", dest="optimize", action="store_false",
+                     help="replay the file as recorded, streamed instead of loaded "
+                          "(loaded after all when it has loops, calls or conditions)")
+    run.add_argument("--no-fit", dest="fit", action="store_false",
+                     help="use the recorded coordinates as they are, whatever the screen size")
+    run.add_argument("--data", metavar="FILE",
+                     help="CSV / JSONL file: one run per row, {{column}} placeholders filled in")
+    run.add_argument("--restart", action="store_true",
+                     help="with --data: start at the first row even if a progress file exists")
+    run.add_argument("--workers", type=int, metavar="N",
+                     help="spread the runs over N virtual displays (Xvfb) in parallel")
+    run.add_argument("--size", default="1920x1080", help="with --workers: WxH of each display")
+    run.add_argument("--trace", metavar="FILE",
+                     help="time every step; write a Chrome trace (JSON) and print percentiles")
+    run.add_argument("-q", "--quiet", action="store_true", help="print errors only")
+
+    index = commands.add_parser("index", help="add folders of .rec files to the library index")
+    index.add_argument("folders", nargs="*",
+                       help="folders to scan (default: every folder indexed before)")
+    index.add_argument("--db", help="library database (default ~/.aut0mate/library.sqlite)")
+    index.add_argument("-q", "--quiet", action="store_true", help="print errors only")
+
+    search = commands.add_parser("search", help="find indexed .rec files by typed text, shortcut or name")
+    search.add_argument("text", nargs="*", help="words to look for (none: most recent files)")
+    search.add_argument("--limit", type=int, default=50)
+    search.add_argument("--db", help="library database (default ~/.aut0mate/library.sqlite)")
+    search.add_argument("-q", "--quiet", action="store_true", help="print paths only")
+    return parser
+
+
+def _say(args, message):
+    if not args.quiet:
+        print(message)
+
+
+def _macro_dir(args):
+    # Relative ('call', path) actions are looked up next to the macro
+    return os.path.dirname(os.path.abspath(args.path))
+
+
+def _load_plain(args):
+    """The actions to replay, or None to stream them from the file"""
+    if args.optimize:
+        from optimize import optimize
+        actions, _ = optimize(recfile.load_actions(args.path))
+        return actions
+    # Reading the file through once also finds corrupt lines before playback
+    if any(action[0] in CONTROL_KINDS for action in recfile.iter_actions(args.path)):
+        # Loops, calls and conditions need the compiled program
+        return recfile.load_actions(args.path)
+    return None
+
+
+def _run_plain(args, actions, backend, control):
+    lateness = []
+    trace = None
+    if args.trace:
+        from tracing import ReplayTrace
+        trace = ReplayTrace()
+    if actions is not None:
+        count = len(actions)
+        elapsed = run_actions(actions, args.repeat, args.delay, control, backend=backend,
+                              speed=args.speed, lateness=lateness, trace=trace,
+                              base_dir=_macro_dir(args), fit=args.fit)
+    else:
+        elapsed = run_stream(lambda: recfile.iter_actions(args.path), args.repeat, args.delay,
+                             control, backend=backend, speed=args.speed, lateness=lateness,
+                             trace=trace, fit=args.fit)
+        count = len(lateness) // args.repeat
+    late = lateness_summary(lateness)
+    _say(args, f"{count} actions x {args.repeat} runs in {elapsed:.2f} s "
+               f"(late p50 {late['p50'] * 1000:.1f} ms, p95 {late['p95'] * 1000:.1f} ms)")
+    if trace is not None:
+        trace.save_chrome(args.trace)
+        _say(args, trace.format_summary())
+        _say(args, f"trace written to {args.trace}")
+    return EXIT_OK
+
+
+def _run_data(args, actions, backend, control):
+    from dataset import run_dataset
+
+    current = [None]
+
+    def report(row, index, elapsed):
+        if row != current[0]:
+            current[0] = row
+            _say(args, f"row {row + 1}")
+
+    done, skipped = run_dataset(actions, args.data, args.delay, control,
+                                report, backend, args.speed, resume=not args.restart, fit=args.fit,
+                                base_dir=_macro_dir(args))
+    _say(args, f"{done} rows replayed" + (f", {skipped} done before" if skipped else ""))
+    return EXIT_OK
+
+
+def _parse_size(text):
+    try:
+        w, h = (int(v) for v in text.lower().split("x"))
+    except ValueError:
+        raise ValueError(f"--size must look like 1920x1080, not {text}") from None
+    if w < 1 or h < 1:
+        raise ValueError(f"--size must look like 1920x1080, not {text}")
+    return w, h
+
+
+def _run_parallel(args, actions):
+    from parallel import run_parallel
+    results = run_parallel(actions, args.repeat, args.delay, args.workers, args.backend, args.speed,
+                           _parse_size(args.size), fit=args.fit, base_dir=_macro_dir(args))
+    failed = 0
+    for result in results:
+        _say(args, f"{result['display']:>6}  {result['runs']:5} runs  "
+                   f"{len(result['failures']):4} failed  {result['busy']:8.1f} s busy")
+        if result['error'] is not None:
+            print(f"{result['display']} retired: {result['error']}", file=sys.stderr)
+        for run, message in result['failures']:
+            print(f"{result['display']} run {run + 1}: {message}", file=sys.stderr)
+        failed += len(result['failures'])
+    retired = sum(result['error'] is not None for result in results)
+    _say(args, f"{args.repeat} runs on {len(results)} displays, {failed} failed"
+               + (f", {retired} displays retired" if retired else ""))
+    return EXIT_FAILED if failed else EXIT_OK
+
+
+def run(args):
+    # Arguments and the macro are checked before any input is sent, so that
+    # EXIT_USAGE never means a replay was left half done
+    if args.repeat < 1:
+        raise ValueError("--repeat must be at least 1")
+    if args.trace and (args.data or args.workers is not None):
+        raise ValueError("--trace only works for plain runs (no --data / --workers)")
+    if args.workers is not None:
+        if args.data:
+            raise ValueError("--data and --workers can't be combined")
+        if args.workers < 1:
+            raise ValueError("--workers must be at least 1")
+        _parse_size(args.size)
+    if args.data and not os.path.isfile(args.data):
+        raise ValueError(f"no such data file: {args.data}")
+    if args.data or args.workers is not None:
+        actions = recfile.load_actions(args.path)
+    else:
+        actions = _load_plain(args)
+    try:
+        if args.workers is not None:
+            return _run_parallel(args, actions)
+        backend = create_backend(args.backend)
+        control = ReplayControl()
+        try:
+            if args.data:
+                return _run_data(args, actions, backend, control)
+            return _run_plain(args, actions, backend, control)
+        finally:
+            backend.close()
+    except (KeyboardInterrupt, ReplayAborted):
+        raise
+    except Exception as e:
+        raise ReplayFailed(f"{type(e).__name__}: {e}") from e
+
+
+def _library(args):
+    from library import MacroLibrary, DEFAULT_DB_PATH
+    return MacroLibrary(args.db or DEFAULT_DB_PATH)
+
+
+def index(args):
+    with _library(args) as library:
+        if args.folders:
+            missing = [f for f in args.folders if not os.path.isdir(f)]
+            if missing:
+                raise ValueError(f"not a folder: {', '.join(missing)}")
+            totals = [0, 0, 0]
+            for folder in args.folders:
+                for i, n in enumerate(library.update(folder)):
+                    totals[i] += n
+        else:
+            if not library.roots():
+                raise ValueError("no folders indexed yet; name one")
+            totals = library.update_all()
+        read, removed, unchanged = totals
+        _say(args, f"{read} read, {removed} removed, {unchanged} unchanged; "
+                   f"{library.count()} files in the library")
+    return EXIT_OK
+
+
+def search(args):
+    with _library(args) as library:
+        results = library.search(" ".join(args.text), args.limit)
+    for result in results:
+        if args.quiet:
+            print(result['path'])
+            continue
+        print(f"{result['path']}  ({result['actions']} actions)")
+        if result['error']:
+            print(f"    unreadable: {result['error']}")
+        elif result['snippet']:
+            print("    " + " ".join(result['snippet'].split()))
+    return EXIT_OK if results else EXIT_FAILED
+
+
+COMMANDS = {"run": run, "index": index, "search": search}
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return COMMANDS[args.command](args)
+    except KeyboardInterrupt:
+        print("interrupted", file=sys.stderr)
+        return EXIT_INTERRUPTED
+    except ReplayAborted:
+        print("aborted", file=sys.stderr)
+        return EXIT_INTERRUPTED
+    except ReplayFailed as e:
+        print(f"replay failed: {e}", file=sys.stderr)
+        return EXIT_FAILED
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return EXIT_USAGE
+    except Exception as e:
+        print(f"replay failed: {type(e).__name__}: {e}", file=sys.stderr)
+        return EXIT_FAILED
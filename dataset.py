@@ -0,0 +1,185 @@
+import os
+import re
+import csv
+import json
+import hashlib
+from backends import PyAutoGuiBackend
+from replay import action_meta, compile_actions, run_program
+from optimize import optimize
+
+# {{column}} in a 'type' text, or as the whole x / y of an action
+PLACEHOLDER = re.compile(r"\{\{\s*([^{}]+?)\s*\}\}")
+CHECKPOINT_SUFFIX = ".progress"
+
+
+# --- Templates ---
+def _split(text):
+    """A text as alternating literal / column-name parts, or None without placeholders"""
+    parts = PLACEHOLDER.split(text)
+    return parts if len(parts) > 1 else None
+
+
+def _fill(parts, row):
+    # parts[1::2] are column names
+    out = list(parts)
+    for i in range(1, len(parts), 2):
+        out[i] = row[parts[i]]
+    return "".join(out)
+
+
+def _coordinate(value, name):
+    try:
+        return int(round(float(value)))
+    except (TypeError, ValueError):
+        raise ValueError(f"Column '{name}' is not a coordinate: {value!r}") from None
+
+
+class MacroTemplate:
+    """A macro with {{column}} placeholders, parsed once and filled in per row.
+
+    Placeholders work in 'type' text and as x / y of move, click, scroll
+    and type. Actions without any are shared by every rendered copy.
+    """
+
+    def __init__(self, actions):
+        self.actions = list(actions)
+        # (index, {field position: parts}) for the actions that have placeholders
+        self.slots = []
+        names = set()
+        for i, action in enumerate(self.actions):
+            core, _ = action_meta(action)
+            fields = {}
+            if core[0] == 'type':
+                fields[1] = _split(core[1])
+                positions = (2, 3) if len(core) > 3 else ()
+            elif core[0] in ('move', 'click', 'scroll'):
+                positions = (1, 2)
+            else:
+                positions = ()
+            for pos in positions:
+                if isinstance(core[pos], str):
+                    fields[pos] = _split(core[pos])
+            fields = {pos: parts for pos, parts in fields.items() if parts}
+            if fields:
+                self.slots.append((i, fields))
+                for parts in fields.values():
+                    names.update(parts[1::2])
+        self.names = names
+
+    def render(self, row):
+        """The actions with the placeholders replaced by `row`'s values"""
+        missing = self.names.difference(row)
+        if missing:
+            raise ValueError(f"No column named {', '.join(sorted(missing))}")
+        actions = list(self.actions)
+        for i, fields in self.slots:
+            action = list(actions[i])
+            for pos, parts in fields.items():
+                value = _fill(parts, row)
+                action[pos] = value if pos == 1 and action[0] == 'type' else _coordinate(value, parts[1])
+            actions[i] = tuple(action)
+        return actions
+
+    def digest(self):
+        """Identifies the macro in a checkpoint"""
+        return hashlib.blake2b(repr(self.actions).encode(), digest_size=8).hexdigest()
+# ----------------------------------
+
+
+# --- Data Rows ---
+def iter_rows(path):
+    """Yield (row_number, {column: text}) from a CSV (with a header) or JSONL file, one at a time"""
+    if path.lower().endswith((".jsonl", ".ndjson")):
+        with open(path, 'r', encoding='utf-8-sig') as f:
+            number = 0
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    raise ValueError(f"Invalid JSON on line {line_no}") from None
+                if not isinstance(row, dict):
+                    raise ValueError(f"Line {line_no} is not a JSON object")
+                number += 1
+                yield number, {k: "" if v is None else str(v) for k, v in row.items()}
+    else:
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            for number, row in enumerate(csv.DictReader(f), 1):
+                # Short rows leave the last columns as None
+                yield number, {k: "" if v is None else v for k, v in row.items()}
+
+
+class Checkpoint:
+    """Number of finished rows, kept next to the data file as <data>.progress"""
+
+    def __init__(self, data_path, digest):
+        self.path = data_path + CHECKPOINT_SUFFIX
+        self.digest = digest
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return 0
+        except ValueError:
+            raise ValueError(f"Progress file {self.path} is corrupt; delete it to start over") from None
+        if state.get("macro") != self.digest:
+            raise ValueError(f"Progress file {self.path} belongs to a different macro; "
+                             f"delete it to start over")
+        return state["done"]
+
+    def save(self, done):
+        # Write then rename, so a crash never leaves a half-written file
+        tmp = self.path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({"macro": self.digest, "done": done}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+# ----------------------------------
+
+
+def run_dataset(actions, data_path, delay, control, on_progress=None,
+                backend=None, speed=1.0, resume=True, fit=True, base_dir=None):
+    """Replay `actions` once per row of `data_path`, filling in the placeholders.
+
+    Rows are read as they are replayed. After each row the checkpoint is
+    updated, so with `resume` a job that stopped (crash, abort, error)
+    continues after the last finished row; it is removed when every row
+    is done. `on_progress` gets (row number - 1, action index, elapsed).
+    `fit` maps the coordinates to the current screen size. Relative
+    sub-macro paths are looked up in `base_dir`.
+    Returns (rows replayed, rows skipped).
+    """
+    if backend is None:
+        backend = PyAutoGuiBackend()
+    template = MacroTemplate(actions)
+    checkpoint = Checkpoint(data_path, template.digest())
+    skip = checkpoint.load() if resume else 0
+    done = 0
+    for number, row in iter_rows(data_path):
+        if number <= skip:
+            continue
+        try:
+            rendered, origin = optimize(template.render(row))
+        except ValueError as e:
+            raise ValueError(f"Row {number}: {e}") from None
+        report = None
+        if on_progress is not None:
+            def report(run, index, elapsed, row_index=number - 1, origin=origin):
+                on_progress(row_index, origin[index], elapsed)
+        program = compile_actions(rendered, delay, control, backend, speed=speed, base_dir=base_dir,
+                                  fit=fit)
+        run_program(program, 1, control, report, speed)
+        done += 1
+        checkpoint.save(number)
+    checkpoint.clear()
+    return done, skip
@@ -0,0 +1,143 @@
+import pickle
+import hashlib
+from collections import OrderedDict
+from screen import load_numpy
+
+# Where x and y sit in each kind of action; 'wait_until' has w and h right after them
+_XY_AT = {'move': 1, 'click': 1, 'scroll': 1, 'if_pixel': 1, 'type': 2, 'wait_until': 2}
+# Below this many coordinates a plain loop beats setting up the arrays
+VECTOR_MIN = 64
+# Macros fitted to a screen size, kept for the next replay of the same macro
+FIT_CACHE_SIZE = 8
+_fit_cache = OrderedDict()
+
+
+def _map(values, factors, offset, centre, limit):
+    """floor(v * f + half) + offset for all values at once, clipped to [0, limit)"""
+    numpy = load_numpy() if len(values) >= VECTOR_MIN else None
+    if numpy is not None:
+        f = numpy.asarray(factors, dtype=numpy.float64)
+        v = numpy.floor(numpy.asarray(values, dtype=numpy.float64) * f + (f * 0.5 if centre else 0.5))
+        v += offset
+        if limit is not None:
+            numpy.clip(v, 0, limit - 1, out=v)
+        return v.astype(numpy.int64).tolist()
+    out = []
+    for v, f in zip(values, factors):
+        v = int((v * f + (f * 0.5 if centre else 0.5)) // 1) + offset
+        if limit is not None:
+            v = min(max(v, 0), limit - 1)
+        out.append(v)
+    return out
+
+
+# --- Coordinate Transforms ---
+def transform_rows(actions, rows, sx, sy, dx=0, dy=0, size=None, centre=False):
+    """The actions at `rows` with their coordinates scaled and shifted, in one pass.
+
+    `sx` / `sy` are factors, either one for all rows or a list with one
+    per row. With `centre` a pixel maps to the pixel its centre lands on
+    (screen to screen); otherwise positions are rounded (editing). `size`
+    (w, h) clips the result to the screen. Region sizes of 'wait_until'
+    are scaled too. Returns the new actions in the order of `rows`.
+    """
+    if not isinstance(sx, list):
+        sx = [sx] * len(rows)
+        sy = [sy] * len(rows)
+    new = [actions[row] for row in rows]
+    where = []
+    xs, ys, fx, fy = [], [], [], []
+    xy_at = _XY_AT.get
+    # Metadata always comes last, so the coordinates' positions don't move
+    for k, action in enumerate(new):
+        at = xy_at(action[0])
+        if at is None or (at == 2 and len(action) < 4):
+            continue
+        where.append(k)
+        xs.append(action[at])
+        ys.append(action[at + 1])
+        fx.append(sx[k])
+        fy.append(sy[k])
+    if not where:
+        return new
+    width, height = size if size is not None else (None, None)
+    xs = _map(xs, fx, dx, centre, width)
+    ys = _map(ys, fy, dy, centre, height)
+    for k, x, y in zip(where, xs, ys):
+        action = new[k]
+        kind = action[0]
+        if kind == 'move' or kind == 'click' or kind == 'scroll' or kind == 'if_pixel':
+            new[k] = (kind, x, y) + action[3:]
+        elif kind == 'type':
+            new[k] = action[:2] + (x, y) + action[4:]
+        else:
+            w = max(1, round(action[4] * sx[k]))
+            h = max(1, round(action[5] * sy[k]))
+            new[k] = action[:2] + (x, y, w, h) + action[6:]
+    return new
+
+
+def _digest(actions):
+    if type(actions) is not list:
+        actions = list(actions)
+    # pickle walks the tuples a few times faster than repr()
+    return hashlib.blake2b(pickle.dumps(actions, pickle.HIGHEST_PROTOCOL), digest_size=16).digest()
+
+
+def fit_to_screen(actions, size):
+    """`actions` mapped from the screen size they were recorded at to `size`.
+
+    Every 'show_screen' sets the recorded size for the actions after it;
+    actions before the first one are left alone. The result says
+    `size` in its 'show_screen' actions, so fitting it again changes
+    nothing. Returns `actions` itself when no mapping is needed and
+    otherwise a list that is cached per (macro, size) and must not be
+    modified.
+    """
+    size = tuple(size)
+    screens = [i for i, action in enumerate(actions) if action[0] == 'show_screen']
+    if all(tuple(actions[i][1:3]) == size for i in screens):
+        return actions
+    key = (_digest(actions), size)
+    cached = _fit_cache.get(key)
+    if cached is not None:
+        _fit_cache.move_to_end(key)
+        return cached
+
+    out = list(actions)
+    rows, sx, sy = [], [], []
+    bounds = screens[1:] + [len(out)]
+    for start, end in zip(screens, bounds):
+        screen = out[start]
+        fx, fy = size[0] / screen[1], size[1] / screen[2]
+        out[start] = ('show_screen',) + size + screen[3:]
+        if fx == 1.0 and fy == 1.0:
+            continue
+        found = [i for i in range(start + 1, end) if out[i][0] in _XY_AT]
+        rows += found
+        sx += [fx] * len(found)
+        sy += [fy] * len(found)
+    for row, action in zip(rows, transform_rows(out, rows, sx, sy, size=size, centre=True)):
+        out[row] = action
+
+    _fit_cache[key] = out
+    if len(_fit_cache) > FIT_CACHE_SIZE:
+        _fit_cache.popitem(last=False)
+    return out
+
+
+def fit_stream(actions, size):
+    """fit_to_screen() for an iterable, one action at a time"""
+    size = tuple(size)
+    scale = None
+    for action in actions:
+        kind = action[0]
+        if kind == 'show_screen':
+            scale = (size[0] / action[1], size[1] / action[2])
+            if scale == (1.0, 1.0):
+                scale = None
+            action = ('show_screen',) + size + action[3:]
+        elif scale is not None and kind in _XY_AT:
+            action = transform_rows([action], [0], scale[0], scale[1], size=size, centre=True)[0]
+        yield action
+# ----------------------------------
@@ -0,0 +1,2296 @@
+import sys
+import os
+import time
+import threading
+from functools import lru_cache
+from PySide6.QtWidgets import (
+    QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
+    QPushButton, QTableView, QHeaderView, QAbstractItemView, QLabel, QMessageBox, QSpinBox, QDoubleSpinBox,
+    QFileDialog, QFrame, QDialog, QLineEdit, QInputDialog, QComboBox, QStyledItemDelegate
+)
+from PySide6.QtCore import Qt, QTimer, QObject, Signal, QAbstractListModel, QModelIndex
+from PySide6.QtGui import QFont, QKeySequence, QShortcut
+from replay import (ReplayControl, ReplayAborted, run_actions, lateness_summary, with_meta,
+                    MIN_SPEED, MAX_SPEED, LOOP, END_LOOP, CALL, IF_PIXEL, ELSE, END_IF)
+import recfile
+from store import ActionStore
+from history import History, InsertAction, InsertBlock, MoveAction, EditAction, EditRows, ReplaceStore
+from screen import WAIT_CHANGE, WAIT_STABLE, DEFAULT_POLL, DEFAULT_TIMEOUT
+from textentry import ENTRY_PASTE, ENTRY_BATCH, ENTRY_KEYS
+from optimize import optimize_report
+from dataset import MacroTemplate, Checkpoint, run_dataset
+from tracing import ReplayTrace
+from geometry import transform_rows
+from library import MacroLibrary, ScanCancelled, DEFAULT_DB_PATH
+from calibrate import calibrate_actions, apply_delays, time_saved
+from capture import ContinuousRecorder, KeystrokeRecorder, OffsetStamper, DEFAULT_TOLERANCE
+from hooks import HookService
+
+REC_FILTER = "فایل ضبط ماوس (*.rec)"
+BINARY_REC_FILTER = "فایل ضبط فشرده (*.rec)"
+BUTTON_NAMES = {'right': "کلیک راست", 'middle': "کلیک وسط"}
+ENTRY_NAMES = {
+    None: "خودکار",
+    ENTRY_PASTE: "چسباندن از کلیپ‌بورد",
+    ENTRY_BATCH: "تزریق یکجا",
+    ENTRY_KEYS: "کلید به کلید",
+}
+
+
+@lru_cache(maxsize=8192)
+def _cached_label(action):
+    return _format_label(action)
+
+
+def action_label(action):
+    """Display text for an action; labels are cached by action content"""
+    try:
+        return _cached_label(action)
+    except TypeError:
+        # Unhashable action (e.g. carries a dict); format it every time
+        return _format_label(action)
+
+
+def _format_label(action):
+    if type(action[-1]) is dict:
+        label = _format_label(action[:-1])
+        meta = action[-1]
+        if meta.get('entry') is not None:
+            label += f" [{ENTRY_NAMES.get(meta['entry'], meta['entry'])}]"
+        if meta.get('delay') is not None:
+            label += f" (تأخیر {meta['delay']:.2f} ثانیه)"
+        elif meta.get('dt') is not None:
+            label += f" (+{meta['dt']:.2f} ثانیه)"
+        return label
+    act_type = action[0]
+    if act_type == 'move':
+        return f"حرکت به ({action[1]}, {action[2]})"
+    elif act_type == 'click':
+        if len(action) > 3:
+            return f"{BUTTON_NAMES.get(action[3], action[3])} در ({action[1]}, {action[2]})"
+        return f"کلیک در ({action[1]}, {action[2]})"
+    elif act_type == 'scroll':
+        return f"اسکرول {action[3]} در ({action[1]}, {action[2]})"
+    elif act_type == 'shortcut':
+        return f"میانبر: {action[1]}"
+    elif act_type == 'show_screen':
+        return f"اندازه صفحه: {action[1]} × {action[2]}"
+    elif act_type == 'wait_until':
+        _, mode, x, y, w, h, hold = action[:7]
+        if mode == WAIT_STABLE:
+            return f"انتظار تا ثابت ماندن ناحیه ({x}, {y}, {w}×{h}) به مدت {hold * 1000:.0f} ms"
+        return f"انتظار تا تغییر ناحیه ({x}, {y}, {w}×{h})"
+    elif act_type == 'type':
+        if len(action) < 4:
+            return f"تایپ: '{action[1]}'"
+        return f"تایپ: '{action[1]}' در ({action[2]}, {action[3]})"
+    elif act_type == LOOP:
+        return f"شروع تکرار ({action[1]} بار)"
+    elif act_type == END_LOOP:
+        return "پایان تکرار"
+    elif act_type == CALL:
+        return f"اجرای ماکرو: {os.path.basename(action[1])}"
+    elif act_type == IF_PIXEL:
+        return f"اگر رنگ ({action[1]}, {action[2]}) = {action[3]} (±{action[4]})"
+    elif act_type == ELSE:
+        return "وگرنه"
+    elif act_type == END_IF:
+        return "پایان شرط"
+    return str(action)
+
+# --- Action List Model ---
+class ActionListModel(QAbstractListModel):
+    """Qt model over an ActionStore, shared by the main list and the editor.
+
+    Views only ask for the rows they show, labels are formatted lazily,
+    and every change goes through here so it can be announced for just
+    the rows it touches.
+    """
+
+    def __init__(self, actions, parent=None):
+        super().__init__(parent)
+        self.actions = actions
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.actions)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and index.isValid():
+            return action_label(self.actions[index.row()])
+        return None
+
+    def set_store(self, actions):
+        self.beginResetModel()
+        self.actions = actions
+        self.endResetModel()
+
+    def append(self, action):
+        row = len(self.actions)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.actions.append(action)
+        self.endInsertRows()
+
+    def extend(self, actions):
+        if not actions:
+            return
+        row = len(self.actions)
+        self.beginInsertRows(QModelIndex(), row, row + len(actions) - 1)
+        self.actions.extend(actions)
+        self.endInsertRows()
+
+    def insert_action(self, row, action):
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.actions.insert(row, action)
+        self.endInsertRows()
+
+    def remove_action(self, row):
+        self.beginRemoveRows(QModelIndex(), row, row)
+        action = self.actions.pop(row)
+        self.endRemoveRows()
+        return action
+
+    def insert_actions(self, row, actions):
+        if not actions:
+            return
+        if row >= len(self.actions):
+            self.extend(actions)
+            return
+        self.beginInsertRows(QModelIndex(), row, row + len(actions) - 1)
+        self.actions.insert_many(row, actions)
+        self.endInsertRows()
+
+    def remove_actions(self, row, count):
+        if count <= 0:
+            return
+        self.beginRemoveRows(QModelIndex(), row, row + count - 1)
+        del self.actions[row:row + count]
+        self.endRemoveRows()
+
+    def move_row(self, src, dst):
+        # Qt wants the destination as "insert before this row" in the old numbering
+        qt_dst = dst + 1 if dst > src else dst
+        if src == dst or not self.beginMoveRows(QModelIndex(), src, src, QModelIndex(), qt_dst):
+            return
+        self.actions.move(src, dst)
+        self.endMoveRows()
+
+    def set_action(self, row, action):
+        self.actions[row] = action
+        index = self.index(row)
+        self.dataChanged.emit(index, index, [Qt.DisplayRole])
+
+
+class ActionListView(QTableView):
+    """A one-column table dressed up as a list.
+
+    QListView lays out every row again on each dataChanged, which is O(n)
+    per edit; a table with fixed row heights only repaints the changed rows.
+    """
+
+    def __init__(self, model, row_height=26, parent=None):
+        super().__init__(parent)
+        self.setModel(model)
+        self.horizontalHeader().hide()
+        self.verticalHeader().hide()
+        self.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.verticalHeader().setDefaultSectionSize(row_height)
+        self.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.setShowGrid(False)
+        self.setWordWrap(False)
+
+
+class NumberedDelegate(QStyledItemDelegate):
+    """Prefixes rows with their 1-based number, so row labels never need rebuilding"""
+
+    def initStyleOption(self, option, index):
+        super().initStyleOption(option, index)
+        option.text = f"{index.row() + 1}. {option.text}"
+# ----------------------------------
+
+# --- Input Hub ---
+class InputHub(QObject):
+    """Hands hook events to the GUI in batches, a fixed number of times per second.
+
+    The HookService listeners write into a ring buffer from their own
+    threads; a QTimer drains it on the GUI thread, so a stream of moves
+    costs one callback per frame instead of one signal per event. The
+    hook only records while someone is subscribed.
+    """
+
+    events_ready = Signal(object)
+
+    FRAME_RATE = 60
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.service = HookService()
+        self.subscribers = []
+        self.timer = QTimer(self)
+        self.timer.setInterval(int(1000 / self.FRAME_RATE))
+        self.timer.timeout.connect(self.deliver)
+
+    def subscribe(self, callback):
+        if callback in self.subscribers:
+            return
+        self.subscribers.append(callback)
+        if len(self.subscribers) == 1:
+            self.service.ring.clear()
+            self.service.start()
+            self.service.enabled = True
+            self.timer.start()
+
+    def unsubscribe(self, callback):
+        if callback not in self.subscribers:
+            return
+        self.subscribers.remove(callback)
+        if not self.subscribers:
+            self.service.enabled = False
+            self.timer.stop()
+
+    def deliver(self):
+        events = self.service.collect()
+        if not events:
+            return
+        for callback in list(self.subscribers):
+            callback(events)
+        self.events_ready.emit(events)
+
+    def shutdown(self):
+        self.timer.stop()
+        self.subscribers.clear()
+        self.service.stop()
+# ----------------------------------
+
+# --- Click Handler ---
+class ClickHandler(QObject):
+    click_detected = Signal(int, int)
+
+    def __init__(self, hub):
+        super().__init__()
+        self.hub = hub
+        self.running = False
+
+    def start_listening(self):
+        if self.running:
+            return
+        self.running = True
+        self.hub.subscribe(self.on_events)
+
+    def on_events(self, events):
+        for ev in events:
+            if ev[1] == 'click' and ev[5] and ev[4] == 'left':
+                self.stop_listening()
+                self.click_detected.emit(int(ev[2]), int(ev[3]))
+                return
+
+    def stop_listening(self):
+        self.running = False
+        self.hub.unsubscribe(self.on_events)
+# ----------------------------------
+
+# --- Continuous Capture ---
+class ContinuousCapture(QObject):
+    """Records every pointer move, click and scroll until stopped.
+
+    Batches from the InputHub are run through a ContinuousRecorder and
+    only the finished, simplified actions are passed on. Events inside
+    `exclude_rect` (the app's own window) are ignored.
+    """
+
+    actions_ready = Signal(object)
+
+    def __init__(self, hub, tolerance=DEFAULT_TOLERANCE, exclude_rect=None):
+        super().__init__()
+        self.hub = hub
+        self.recorder = ContinuousRecorder(tolerance)
+        self.stamp = OffsetStamper()
+        self.exclude_rect = exclude_rect
+
+    def _excluded(self, x, y):
+        rect = self.exclude_rect
+        return rect is not None and rect.contains(int(x), int(y))
+
+    def start(self):
+        self.hub.subscribe(self.on_events)
+
+    def on_events(self, events):
+        recorder = self.recorder
+        out = []
+        for ev in events:
+            kind = ev[1]
+            if kind == 'key' or self._excluded(ev[2], ev[3]):
+                continue
+            if kind == 'move':
+                out += recorder.feed_move(ev[0], ev[2], ev[3])
+            elif kind == 'click':
+                if ev[5]:
+                    out += recorder.feed_click(ev[0], ev[2], ev[3], ev[4])
+            elif kind == 'scroll':
+                out += recorder.feed_scroll(ev[0], ev[2], ev[3], ev[5])
+        if out:
+            self.actions_ready.emit(self.stamp(out))
+
+    def stop(self):
+        # Whatever is still in the ring belongs to this recording
+        self.on_events(self.hub.service.collect())
+        self.hub.unsubscribe(self.on_events)
+        return self.stamp(self.recorder.flush())
+
+
+class KeyboardCapture(QObject):
+    """Records real keystrokes as 'type' and 'shortcut' actions until stopped"""
+
+    actions_ready = Signal(object)
+
+    def __init__(self, hub):
+        super().__init__()
+        self.hub = hub
+        self.recorder = KeystrokeRecorder()
+        self.stamp = OffsetStamper()
+
+    def start(self):
+        self.hub.subscribe(self.on_events)
+
+    def on_events(self, events):
+        recorder = self.recorder
+        out = []
+        for ev in events:
+            if ev[1] == 'key':
+                out += recorder.feed_key(ev[0], ev[2], ev[3])
+        if out:
+            self.actions_ready.emit(self.stamp(out))
+
+    def stop(self):
+        self.on_events(self.hub.service.collect())
+        self.hub.unsubscribe(self.on_events)
+        return self.stamp(self.recorder.flush())
+# ----------------------------------
+
+# --- Load Worker ---
+class LoadWorker(QObject):
+    chunk_loaded = Signal(object)
+    finished = Signal(int)
+    failed = Signal(str)
+
+    # Chunks handed to the GUI but not yet processed; keeps the event queue short
+    MAX_IN_FLIGHT = 2
+
+    def __init__(self, file_path):
+        super().__init__()
+        self.file_path = file_path
+        self.cancelled = False
+        self.thread = None
+        self.in_flight = threading.Semaphore(self.MAX_IN_FLIGHT)
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def cancel(self):
+        self.cancelled = True
+
+    def chunk_done(self):
+        self.in_flight.release()
+
+    def _run(self):
+        count = 0
+        try:
+            for chunk in recfile.iter_chunks(self.file_path):
+                while not self.in_flight.acquire(timeout=0.1):
+                    if self.cancelled:
+                        return
+                if self.cancelled:
+                    return
+                count += len(chunk)
+                self.chunk_loaded.emit(chunk)
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.finished.emit(count)
+# ----------------------------------
+
+# --- Index Worker ---
+class IndexWorker(QObject):
+    """Brings the macro library up to date on a thread of its own"""
+
+    progress = Signal(int, str)
+    finished = Signal(int, int, int)
+    failed = Signal(str)
+
+    # Files between two progress signals
+    PROGRESS_EVERY = 50
+
+    def __init__(self, db_path, folder=None):
+        super().__init__()
+        self.db_path = db_path
+        # None rescans every folder indexed so far
+        self.folder = folder
+        self.cancelled = False
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def cancel(self):
+        self.cancelled = True
+
+    def _report(self, seen, path):
+        if seen % self.PROGRESS_EVERY == 0:
+            self.progress.emit(seen, path)
+
+    def _run(self):
+        try:
+            # SQLite connections stay on the thread that opened them
+            with MacroLibrary(self.db_path) as library:
+                if self.folder is None:
+                    totals = library.update_all(self._report, lambda: self.cancelled)
+                else:
+                    totals = library.update(self.folder, self._report, lambda: self.cancelled)
+        except ScanCancelled:
+            # Whoever cancelled has moved on; nothing is reported
+            pass
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.finished.emit(*totals)
+# ----------------------------------
+
+# --- Replay Worker ---
+class ReplayWorker(QObject):
+    progress = Signal(int, int, float)
+    finished = Signal(float)
+    failed = Signal(str)
+    aborted = Signal()
+
+    # Minimum time between two progress signals, so fast replays don't flood the GUI
+    PROGRESS_INTERVAL = 0.05
+
+    def __init__(self, actions, replay_count, delay, backend=None, speed=1.0, optimize=False,
+                 trace=None, base_dir=None):
+        super().__init__()
+        # Shared, not copied: editing is blocked while a replay runs
+        self.actions = actions
+        self.replay_count = replay_count
+        self.delay = delay
+        self.backend = backend
+        self.speed = speed
+        # Replay a peephole-optimized copy; rows maps its steps back to the list
+        self.optimize = optimize
+        self.rows = None
+        self.removed = 0
+        self.saved = 0.0
+        # Seconds each step started after its deadline
+        self.lateness = []
+        # A ReplayTrace to time every step into, or None
+        self.trace = trace
+        # Where relative sub-macro paths are looked up
+        self.base_dir = base_dir
+        self.control = ReplayControl()
+        self.thread = None
+        self._last_progress = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def pause(self):
+        self.control.pause()
+
+    def resume(self):
+        self.control.resume()
+
+    def abort(self):
+        self.control.abort()
+
+    def is_paused(self):
+        return self.control.paused
+
+    def describe_run(self, run):
+        return f"اجرای {run + 1} از {self.replay_count}"
+
+    def _report(self, run, index, elapsed):
+        if (index == 0 or self._last_progress is None
+                or elapsed - self._last_progress >= self.PROGRESS_INTERVAL):
+            self._last_progress = elapsed
+            if self.rows is not None:
+                index = self.rows[index]
+            self.progress.emit(run, index, elapsed)
+
+    def _run(self):
+        try:
+            actions = self.actions
+            if self.optimize:
+                actions, self.rows, self.removed, self.saved = optimize_report(actions, self.delay)
+            elapsed = run_actions(actions, self.replay_count, self.delay,
+                                  self.control, self._report, self.backend,
+                                  self.speed, self.lateness, trace=self.trace,
+                                  base_dir=self.base_dir)
+            if self.trace is not None and self.rows is not None:
+                self.trace.remap(self.rows)
+        except ReplayAborted:
+            self.aborted.emit()
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.finished.emit(elapsed)
+# ----------------------------------
+
+class CalibrationWorker(ReplayWorker):
+    """One measuring replay; emits the tuned per-action delays"""
+
+    calibrated = Signal(object)
+
+    def __init__(self, actions, delay, backend=None, base_dir=None):
+        super().__init__(actions, 1, delay, backend, base_dir=base_dir)
+
+    def _run(self):
+        try:
+            delays = calibrate_actions(self.actions, self.control, self._report, self.backend,
+                                       delay=self.delay, base_dir=self.base_dir)
+        except ReplayAborted:
+            self.aborted.emit()
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.calibrated.emit(delays)
+
+
+class DatasetWorker(ReplayWorker):
+    """One replay per row of a CSV / JSONL file, resuming from its checkpoint"""
+
+    def __init__(self, actions, data_path, delay, backend=None, speed=1.0, resume=True, base_dir=None):
+        super().__init__(actions, 1, delay, backend, speed, base_dir=base_dir)
+        self.data_path = data_path
+        self.resume = resume
+        # (rows replayed, rows skipped because a previous job had done them)
+        self.done = (0, 0)
+
+    def describe_run(self, run):
+        return f"ردیف {run + 1}"
+
+    def _run(self):
+        start = self.control.clock()
+        try:
+            self.done = run_dataset(self.actions, self.data_path, self.delay, self.control,
+                                    self._report, self.backend, self.speed, self.resume,
+                                    base_dir=self.base_dir)
+        except ReplayAborted:
+            self.aborted.emit()
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.finished.emit(self.control.clock() - start)
+# ----------------------------------
+
+# --- Editor Dialog ---
+class ActionEditorDialog(QDialog):
+    def __init__(self, parent, model, history):
+        super().__init__(parent)
+        self.setWindowTitle("ویرایش دستورات")
+        self.setModal(True)
+        self.resize(480, 380)
+        # Edits go straight into the shared model through the undo history;
+        # cancelling rolls the history back to where the editor opened
+        self.model = model
+        self.history = history
+        self.history_mark = history.mark()
+        self.parent = parent
+        self.init_ui()
+
+    @property
+    def actions(self):
+        # Not cached: optimizing swaps in a new store
+        return self.model.actions
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+
+        title = QLabel("ویرایش دستورات")
+        title.setAlignment(Qt.AlignCenter)
+        title.setStyleSheet("font-size: 17px; font-weight: bold; color: #4dabf7; margin: 10px;")
+        layout.addWidget(title)
+
+        self.list_view = ActionListView(self.model, 30)
+        self.list_view.setItemDelegate(NumberedDelegate(self.list_view))
+        self.list_view.setFont(QFont("Vazir", 11))
+        self.list_view.setStyleSheet("""
+            QTableView {
+                background-color: #1e1e1e;
+                border: 1px solid #333333;
+                border-radius: 8px;
+                padding: 6px;
+                outline: 0;
+                color: #ffffff;
+            }
+            QTableView::item {
+                padding: 5px;
+                border-bottom: 1px solid #2d2d2d;
+                text-align: center;
+            }
+        """)
+        # Several rows can be picked for a bulk coordinate transform
+        self.list_view.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        layout.addWidget(self.list_view)
+
+        btn_layout = QHBoxLayout()
+        self.btn_up = QPushButton("↑ بالا")
+        self.btn_down = QPushButton("↓ پایین")
+        self.btn_edit = QPushButton("ویرایش متن")
+        self.btn_entry = QPushButton("روش تایپ")
+        self.btn_optimize = QPushButton("بهینه‌سازی")
+        self.btn_transform = QPushButton("جابجایی / مقیاس")
+        self.btn_save = QPushButton("ذخیره و بستن")
+
+        for btn in [self.btn_up, self.btn_down, self.btn_edit, self.btn_entry, self.btn_optimize,
+                    self.btn_transform, self.btn_save]:
+            btn.setFixedHeight(36)
+            btn.setStyleSheet("""
+                QPushButton {
+                    background-color: #2d2d2d;
+                    border: 1px solid #444444;
+                    border-radius: 6px;
+                    font-size: 13px;
+                    color: #ffffff;
+                    text-align: center;
+                    padding: 0 10px;
+                }
+                QPushButton:hover {
+                    background-color: #3a3a3a;
+                }
+                QPushButton:disabled {
+                    background-color: #1e1e1e;
+                    color: #666666;
+                }
+            """)
+
+        btn_layout.addWidget(self.btn_up)
+        btn_layout.addWidget(self.btn_down)
+        btn_layout.addWidget(self.btn_edit)
+        btn_layout.addWidget(self.btn_entry)
+        btn_layout.addWidget(self.btn_optimize)
+        btn_layout.addWidget(self.btn_transform)
+        btn_layout.addWidget(self.btn_save)
+        layout.addLayout(btn_layout)
+
+        self.btn_up.clicked.connect(self.move_up)
+        self.btn_down.clicked.connect(self.move_down)
+        self.btn_edit.clicked.connect(self.edit_selected)
+        self.btn_entry.clicked.connect(self.choose_entry_mode)
+        self.btn_optimize.clicked.connect(self.optimize_actions)
+        self.btn_transform.clicked.connect(self.transform_selected)
+        self.btn_save.clicked.connect(self.save_and_close)
+
+    def current_row(self):
+        index = self.list_view.currentIndex()
+        return index.row() if index.isValid() else -1
+
+    def set_current_row(self, row):
+        self.list_view.setCurrentIndex(self.model.index(row))
+
+    def move_up(self):
+        current_row = self.current_row()
+        if current_row <= 0:
+            return
+        self.history.do(MoveAction(current_row, current_row - 1))
+        self.set_current_row(current_row - 1)
+
+    def move_down(self):
+        current_row = self.current_row()
+        if current_row >= len(self.actions) - 1:
+            return
+        self.history.do(MoveAction(current_row, current_row + 1))
+        self.set_current_row(current_row + 1)
+
+    def edit_selected(self):
+        current_row = self.current_row()
+        if current_row < 0:
+            QMessageBox.warning(self, "هشدار", "هیچ دستوری انتخاب نشده است.")
+            return
+        action = self.actions[current_row]
+        if action[0] == LOOP:
+            count, ok = QInputDialog.getInt(self, "تکرار", "چند بار تکرار شود؟", action[1], 0, 1000000)
+            if ok and count != action[1]:
+                self.history.do(EditAction(current_row, action, (LOOP, count) + tuple(action[2:])))
+            return
+        if action[0] != 'type':
+            QMessageBox.information(self, "توجه", "فقط دستورات تایپ و تکرار قابل ویرایش هستند.")
+            return
+        old_text = action[1]
+        new_text, ok = QInputDialog.getText(
+            self,
+            "ویرایش متن",
+            "متن جدید را وارد کنید:",
+            text=old_text
+        )
+        if ok and new_text.strip():
+            self.history.do(EditAction(current_row, action, ('type', new_text) + tuple(action[2:])))
+
+    def choose_entry_mode(self):
+        current_row = self.current_row()
+        if current_row < 0:
+            QMessageBox.warning(self, "هشدار", "هیچ دستوری انتخاب نشده است.")
+            return
+        action = self.actions[current_row]
+        if action[0] != 'type':
+            QMessageBox.information(self, "توجه", "روش تایپ فقط برای دستورات تایپ است.")
+            return
+        meta = action[-1] if type(action[-1]) is dict else {}
+        modes = list(ENTRY_NAMES)
+        names = [ENTRY_NAMES[m] for m in modes]
+        current = modes.index(meta.get('entry')) if meta.get('entry') in modes else 0
+        name, ok = QInputDialog.getItem(self, "روش تایپ", "متن چطور وارد شود؟", names, current, False)
+        if ok:
+            new = with_meta(action, entry=modes[names.index(name)])
+            if new != action:
+                self.history.do(EditAction(current_row, action, new))
+
+    def transform_selected(self):
+        rows = sorted(index.row() for index in self.list_view.selectionModel().selectedRows())
+        if not rows:
+            QMessageBox.warning(self, "هشدار", "هیچ دستوری انتخاب نشده است.")
+            return
+        kinds = ["جابجایی (پیکسل)", "مقیاس (ضریب)"]
+        choice, ok = QInputDialog.getItem(self, "جابجایی / مقیاس", "تغییر مختصات:", kinds, 0, False)
+        if not ok:
+            return
+        sx = sy = 1.0
+        dx = dy = 0
+        if choice == kinds[0]:
+            dx, ok = QInputDialog.getInt(self, "جابجایی", "افقی (x):", 0, -100000, 100000)
+            if not ok:
+                return
+            dy, ok = QInputDialog.getInt(self, "جابجایی", "عمودی (y):", 0, -100000, 100000)
+        else:
+            sx, ok = QInputDialog.getDouble(self, "مقیاس", "ضریب افقی (x):", 1.0, 0.01, 100.0, 3)
+            if not ok:
+                return
+            sy, ok = QInputDialog.getDouble(self, "مقیاس", "ضریب عمودی (y):", sx, 0.01, 100.0, 3)
+        if not ok:
+            return
+        old = [self.actions[row] for row in rows]
+        new = transform_rows(self.actions, rows, sx, sy, dx, dy)
+        changed = [k for k in range(len(rows)) if new[k] != old[k]]
+        if not changed:
+            QMessageBox.information(self, "جابجایی / مقیاس", "دستورات انتخاب‌شده مختصاتی ندارند.")
+            return
+        self.history.do(EditRows([rows[k] for k in changed], [old[k] for k in changed],
+                                 [new[k] for k in changed]))
+        QMessageBox.information(self, "جابجایی / مقیاس", f"مختصات {len(changed)} دستور تغییر کرد.")
+
+    def optimize_actions(self):
+        old = self.actions
+        new, _, removed, saved = optimize_report(old, self.parent.delay_between_actions)
+        if not removed:
+            QMessageBox.information(self, "بهینه‌سازی", "دستور زائدی پیدا نشد.")
+            return
+        self.history.do(ReplaceStore(old, ActionStore(new)))
+        QMessageBox.information(
+            self, "بهینه‌سازی",
+            f"{removed} دستور حذف یا ادغام شد.\n"
+            f"صرفه‌جویی تقریبی: {saved:.1f} ثانیه در هر اجرا"
+        )
+
+    def reject(self):
+        self.history.undo_to(self.history_mark)
+        self.parent.update_button_states()
+        super().reject()
+
+    def save_and_close(self):
+        self.parent.update_button_states()
+        self.accept()
+
+# --- About Dialog ---
+class AboutDialog(QDialog):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("درباره ما")
+        self.setModal(True)
+        self.resize(300, 180)
+        self.init_ui()
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+        layout.setSpacing(12)
+        layout.setContentsMargins(20, 20, 20, 20)
+
+        name_label = QLabel("طراح: محمد هادي بي تقصير فدافن")
+        name_label.setAlignment(Qt.AlignRight)
+        name_label.setStyleSheet("font-size: 14px; color: #ffffff; font-weight: bold;")
+
+        phone_label = QLabel("شماره تماس: 09942020996")
+        phone_label.setAlignment(Qt.AlignRight)
+        phone_label.setStyleSheet("font-size: 13px; color: #adb5bd;")
+
+        email_label = QLabel("ایمیل: hbitaghsir@gmail.com")
+        email_label.setAlignment(Qt.AlignRight)
+        email_label.setStyleSheet("font-size: 13px; color: #adb5bd;")
+
+        layout.addWidget(name_label)
+        layout.addWidget(phone_label)
+        layout.addWidget(email_label)
+
+        close_btn = QPushButton("بستن")
+        close_btn.setFixedHeight(36)
+        close_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #2d2d2d;
+                border: 1px solid #444444;
+                border-radius: 6px;
+                font-size: 13px;
+                color: #ffffff;
+                padding: 0 12px;
+            }
+            QPushButton:hover {
+                background-color: #3a3a3a;
+            }
+        """)
+        close_btn.clicked.connect(self.accept)
+        layout.addWidget(close_btn)
+# ----------------------------------
+
+# --- Library Dialog ---
+class LibraryModel(QAbstractListModel):
+    """Search results of the macro library, one row per file"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.results = []
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.results)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        result = self.results[index.row()]
+        if role == Qt.DisplayRole:
+            label = f"{result['name']}  ({result['actions']} دستور)"
+            if result['error']:
+                label += "  [خوانده نشد]"
+            elif result['snippet']:
+                label += "  — " + " ".join(result['snippet'].split())
+            return label
+        if role == Qt.ToolTipRole:
+            return result['path']
+        return None
+
+    def set_results(self, results):
+        self.beginResetModel()
+        self.results = results
+        self.endResetModel()
+
+
+class LibraryDialog(QDialog):
+    """Searches the indexed .rec files; after accept() the chosen file is in `selected_path`.
+
+    Searching only reads the SQLite index; the file itself is loaded by
+    the main window once it is picked.
+    """
+
+    # Milliseconds of typing pause before the index is queried
+    SEARCH_DELAY = 150
+
+    def __init__(self, parent=None, db_path=DEFAULT_DB_PATH):
+        super().__init__(parent)
+        self.setWindowTitle("کتابخانه ماکروها")
+        self.setModal(True)
+        self.resize(560, 420)
+        self.db_path = db_path
+        self.library = MacroLibrary(db_path)
+        self.index_worker = None
+        self.selected_path = None
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.timeout.connect(self.run_search)
+        self.init_ui()
+        self.run_search()
+        if not self.library.roots():
+            self.status_label.setText("هنوز پوشه‌ای اضافه نشده است؛ «افزودن پوشه» را بزنید.")
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("جستجو در متن‌های تایپی، میانبرها و نام فایل‌ها...")
+        self.search_edit.setFixedHeight(32)
+        self.search_edit.setStyleSheet("""
+            QLineEdit {
+                background-color: #2d2d2d;
+                border: 1px solid #444444;
+                border-radius: 5px;
+                color: #ffffff;
+                padding: 4px;
+            }
+        """)
+        self.search_edit.textChanged.connect(lambda _: self.search_timer.start(self.SEARCH_DELAY))
+        layout.addWidget(self.search_edit)
+
+        self.model = LibraryModel(self)
+        self.list_view = ActionListView(self.model, 28)
+        self.list_view.setStyleSheet("""
+            QTableView {
+                background-color: #1e1e1e;
+                border: 1px solid #333333;
+                border-radius: 8px;
+                padding: 6px;
+                outline: 0;
+                color: #ffffff;
+            }
+        """)
+        self.list_view.doubleClicked.connect(lambda index: self.open_row(index.row()))
+        layout.addWidget(self.list_view)
+
+        self.status_label = QLabel("")
+        self.status_label.setAlignment(Qt.AlignRight)
+        self.status_label.setStyleSheet("font-size: 12px; color: #adb5bd;")
+        layout.addWidget(self.status_label)
+
+        btn_layout = QHBoxLayout()
+        self.btn_add = QPushButton("افزودن پوشه")
+        self.btn_refresh = QPushButton("به‌روزرسانی")
+        self.btn_open = QPushButton("باز کردن")
+        self.btn_close = QPushButton("بستن")
+        for btn in [self.btn_add, self.btn_refresh, self.btn_open, self.btn_close]:
+            btn.setFixedHeight(34)
+            btn.setStyleSheet("""
+                QPushButton {
+                    background-color: #2d2d2d;
+                    border: 1px solid #444444;
+                    border-radius: 6px;
+                    font-size: 13px;
+                    color: #ffffff;
+                    padding: 0 10px;
+                }
+                QPushButton:hover {
+                    background-color: #3a3a3a;
+                }
+                QPushButton:disabled {
+                    background-color: #1e1e1e;
+                    color: #666666;
+                }
+            """)
+            btn_layout.addWidget(btn)
+        layout.addLayout(btn_layout)
+
+        self.btn_add.clicked.connect(self.add_folder)
+        self.btn_refresh.clicked.connect(lambda: self.start_index(None))
+        self.btn_open.clicked.connect(lambda: self.open_row(self.list_view.currentIndex().row()))
+        self.btn_close.clicked.connect(self.reject)
+
+    def run_search(self):
+        start = time.perf_counter()
+        results = self.library.search(self.search_edit.text())
+        elapsed = (time.perf_counter() - start) * 1000
+        self.model.set_results(results)
+        if self.index_worker is None:
+            self.status_label.setText(
+                f"{len(results)} نتیجه از {self.library.count()} فایل ({elapsed:.1f} میلی‌ثانیه)")
+
+    def add_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "پوشه فایل‌های ضبط")
+        if folder:
+            self.start_index(folder)
+
+    def start_index(self, folder):
+        if self.index_worker is not None:
+            return
+        self.btn_add.setEnabled(False)
+        self.btn_refresh.setEnabled(False)
+        self.status_label.setText("در حال فهرست‌کردن...")
+        self.index_worker = IndexWorker(self.db_path, folder)
+        self.index_worker.progress.connect(
+            lambda seen, path: self.status_label.setText(f"در حال فهرست‌کردن... {seen} فایل"))
+        self.index_worker.finished.connect(self.on_index_finished)
+        self.index_worker.failed.connect(self.on_index_failed)
+        self.index_worker.start()
+
+    def _end_index(self):
+        self.index_worker = None
+        self.btn_add.setEnabled(True)
+        self.btn_refresh.setEnabled(True)
+
+    def on_index_finished(self, read, removed, unchanged):
+        self._end_index()
+        self.run_search()
+        self.status_label.setText(
+            f"{read} فایل خوانده شد، {removed} حذف شد، {unchanged} بدون تغییر. "
+            + self.status_label.text())
+
+    def on_index_failed(self, message):
+        self._end_index()
+        QMessageBox.critical(self, "خطا", f"فهرست‌کردن ناموفق:\n{message}")
+
+    def open_row(self, row):
+        if not 0 <= row < len(self.model.results):
+            QMessageBox.warning(self, "هشدار", "هیچ فایلی انتخاب نشده است.")
+            return
+        result = self.model.results[row]
+        if result['error']:
+            QMessageBox.warning(self, "خطا", f"این فایل خوانده نشد:\n{result['error']}")
+            return
+        self.selected_path = result['path']
+        self.accept()
+
+    def done(self, result):
+        if self.index_worker is not None:
+            # A scan still winding down must not search (and reopen the index) after this
+            self.index_worker.progress.disconnect()
+            self.index_worker.finished.disconnect()
+            self.index_worker.failed.disconnect()
+            self.index_worker.cancel()
+            self.index_worker = None
+        self.search_timer.stop()
+        self.library.close()
+        super().done(result)
+# ----------------------------------
+
+# --- Keyboard Shortcut Dialog ---
+class ShortcutDialog(QDialog):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("انتخاب میانبر")
+        self.setModal(True)
+        self.resize(250, 120)
+        self.selected_key = None
+        self.init_ui()
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+        layout.setSpacing(12)
+        layout.setContentsMargins(20, 20, 20, 20)
+
+        label = QLabel("میانبر مورد نظر را انتخاب کنید:")
+        label.setAlignment(Qt.AlignRight)
+        label.setStyleSheet("font-size: 13px; color: #ffffff;")
+        layout.addWidget(label)
+
+        self.key_combo = QComboBox()
+        self.key_combo.setFixedHeight(32)
+        # Common keys
+        keys = [
+            "Enter", "Backspace", "Delete", "Tab", "Esc",
+            "Ctrl", "Shift", "Alt", "Space",
+            "F1", "F2", "F3", "F4", "F5", "F6",
+            "F7", "F8", "F9", "F10", "F11", "F12"
+        ]
+        self.key_combo.addItems(keys)
+        self.key_combo.setStyleSheet("""
+            QComboBox {
+                background-color: #2d2d2d;
+                border: 1px solid #444444;
+                border-radius: 5px;
+                color: #ffffff;
+                padding: 4px;
+            }
+            QComboBox::drop-down {
+                border: none;
+            }
+            QComboBox::down-arrow {
+                image: url();
+                width: 0px;
+                height: 0px;
+            }
+        """)
+        layout.addWidget(self.key_combo)
+
+        btn_layout = QHBoxLayout()
+        ok_btn = QPushButton("تایید")
+        cancel_btn = QPushButton("لغو")
+        ok_btn.setFixedHeight(32)
+        cancel_btn.setFixedHeight(32)
+        ok_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #4dabf7;
+                color: #000000;
+                border-radius: 5px;
+                font-size: 12px;
+            }
+            QPushButton:hover {
+                background-color: #339af0;
+            }
+        """)
+        cancel_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #2d2d2d;
+                border: 1px solid #444444;
+                border-radius: 5px;
+                font-size: 12px;
+                color: #ffffff;
+            }
+            QPushButton:hover {
+                background-color: #3a3a3a;
+            }
+        """)
+        ok_btn.clicked.connect(self.accept)
+        cancel_btn.clicked.connect(self.reject)
+        btn_layout.addWidget(ok_btn)
+        btn_layout.addWidget(cancel_btn)
+        layout.addLayout(btn_layout)
+
+    def get_selected_key(self):
+        return self.key_combo.currentText()
+# ----------------------------------
+
+class ActionRecorder(QMainWindow):
+    def __init__(self):
+        super().__init__()
+        self.action_model = ActionListModel(ActionStore())
+        self.history = History(self.action_model)
+        self.replay_count = 1
+        self.delay_between_actions = 0.3
+        self.waiting_for_click = False
+        self.pending_action_type = None
+        self.pending_text = None
+        self.region_corner = None
+        self.input_hub = InputHub(self)
+        self.click_handler = ClickHandler(self.input_hub)
+        self.click_handler.click_detected.connect(self.on_user_click)
+        self.replay_worker = None
+        self.load_worker = None
+        self.load_mark = 0
+        # The ReplaceStore of a load still in progress
+        self.load_command = None
+        # Folder of the last loaded file; relative sub-macro calls start there
+        self.macro_dir = None
+        self.capture = None
+        self.capture_button = None
+        self.capture_text = ""
+        self.capture_row = 0
+        self.init_ui()
+        self.setup_shortcuts()
+
+    @property
+    def actions(self):
+        return self.action_model.actions
+
+    def init_ui(self):
+        self.setWindowTitle("هوشمند ساز")
+        self.resize(360, 540)
+
+        central = QWidget()
+        self.setCentralWidget(central)
+        main_layout = QVBoxLayout(central)
+        main_layout.setContentsMargins(16, 16, 16, 16)
+        main_layout.setSpacing(12)
+
+        # --- About Button (Top Left) ---
+        top_bar = QHBoxLayout()
+        self.btn_about = QPushButton("درباره ما")
+        self.btn_about.setFixedHeight(30)
+        self.btn_about.setStyleSheet("""
+            QPushButton {
+                background-color: #1e1e1e;
+                border: 1px solid #333333;
+                border-radius: 5px;
+                font-size: 11px;
+                color: #6c757d;
+                padding: 0 4px;
+            }
+            QPushButton:hover {
+                background-color: #2d2d2d;
+                color: #adb5bd;
+            }
+        """)
+        self.btn_about.clicked.connect(self.show_about)
+        top_bar.addWidget(self.btn_about)
+        top_bar.addStretch()
+        main_layout.addLayout(top_bar)
+        # --------------------------------
+
+        # Title Card
+        title_card = QFrame()
+        title_card.setStyleSheet("""
+            QFrame {
+                background-color: #1e1e1e;
+                border-radius: 10px;
+                padding: 4px;
+                border: 1px solid #333333;
+            }
+        """)
+        title_layout = QVBoxLayout(title_card)
+        title = QLabel("خودکار کردن و هوشمند سازي")
+        title.setAlignment(Qt.AlignCenter)
+        title.setStyleSheet("font-size: 18px; font-weight: bold; color: #4dabf7;")
+        title_layout.addWidget(title)
+        main_layout.addWidget(title_card)
+
+        # --- 2x4 GRID FOR BUTTONS ---
+        buttons_grid = QFrame()
+        buttons_grid.setStyleSheet("""
+            QFrame {
+                background-color: #1e1e1e;
+                border-radius: 10px;
+                padding: 4px;
+                border: 1px solid #333333;
+            }
+        """)
+        grid_layout = QVBoxLayout(buttons_grid)
+        grid_layout.setSpacing(10)
+
+        # Row 1: Option 1 & 2
+        row1 = QHBoxLayout()
+        self.btn_move = QPushButton(" حرکت به موقعیتی که کلیک می‌کنید")
+        self.btn_click = QPushButton(" کلیک در موقعیتی که کلیک می‌کنید")
+        row1.addWidget(self.btn_move)
+        row1.addWidget(self.btn_click)
+
+        # Row 2: Option 3 & 4  ← CHANGED BUTTON TEXT
+        row2 = QHBoxLayout()
+        self.btn_mouse_pos = QPushButton(" افزودن میانبر کیبورد")  # ← CHANGED
+        self.btn_set_replay = QPushButton(" تنظیم تعداد اجرا")
+        row2.addWidget(self.btn_mouse_pos)
+        row2.addWidget(self.btn_set_replay)
+
+        # Row 3: Option 5 & 6
+        row3 = QHBoxLayout()
+        self.btn_screen_size = QPushButton(" اندازه صفحه‌نمایش")
+        self.btn_type = QPushButton("تايپ در موقعيتي که کليک مي کنيد")
+        row3.addWidget(self.btn_screen_size)
+        row3.addWidget(self.btn_type)
+
+        # Row 4: Option 7 & 8
+        row4 = QHBoxLayout()
+        self.btn_edit = QPushButton(" ویرایش دستورات")
+        self.btn_delay = QPushButton(" تنظیم تأخیر بین دستورات")
+        row4.addWidget(self.btn_edit)
+        row4.addWidget(self.btn_delay)
+
+        # Row 5: Continuous recording
+        row5 = QHBoxLayout()
+        self.btn_continuous = QPushButton(" ضبط پیوسته ماوس")
+        self.btn_keyboard = QPushButton(" ضبط کیبورد")
+        row5.addWidget(self.btn_continuous)
+        row5.addWidget(self.btn_keyboard)
+
+        # Row 6: Screen waits
+        row6 = QHBoxLayout()
+        self.btn_wait = QPushButton(" انتظار برای صفحه")
+        self.btn_calibrate = QPushButton(" تنظیم خودکار تأخیرها")
+        row6.addWidget(self.btn_wait)
+        row6.addWidget(self.btn_calibrate)
+
+        # Row 7: Data-driven replay
+        row7 = QHBoxLayout()
+        self.btn_dataset = QPushButton(" اجرا با فایل داده (CSV / JSONL)")
+        self.btn_structure = QPushButton(" تکرار / شرط / ماکرو")
+        row7.addWidget(self.btn_dataset)
+        row7.addWidget(self.btn_structure)
+
+        # Row 8: Macro library
+        row8 = QHBoxLayout()
+        self.btn_library = QPushButton(" کتابخانه ماکروها (جستجو)")
+        row8.addWidget(self.btn_library)
+
+        # Add rows to grid
+        grid_layout.addLayout(row1)
+        grid_layout.addLayout(row2)
+        grid_layout.addLayout(row3)
+        grid_layout.addLayout(row4)
+        grid_layout.addLayout(row5)
+        grid_layout.addLayout(row6)
+        grid_layout.addLayout(row7)
+        grid_layout.addLayout(row8)
+
+        main_layout.addWidget(buttons_grid)
+
+        # --- Replay SpinBox (attached to Option 4 logic) ---
+        replay_layout = QHBoxLayout()
+        replay_layout.setContentsMargins(0, 0, 0, 0)
+        self.spin_replay = QSpinBox()
+        self.spin_replay.setRange(1, 100)
+        self.spin_replay.setValue(1)
+        self.spin_replay.setFixedWidth(70)
+        self.spin_replay.setStyleSheet("""
+            QSpinBox {
+                background-color: #2d2d2d;
+                border: 1px solid #444444;
+                border-radius: 5px;
+                padding: 3px;
+                color: #ffffff;
+                selection-background-color: #4dabf7;
+            }
+            QSpinBox::up-button, QSpinBox::down-button {
+                background-color: #1e1e1e;
+                border: 1px solid #444444;
+                width: 18px;
+            }
+            QSpinBox::up-button:hover, QSpinBox::down-button:hover {
+                background-color: #3a3a3a;
+            }
+        """)
+        replay_label = QLabel("تعداد دفعات اجرا:")
+        replay_label.setAlignment(Qt.AlignRight | Qt.AlignVCenter)
+        replay_label.setStyleSheet("font-size: 12px; color: #ffffff;")
+        replay_layout.addWidget(replay_label)
+        replay_layout.addWidget(self.spin_replay)
+        replay_layout.addStretch()
+        self.spin_speed = QDoubleSpinBox()
+        self.spin_speed.setRange(MIN_SPEED, MAX_SPEED)
+        self.spin_speed.setSingleStep(0.25)
+        self.spin_speed.setValue(1.0)
+        self.spin_speed.setSuffix("×")
+        self.spin_speed.setFixedWidth(80)
+        self.spin_speed.setStyleSheet(self.spin_replay.styleSheet().replace("QSpinBox", "QDoubleSpinBox"))
+        speed_label = QLabel("سرعت:")
+        speed_label.setAlignment(Qt.AlignRight | Qt.AlignVCenter)
+        speed_label.setStyleSheet("font-size: 12px; color: #ffffff;")
+        replay_layout.addWidget(speed_label)
+        replay_layout.addWidget(self.spin_speed)
+        # Checked: replays run the peephole-optimized copy of the list
+        self.btn_optimize_replay = QPushButton("بهینه")
+        self.btn_optimize_replay.setCheckable(True)
+        self.btn_optimize_replay.setChecked(True)
+        self.btn_optimize_replay.setToolTip("اجرای نسخه بهینه‌شده دستورات (حذف حرکت‌های زائد)")
+        # Checked: the next replays record per-step timings
+        self.btn_trace = QPushButton("ردیابی")
+        self.btn_trace.setCheckable(True)
+        self.btn_trace.setToolTip("ثبت زمان‌بندی هر دستور و ذخیره به صورت Chrome trace")
+        toggle_style = """
+            QPushButton {
+                background-color: #2d2d2d;
+                border: 1px solid #444444;
+                border-radius: 5px;
+                padding: 3px 8px;
+                color: #ffffff;
+            }
+            QPushButton:checked {
+                background-color: #4dabf7;
+                color: #000000;
+            }
+        """
+        self.btn_optimize_replay.setStyleSheet(toggle_style)
+        self.btn_trace.setStyleSheet(toggle_style)
+        replay_layout.addWidget(self.btn_optimize_replay)
+        replay_layout.addWidget(self.btn_trace)
+        main_layout.addLayout(replay_layout)
+
+        # Save/Load row
+        save_load_layout = QHBoxLayout()
+        self.btn_save = QPushButton("ذخیره دستورات")
+        self.btn_load = QPushButton("بارگذاری دستورات")
+        for btn in [self.btn_save, self.btn_load]:
+            btn.setFixedHeight(36)
+            btn.setStyleSheet("""
+                QPushButton {
+                    background-color: #2d2d2d;
+                    border: 1px solid #444444;
+                    border-radius: 6px;
+                    font-size: 12px;
+                    color: #ffffff;
+                    text-align: center;
+                    padding: 0 8px;
+                }
+                QPushButton:hover {
+                    background-color: #3a3a3a;
+                }
+            """)
+        save_load_layout.addWidget(self.btn_save)
+        save_load_layout.addWidget(self.btn_load)
+        main_layout.addLayout(save_load_layout)
+
+        # Undo/Redo/Clear row
+        edit_layout = QHBoxLayout()
+        self.btn_undo = QPushButton("واگرد (Ctrl+Z)")
+        self.btn_redo = QPushButton("بازگردانی (Ctrl+Y)")
+        self.btn_clear = QPushButton("پاک‌کردن همه")
+        for btn in [self.btn_undo, self.btn_redo, self.btn_clear]:
+            btn.setFixedHeight(36)
+            btn.setStyleSheet("""
+                QPushButton {
+                    background-color: #2d2d2d;
+                    border: 1px solid #444444;
+                    border-radius: 6px;
+                    font-size: 12px;
+                    color: #ffffff;
+                    text-align: center;
+                    padding: 0 8px;
+                }
+                QPushButton:hover {
+                    background-color: #3a3a3a;
+                }
+                QPushButton:disabled {
+                    background-color: #1e1e1e;
+                    color: #666666;
+                }
+            """)
+        edit_layout.addWidget(self.btn_clear)
+        edit_layout.addWidget(self.btn_redo)
+        edit_layout.addWidget(self.btn_undo)
+        main_layout.addLayout(edit_layout)
+
+        # Actions List
+        list_label = QLabel("دستورات ضبط‌شده")
+        list_label.setAlignment(Qt.AlignRight | Qt.AlignVCenter)
+        list_label.setStyleSheet("font-weight: bold; font-size: 13px; color: #ffffff; margin-top: 6px;")
+        main_layout.addWidget(list_label)
+
+        self.list_view = ActionListView(self.action_model)
+        self.list_view.setFixedHeight(100)
+        self.list_view.setFont(QFont("Vazir", 10))
+        self.list_view.setStyleSheet("""
+            QTableView {
+                background-color: #1e1e1e;
+                border: 1px solid #333333;
+                border-radius: 6px;
+                padding: 4px;
+                outline: 0;
+                color: #ffffff;
+            }
+            QTableView::item {
+                padding: 4px;
+                border-bottom: 1px solid #2d2d2d;
+                text-align: center;
+            }
+        """)
+        main_layout.addWidget(self.list_view)
+
+        # Execute Button
+        self.btn_execute = QPushButton("اجرای دستورات")
+        self.btn_execute.setFixedHeight(42)
+        self.btn_execute.setStyleSheet("""
+            QPushButton {
+                background-color: #4dabf7;
+                color: #000000;
+                border-radius: 8px;
+                font-size: 14px;
+                font-weight: bold;
+                text-align: center;
+                padding: 0 10px;
+            }
+            QPushButton:hover {
+                background-color: #339af0;
+            }
+            QPushButton:pressed {
+                background-color: #228be6;
+            }
+            QPushButton:disabled {
+                background-color: #333333;
+                color: #666666;
+            }
+        """)
+        main_layout.addWidget(self.btn_execute)
+
+        # Pause/Stop row (only active while a replay is running)
+        run_ctrl_layout = QHBoxLayout()
+        self.btn_pause = QPushButton("مکث")
+        self.btn_stop = QPushButton("توقف اجرا")
+        run_ctrl_layout.addWidget(self.btn_stop)
+        run_ctrl_layout.addWidget(self.btn_pause)
+        main_layout.addLayout(run_ctrl_layout)
+
+        self.status_label = QLabel("")
+        self.status_label.setAlignment(Qt.AlignRight | Qt.AlignVCenter)
+        self.status_label.setStyleSheet("font-size: 11px; color: #adb5bd;")
+        main_layout.addWidget(self.status_label)
+
+        # Connect signals
+        self.btn_move.clicked.connect(lambda: self.prepare_for_position_capture('move'))
+        self.btn_click.clicked.connect(lambda: self.prepare_for_position_capture('click'))
+        self.btn_mouse_pos.clicked.connect(self.add_keyboard_shortcut)  # ← CHANGED
+        self.btn_screen_size.clicked.connect(self.add_screen_size_action)
+        self.btn_type.clicked.connect(self.prepare_for_type_capture)
+        self.btn_edit.clicked.connect(self.open_editor)
+        self.btn_delay.clicked.connect(self.set_delay_between_actions)
+        self.btn_continuous.clicked.connect(self.toggle_continuous_recording)
+        self.btn_keyboard.clicked.connect(self.toggle_keyboard_recording)
+        self.btn_wait.clicked.connect(self.prepare_for_region_capture)
+        self.btn_calibrate.clicked.connect(self.calibrate_delays)
+        self.btn_dataset.clicked.connect(self.execute_with_data)
+        self.btn_structure.clicked.connect(self.add_structure_action)
+        self.btn_library.clicked.connect(self.open_library)
+        self.btn_set_replay.clicked.connect(self.set_replay_count)
+        self.btn_clear.clicked.connect(self.clear_all_actions)
+        self.btn_execute.clicked.connect(self.execute_actions)
+        self.btn_save.clicked.connect(self.save_actions)
+        self.btn_load.clicked.connect(self.load_actions)
+        self.btn_undo.clicked.connect(self.undo_action)
+        self.btn_redo.clicked.connect(self.redo_action)
+        self.btn_pause.clicked.connect(self.toggle_pause)
+        self.btn_stop.clicked.connect(self.stop_execution)
+
+        font = QFont()
+        font.setFamilies(["Vazir", "IRANSans", "B Nazanin", "Arial", "sans-serif"])
+        font.setPointSize(11)
+        QApplication.setFont(font)
+
+        self.update_button_states()
+
+        # Style all buttons
+        all_buttons = [
+            self.btn_move, self.btn_click, self.btn_mouse_pos, self.btn_set_replay,
+            self.btn_screen_size, self.btn_type, self.btn_edit, self.btn_delay,
+            self.btn_save, self.btn_load, self.btn_undo, self.btn_redo, self.btn_clear, self.btn_execute,
+            self.btn_pause, self.btn_stop, self.btn_continuous, self.btn_keyboard, self.btn_wait,
+            self.btn_calibrate, self.btn_dataset, self.btn_structure, self.btn_library
+        ]
+        for btn in all_buttons:
+            btn.setStyleSheet("""
+                QPushButton {
+                    background-color: #2d2d2d;
+                    border: 1px solid #444444;
+                    border-radius: 6px;
+                    font-size: 12px;
+                    color: #ffffff;
+                    text-align: center;
+                    padding: 6px;
+                }
+                QPushButton:hover {
+                    background-color: #3a3a3a;
+                    border: 1px solid #555555;
+                }
+                QPushButton:pressed {
+                    background-color: #444444;
+                }
+                QPushButton:disabled {
+                    background-color: #1e1e1e;
+                    color: #666666;
+                    border: 1px solid #333333;
+                }
+            """)
+
+    def setup_shortcuts(self):
+        self.undo_shortcut = QShortcut(QKeySequence("Ctrl+Z"), self)
+        self.undo_shortcut.activated.connect(self.undo_action)
+        self.redo_shortcut = QShortcut(QKeySequence("Ctrl+Y"), self)
+        self.redo_shortcut.activated.connect(self.redo_action)
+
+    def add_action_to_history(self, action):
+        self.history.do(InsertAction(len(self.actions), action))
+        self.update_button_states()
+
+    def undo_action(self):
+        if self.is_busy():
+            return
+        self.history.undo()
+        self.update_button_states()
+
+    def redo_action(self):
+        if self.is_busy():
+            return
+        self.history.redo()
+        self.update_button_states()
+
+    def is_busy(self):
+        return (self.replay_worker is not None or self.load_worker is not None
+                or self.capture is not None)
+
+    def update_button_states(self):
+        # The list is shared with a running replay; it can't be changed then
+        idle = self.replay_worker is None
+        self.btn_undo.setEnabled(idle and self.history.can_undo())
+        self.btn_redo.setEnabled(idle and self.history.can_redo())
+        self.btn_clear.setEnabled(idle and len(self.actions) > 0)
+        self.btn_execute.setEnabled(idle and len(self.actions) > 0)
+        self.btn_pause.setEnabled(self.replay_worker is not None)
+        self.btn_stop.setEnabled(self.replay_worker is not None)
+
+    # --- MISSING METHOD ADDED ---
+    def prepare_for_position_capture(self, action_type):
+        if self.waiting_for_click:
+            return
+        self.pending_action_type = action_type
+        self.waiting_for_click = True
+        for btn in self.get_all_buttons():
+            btn.setEnabled(False)
+        self.bring_to_front()
+        QMessageBox.information(
+            self,
+            "در انتظار کلیک",
+            "لطفاً در جایی که می‌خواهید، کلیک کنید."
+        )
+        self.click_handler.start_listening()
+    # ------------------------------
+
+    # --- NEW: Add Keyboard Shortcut ---
+    def add_keyboard_shortcut(self):
+        dialog = ShortcutDialog(self)
+        if dialog.exec() == QDialog.Accepted:
+            key = dialog.get_selected_key()
+            action = ('shortcut', key)
+            self.add_action_to_history(action)
+            self.bring_to_front()
+            QMessageBox.information(self, "موفق", f"میانبر '{key}' اضافه شد.")
+    # ----------------------------------
+
+    # --- Windows Focus Helper ---
+    def bring_to_front(self):
+        if sys.platform == "win32":
+            import ctypes
+            hwnd = self.winId()
+            ctypes.windll.user32.ShowWindow(hwnd, 9)
+            ctypes.windll.user32.SetForegroundWindow(hwnd)
+
+    # --- Action recording ---
+    def prepare_for_type_capture(self):
+        if self.waiting_for_click:
+            return
+        self.pending_action_type = 'type'
+        self.waiting_for_click = True
+        for btn in self.get_all_buttons():
+            btn.setEnabled(False)
+        self.bring_to_front()
+        QMessageBox.information(
+            self,
+            "در انتظار کلیک",
+            "لطفاً در جایی که می‌خواهید متن تایپ شود، کلیک کنید."
+        )
+        self.click_handler.start_listening()
+
+    def prepare_for_region_capture(self):
+        if self.waiting_for_click or self.is_busy():
+            return
+        self.pending_action_type = 'region_start'
+        self.waiting_for_click = True
+        for btn in self.get_all_buttons():
+            btn.setEnabled(False)
+        self.bring_to_front()
+        QMessageBox.information(
+            self,
+            "در انتظار کلیک",
+            "لطفاً گوشه بالا-چپ ناحیه‌ای را که باید زیر نظر باشد کلیک کنید، سپس گوشه پایین-راست آن را."
+        )
+        self.click_handler.start_listening()
+
+    def add_wait_action(self, x1, y1, x2, y2):
+        x, y = min(x1, x2), min(y1, y2)
+        w, h = max(1, abs(x2 - x1)), max(1, abs(y2 - y1))
+        modes = ["تا وقتی ناحیه تغییر کند", "تا وقتی ناحیه ثابت بماند"]
+        choice, ok = QInputDialog.getItem(self, "نوع انتظار", "صبر کن:", modes, 0, False)
+        if not ok:
+            return
+        mode = WAIT_CHANGE if choice == modes[0] else WAIT_STABLE
+        hold = 0.0
+        if mode == WAIT_STABLE:
+            hold_ms, ok = QInputDialog.getInt(self, "مدت ثبات", "چند میلی‌ثانیه بدون تغییر؟", 300, 10, 60000)
+            if not ok:
+                return
+            hold = hold_ms / 1000
+        timeout, ok = QInputDialog.getDouble(
+            self, "حداکثر انتظار", "حداکثر زمان انتظار (ثانیه):",
+            value=DEFAULT_TIMEOUT, minValue=0.1, maxValue=600.0, decimals=1
+        )
+        if not ok:
+            return
+        self.add_action_to_history(('wait_until', mode, x, y, w, h, hold, timeout, DEFAULT_POLL))
+        QMessageBox.information(self, "موفق", f"انتظار برای ناحیه ({x}, {y}, {w}×{h}) ضبط شد.")
+
+    def add_structure_action(self):
+        if self.waiting_for_click or self.is_busy():
+            return
+        kinds = ["شروع تکرار", "پایان تکرار", "اجرای ماکروی دیگر",
+                 "شرط رنگ پیکسل", "وگرنه", "پایان شرط"]
+        choice, ok = QInputDialog.getItem(self, "ساختار", "نوع دستور:", kinds, 0, False)
+        if not ok:
+            return
+        if choice == kinds[0]:
+            count, ok = QInputDialog.getInt(self, "تکرار", "چند بار تکرار شود؟", 2, 0, 1000000)
+            if not ok:
+                return
+            action = (LOOP, count)
+        elif choice == kinds[1]:
+            action = (END_LOOP,)
+        elif choice == kinds[2]:
+            file_path, _ = QFileDialog.getOpenFileName(
+                self, "انتخاب ماکرو", self.macro_dir or "", "فایل ضبط ماوس (*.rec);;All Files (*)"
+            )
+            if not file_path:
+                return
+            action = (CALL, os.path.abspath(file_path))
+        elif choice == kinds[3]:
+            self.prepare_for_position_capture(IF_PIXEL)
+            return
+        elif choice == kinds[4]:
+            action = (ELSE,)
+        else:
+            action = (END_IF,)
+        self.add_action_to_history(action)
+        self.bring_to_front()
+
+    def add_pixel_condition(self, x, y):
+        import pyautogui
+        r, g, b = pyautogui.pixel(x, y)[:3]
+        color = f"#{r:02x}{g:02x}{b:02x}"
+        tolerance, ok = QInputDialog.getInt(
+            self, "شرط رنگ", f"رنگ ({x}, {y}) الان {color} است.\nحداکثر اختلاف هر کانال (۰ تا ۲۵۵):",
+            24, 0, 255
+        )
+        if not ok:
+            return
+        self.add_action_to_history((IF_PIXEL, x, y, color, tolerance))
+        QMessageBox.information(self, "موفق", f"شرط رنگ {color} در ({x}, {y}) ضبط شد.")
+
+    def on_user_click(self, x, y):
+        if not self.waiting_for_click:
+            return
+        self.waiting_for_click = False
+        self.click_handler.stop_listening()
+
+        if self.pending_action_type == 'region_start':
+            # First corner only; keep listening for the second
+            self.region_corner = (x, y)
+            self.pending_action_type = 'region_end'
+            self.waiting_for_click = True
+            self.click_handler.start_listening()
+            return
+
+        if self.pending_action_type == 'move':
+            action = ('move', x, y)
+            self.add_action_to_history(action)
+            self.bring_to_front()
+            QMessageBox.information(self, "موفق", f"موقعیت ({x}, {y}) برای حرکت ضبط شد.")
+
+        elif self.pending_action_type == 'click':
+            action = ('click', x, y)
+            self.add_action_to_history(action)
+            self.bring_to_front()
+            QMessageBox.information(self, "موفق", f"موقعیت ({x}, {y}) برای کلیک ضبط شد.")
+
+        elif self.pending_action_type == 'type':
+            self.bring_to_front()
+            text, ok = QInputDialog.getText(
+                self, "تایپ متن",
+                "متن مورد نظر را وارد کنید:\n(برای اجرا با فایل داده: {{نام ستون}})"
+            )
+            if ok and text.strip():
+                action = ('type', text, x, y)
+                self.add_action_to_history(action)
+                self.bring_to_front()
+                QMessageBox.information(self, "موفق", f"متن برای تایپ در ({x}, {y}) ضبط شد.")
+            else:
+                QMessageBox.warning(self, "لغو", "تایپ لغو شد.")
+
+        elif self.pending_action_type == 'region_end':
+            self.bring_to_front()
+            self.add_wait_action(*self.region_corner, x, y)
+
+        elif self.pending_action_type == IF_PIXEL:
+            self.bring_to_front()
+            self.add_pixel_condition(x, y)
+
+        for btn in self.get_all_buttons():
+            btn.setEnabled(True)
+
+    def open_editor(self):
+        if not self.actions:
+            QMessageBox.warning(self, "هشدار", "هیچ دستوری برای ویرایش وجود ندارد!")
+            return
+        self.bring_to_front()
+        editor = ActionEditorDialog(self, self.action_model, self.history)
+        editor.exec()
+
+    def add_mouse_pos_action(self):
+        # This method is no longer used, but kept for safety
+        pass
+
+    def add_screen_size_action(self):
+        import pyautogui
+        w, h = pyautogui.size()
+        action = ('show_screen', w, h)
+        self.add_action_to_history(action)
+        self.bring_to_front()
+        QMessageBox.information(self, "موفق", f"اندازه صفحه ({w} × {h}) ضبط شد.")
+
+    # --- Continuous / keyboard recording ---
+    def toggle_continuous_recording(self):
+        if self.capture is not None:
+            if self.capture_button is self.btn_continuous:
+                self.stop_capture()
+            return
+        if self.is_busy() or self.waiting_for_click:
+            return
+        self.bring_to_front()
+        tolerance, ok = QInputDialog.getDouble(
+            self,
+            "ضبط پیوسته",
+            "دقت ساده‌سازی مسیر (پیکسل):",
+            value=DEFAULT_TOLERANCE,
+            minValue=0.0,
+            maxValue=50.0,
+            decimals=1
+        )
+        if not ok:
+            return
+        self.start_capture(ContinuousCapture(self.input_hub, tolerance, self.frameGeometry()),
+                           self.btn_continuous, " پایان ضبط پیوسته")
+
+    def toggle_keyboard_recording(self):
+        if self.capture is not None:
+            if self.capture_button is self.btn_keyboard:
+                self.stop_capture()
+            return
+        if self.is_busy() or self.waiting_for_click:
+            return
+        self.start_capture(KeyboardCapture(self.input_hub), self.btn_keyboard, " پایان ضبط کیبورد")
+
+    def start_capture(self, capture, button, stop_text):
+        self.capture = capture
+        self.capture_button = button
+        self.capture_text = button.text()
+        self.capture_row = len(self.actions)
+        capture.actions_ready.connect(self.on_capture_actions)
+        for btn in self.get_all_buttons():
+            btn.setEnabled(False)
+        button.setEnabled(True)
+        button.setText(stop_text)
+        self.status_label.setText("در حال ضبط...")
+        capture.start()
+
+    def on_capture_actions(self, actions):
+        # Rows show up as they are recorded; history gets them all at once on stop
+        self.action_model.extend(actions)
+
+    def stop_capture(self):
+        capture = self.capture
+        self.action_model.extend(capture.stop())
+        self.capture = None
+        recorder = capture.recorder
+        row = self.capture_row
+        recorded = self.actions[row:]
+        if len(recorded):
+            self.history.record(InsertBlock(row, recorded))
+        self.capture_button.setText(self.capture_text)
+        self.capture_button = None
+        for btn in self.get_all_buttons():
+            btn.setEnabled(True)
+        self.update_button_states()
+        self.bring_to_front()
+        stats = self.input_hub.service.stats()
+        self.status_label.setText(
+            f"{recorder.raw_events} رویداد ← {recorder.actions_out} دستور "
+            f"({recorder.reduction:.0%} کاهش) - "
+            f"تأخیر ضبط {stats['latency_mean'] * 1000:.0f} ms، از دست رفته: {stats['dropped']}"
+        )
+
+    def clear_all_actions(self):
+        if self.is_busy():
+            return
+        self.bring_to_front()
+        reply = QMessageBox.question(self, "تأیید", "همه دستورات پاک شوند؟", QMessageBox.Yes | QMessageBox.No)
+        if reply == QMessageBox.Yes:
+            self.history.do(ReplaceStore(self.actions, ActionStore()))
+            self.update_button_states()
+            QMessageBox.information(self, "پاک‌شده", "همه دستورات حذف شدند.")
+
+    def save_actions(self):
+        if not self.actions:
+            QMessageBox.warning(self, "هشدار", "هیچ دستوری برای ذخیره نیست!")
+            return
+        self.bring_to_front()
+        file_path, selected_filter = QFileDialog.getSaveFileName(
+            self, "ذخیره دستورات", "", f"{REC_FILTER};;{BINARY_REC_FILTER};;All Files (*)"
+        )
+        if file_path:
+            if not file_path.endswith(".rec"):
+                file_path += ".rec"
+            try:
+                source = self.actions.source
+                if source is not None and os.path.abspath(source.path) == os.path.abspath(file_path):
+                    # The file can't be replaced while it is mapped (Windows)
+                    self.actions.detach()
+                if selected_filter == BINARY_REC_FILTER:
+                    recfile.save_actions_binary(file_path, self.actions)
+                else:
+                    recfile.save_actions(file_path, self.actions)
+                QMessageBox.information(self, "موفق", "دستورات ذخیره شدند.")
+            except Exception as e:
+                QMessageBox.critical(self, "خطا", f"ذخیره ناموفق:\n{str(e)}")
+
+    def load_actions(self):
+        if self.load_worker is not None:
+            return
+        self.bring_to_front()
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "بارگذاری دستورات", "", "فایل ضبط ماوس (*.rec);;All Files (*)"
+        )
+        if file_path:
+            self.open_file(file_path)
+
+    def open_library(self):
+        if self.load_worker is not None or self.is_busy():
+            return
+        dialog = LibraryDialog(self)
+        if dialog.exec() == QDialog.Accepted and dialog.selected_path:
+            self.open_file(dialog.selected_path)
+
+    def open_file(self, file_path):
+        try:
+            binary = recfile.detect_version(file_path) == recfile.VERSION_BINARY
+            source = recfile.BinaryRecFile(file_path) if binary else None
+        except (OSError, ValueError) as e:
+            QMessageBox.critical(self, "خطا", f"بارگذاری ناموفق:\n{e}")
+            return
+        self.macro_dir = os.path.dirname(os.path.abspath(file_path))
+        # Loading is one undoable step; the previous store is kept, not copied
+        if source is not None:
+            # Binary files stay mapped: rows are decoded as they are shown or replayed
+            self.history.do(ReplaceStore(self.actions, ActionStore.over(source)))
+            self.on_load_finished(len(source))
+            return
+        self.load_mark = self.history.mark()
+        self.load_command = ReplaceStore(self.actions, ActionStore())
+        self.history.do(self.load_command)
+        for btn in self.get_all_buttons():
+            btn.setEnabled(False)
+        self.status_label.setText("در حال بارگذاری...")
+        # Read and parse on a worker thread; rows are added chunk by chunk
+        self.load_worker = LoadWorker(file_path)
+        self.load_worker.chunk_loaded.connect(self.on_load_chunk)
+        self.load_worker.finished.connect(self.on_load_finished)
+        self.load_worker.failed.connect(self.on_load_failed)
+        self.load_worker.start()
+
+    def on_load_chunk(self, chunk):
+        self.action_model.extend(chunk)
+        self.status_label.setText(f"در حال بارگذاری... {len(self.actions)} دستور")
+        if self.load_worker is not None:
+            self.load_worker.chunk_done()
+
+    def _end_load(self):
+        self.load_worker = None
+        for btn in self.get_all_buttons():
+            btn.setEnabled(True)
+        self.update_button_states()
+
+    def on_load_finished(self, count):
+        if self.load_command is not None:
+            # The store was empty when the load entry was made
+            self.history.remeasure(self.load_command)
+            self.load_command = None
+        self._end_load()
+        self.status_label.setText(f"{count} دستور بارگذاری شد.")
+        QMessageBox.information(self, "موفق", "دستورات بارگذاری شدند.")
+
+    def on_load_failed(self, message):
+        self.load_command = None
+        self.history.undo_to(self.load_mark)
+        self._end_load()
+        self.status_label.setText("")
+        QMessageBox.critical(self, "خطا", f"بارگذاری ناموفق:\n{message}")
+
+    def set_replay_count(self):
+        self.replay_count = self.spin_replay.value()
+        self.bring_to_front()
+        QMessageBox.information(self, "موفق", f"تعداد اجرا: {self.replay_count}")
+
+    def set_delay_between_actions(self):
+        self.bring_to_front()
+        delay, ok = QInputDialog.getDouble(
+            self,
+            "تنظیم تأخیر",
+            "تأخیر بین هر دستور (ثانیه):",
+            value=self.delay_between_actions,
+            decimals=1
+        )
+        if ok:
+            if delay < 0:
+                delay = 0.0
+            elif delay > 5.0:
+                delay = 5.0
+            self.delay_between_actions = delay
+            QMessageBox.information(self, "موفق", f"تأخیر بین دستورات: {delay} ثانیه")
+
+    def execute_actions(self):
+        if not self.actions:
+            QMessageBox.warning(self, "هشدار", "هیچ دستوری برای اجرا نیست!")
+            return
+        self.bring_to_front()
+        QMessageBox.information(
+            self,
+            "آماده‌سازی",
+            f"اجرای دستورات آغاز می‌شود!\nلطفاً به پنجره مورد نظر بروید.\nتعداد اجرا: {self.replay_count}"
+        )
+        QTimer.singleShot(100, self._run_execution)
+
+    def _run_execution(self):
+        if self.replay_worker is not None:
+            return
+        trace = ReplayTrace() if self.btn_trace.isChecked() else None
+        worker = ReplayWorker(self.actions, self.replay_count, self.delay_between_actions,
+                              speed=self.spin_speed.value(),
+                              optimize=self.btn_optimize_replay.isChecked(), trace=trace,
+                              base_dir=self.macro_dir)
+        worker.finished.connect(self.on_replay_finished)
+        self._start_worker(worker)
+
+    def execute_with_data(self):
+        if not self.actions or self.is_busy():
+            return
+        self.bring_to_front()
+        data_path, _ = QFileDialog.getOpenFileName(
+            self, "فایل داده", "", "CSV / JSONL (*.csv *.jsonl *.ndjson);;All Files (*)"
+        )
+        if not data_path:
+            return
+        template = MacroTemplate(self.actions)
+        if not template.names:
+            reply = QMessageBox.question(
+                self, "بدون جای‌خالی",
+                "هیچ {{نام ستون}} در دستورات نیست؛ همه ردیف‌ها یکسان اجرا می‌شوند. ادامه می‌دهید؟",
+                QMessageBox.Yes | QMessageBox.No
+            )
+            if reply != QMessageBox.Yes:
+                return
+        checkpoint = Checkpoint(data_path, template.digest())
+        try:
+            done = checkpoint.load()
+        except ValueError as e:
+            QMessageBox.critical(self, "خطا", str(e))
+            return
+        resume = False
+        if done:
+            reply = QMessageBox.question(
+                self, "ادامه کار",
+                f"{done} ردیف قبلاً انجام شده است. از ردیف {done + 1} ادامه می‌دهید؟\n"
+                "(خیر: از ابتدا)",
+                QMessageBox.Yes | QMessageBox.No
+            )
+            resume = reply == QMessageBox.Yes
+        QMessageBox.information(
+            self,
+            "آماده‌سازی",
+            "اجرای دستورات برای هر ردیف فایل داده آغاز می‌شود!\nلطفاً به پنجره مورد نظر بروید."
+        )
+        QTimer.singleShot(100, lambda: self._run_dataset(data_path, resume))
+
+    def _run_dataset(self, data_path, resume):
+        if self.replay_worker is not None:
+            return
+        worker = DatasetWorker(self.actions, data_path, self.delay_between_actions,
+                               speed=self.spin_speed.value(), resume=resume, base_dir=self.macro_dir)
+        worker.finished.connect(self.on_dataset_finished)
+        self._start_worker(worker)
+
+    def calibrate_delays(self):
+        if not self.actions or self.is_busy():
+            return
+        self.bring_to_front()
+        QMessageBox.information(
+            self,
+            "تنظیم خودکار تأخیرها",
+            "دستورات یک بار اجرا می‌شوند و زمان آرام گرفتن صفحه بعد از هر دستور اندازه‌گیری می‌شود.\n"
+            "لطفاً به پنجره مورد نظر بروید."
+        )
+        QTimer.singleShot(100, self._run_calibration)
+
+    def _run_calibration(self):
+        if self.replay_worker is not None:
+            return
+        worker = CalibrationWorker(self.actions, self.delay_between_actions, base_dir=self.macro_dir)
+        worker.calibrated.connect(self.on_calibrated)
+        self._start_worker(worker)
+
+    def _start_worker(self, worker):
+        self.replay_worker = worker
+        worker.progress.connect(self.on_replay_progress)
+        worker.failed.connect(self.on_replay_failed)
+        worker.aborted.connect(self.on_replay_aborted)
+        for btn in self.get_all_buttons():
+            btn.setEnabled(False)
+        self.btn_pause.setText("مکث")
+        self.update_button_states()
+        self.replay_worker.start()
+
+    def toggle_pause(self):
+        if self.replay_worker is None:
+            return
+        if self.replay_worker.is_paused():
+            self.replay_worker.resume()
+            self.btn_pause.setText("مکث")
+        else:
+            self.replay_worker.pause()
+            self.btn_pause.setText("ادامه")
+            self.status_label.setText(self.status_label.text() + " (متوقف)")
+
+    def stop_execution(self):
+        if self.replay_worker is not None:
+            self.replay_worker.abort()
+
+    def on_replay_progress(self, run, index, elapsed):
+        if self.replay_worker is None:
+            return
+        self.status_label.setText(
+            f"{self.replay_worker.describe_run(run)} - "
+            f"دستور {index + 1} از {len(self.replay_worker.actions)} - "
+            f"{elapsed:.1f} ثانیه"
+        )
+        if index < self.action_model.rowCount():
+            self.list_view.setCurrentIndex(self.action_model.index(index))
+
+    def _end_replay(self):
+        self.replay_worker = None
+        for btn in self.get_all_buttons():
+            btn.setEnabled(True)
+        self.btn_pause.setText("مکث")
+        self.update_button_states()
+        self.bring_to_front()
+
+    def on_replay_finished(self, elapsed):
+        worker = self.replay_worker
+        late = lateness_summary(worker.lateness)
+        self._end_replay()
+        status = (
+            f"پایان اجرا در {elapsed:.1f} ثانیه - تأخیر گام‌ها: "
+            f"میانه {late['p50'] * 1000:.1f} ms، p95 {late['p95'] * 1000:.1f} ms، "
+            f"بیشینه {late['max'] * 1000:.1f} ms"
+        )
+        if worker.removed:
+            status += (f"\nبهینه‌سازی: {worker.removed} دستور کمتر، "
+                       f"~{worker.saved * worker.replay_count:.1f} ثانیه صرفه‌جویی")
+        self.status_label.setText(status)
+        QMessageBox.information(self, "پایان", "اجرای دستورات با موفقیت انجام شد!")
+        if worker.trace is not None:
+            self.save_trace(worker.trace)
+
+    def save_trace(self, trace):
+        box = QMessageBox(self)
+        box.setWindowTitle("ردیابی اجرا")
+        box.setText("زمان‌بندی دستورات (میلی‌ثانیه):")
+        box.setInformativeText(trace.format_summary())
+        box.setStyleSheet("QLabel { font-family: monospace; }")
+        box.exec()
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "ذخیره ردیابی", "", "Chrome Trace (*.json);;All Files (*)"
+        )
+        if file_path:
+            try:
+                trace.save_chrome(file_path)
+            except OSError as e:
+                QMessageBox.critical(self, "خطا", f"ذخیره ناموفق:\n{str(e)}")
+
+    def on_dataset_finished(self, elapsed):
+        done, skipped = self.replay_worker.done
+        self._end_replay()
+        status = f"{done} ردیف در {elapsed:.1f} ثانیه اجرا شد"
+        if skipped:
+            status += f" ({skipped} ردیف از قبل انجام شده بود)"
+        self.status_label.setText(status)
+        QMessageBox.information(self, "پایان", "اجرای دستورات برای همه ردیف‌ها انجام شد!")
+
+    def on_calibrated(self, delays):
+        old = self.actions
+        new = ActionStore(apply_delays(old, delays))
+        before, after = time_saved(old, new, self.delay_between_actions)
+        self._end_replay()
+        self.history.do(ReplaceStore(old, new))
+        self.update_button_states()
+        tuned = sum(1 for d in delays if d is not None)
+        self.status_label.setText(
+            f"{tuned} تأخیر تنظیم شد - مکث هر اجرا: {before:.1f} ← {after:.1f} ثانیه"
+        )
+        QMessageBox.information(
+            self, "تنظیم خودکار تأخیرها",
+            f"تأخیر {tuned} دستور تنظیم شد.\n"
+            f"مجموع مکث‌ها در هر اجرا: {before:.1f} ثانیه ← {after:.1f} ثانیه\n"
+            f"صرفه‌جویی: {before - after:.1f} ثانیه در هر اجرا"
+        )
+
+    def on_replay_failed(self, message):
+        self._end_replay()
+        self.status_label.setText("")
+        QMessageBox.critical(self, "خطا", f"خطا در اجرا:\n{message}")
+
+    def on_replay_aborted(self):
+        self._end_replay()
+        self.status_label.setText("اجرا متوقف شد.")
+        QMessageBox.information(self, "توقف", "اجرای دستورات متوقف شد.")
+
+    def closeEvent(self, event):
+        if self.replay_worker is not None:
+            self.replay_worker.abort()
+        if self.load_worker is not None:
+            self.load_worker.cancel()
+        if self.capture is not None:
+            self.capture.stop()
+        self.input_hub.shutdown()
+        super().closeEvent(event)
+
+    def show_about(self):
+        about = AboutDialog(self)
+        about.exec()
+
+    def get_all_buttons(self):
+        return [
+            self.btn_move, self.btn_click, self.btn_mouse_pos, self.btn_set_replay,
+            self.btn_screen_size, self.btn_type, self.btn_edit, self.btn_delay,
+            self.btn_save, self.btn_load, self.btn_undo, self.btn_redo, self.btn_clear, self.btn_execute,
+            self.btn_about, self.btn_continuous, self.btn_keyboard, self.btn_wait,
+            self.btn_calibrate, self.btn_dataset, self.btn_structure, self.btn_library
+        ]
+
+# === Main ===
+def main():
+    app = QApplication(sys.argv)
+    app.setApplicationName("Mouse Action Recorder")
+
+    app.setStyleSheet("""
+        * {
+            background-color: #121212;
+            color: #ffffff;
+            font-family: 'Vazir', 'IRANSans', 'B Nazanin', 'Arial', 'sans-serif';
+            font-size: 11px;
+        }
+        QLabel {
+            color: #ffffff;
+        }
+        QMessageBox {
+            background-color: #1e1e1e;
+            color: #ffffff;
+        }
+        QMessageBox QLabel {
+            color: #ffffff;
+        }
+        QMessageBox QPushButton {
+            background-color: #2d2d2d;
+            border: 1px solid #444444;
+            border-radius: 6px;
+            padding: 5px 10px;
+            font-size: 12px;
+            color: #ffffff;
+            text-align: center;
+        }
+        QMessageBox QPushButton:hover {
+            background-color: #3a3a3a;
+        }
+        QInputDialog {
+            background-color: #1e1e1e;
+        }
+        QInputDialog QLabel {
+            color: #ffffff;
+        }
+        QInputDialog QLineEdit {
+            background-color: #2d2d2d;
+            border: 1px solid #444444;
+            border-radius: 4px;
+            padding: 4px;
+            color: #ffffff;
+        }
+        QComboBox {
+            background-color: #2d2d2d;
+            border: 1px solid #444444;
+            border-radius: 5px;
+            color: #ffffff;
+            padding-left: 8px;
+        }
+        QComboBox QAbstractItemView {
+            background-color: #2d2d2d;
+            color: #ffffff;
+            selection-background-color: #4dabf7;
+            selection-color: #000000;
+        }
+    """)
+
+    window = ActionRecorder()
+    window.show()
+    return app.exec()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
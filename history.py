@@ -0,0 +1,223 @@
+from collections import deque
+
+# Rough per-entry overhead of a command object, for the memory cap
+ENTRY_OVERHEAD = 120
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def _action_size(action):
+    size = 64 + 8 * len(action)
+    for part in action:
+        if isinstance(part, str):
+            size += len(part)
+    return size
+
+
+def _store_size(store):
+    if hasattr(store, 'nbytes'):
+        return store.nbytes()
+    return sum(_action_size(a) for a in store)
+
+
+# --- Commands ---
+# Each command is a small delta with apply()/revert() against the target,
+# which is the ActionListModel (insert_action, remove_action, insert_actions,
+# remove_actions, move_row, set_action, set_store).
+class InsertAction:
+    def __init__(self, row, action):
+        self.row = row
+        self.action = action
+        self.size = ENTRY_OVERHEAD + _action_size(action)
+
+    def apply(self, target):
+        target.insert_action(self.row, self.action)
+
+    def revert(self, target):
+        target.remove_action(self.row)
+
+
+class DeleteAction:
+    def __init__(self, row, action):
+        self.row = row
+        self.action = action
+        self.size = ENTRY_OVERHEAD + _action_size(action)
+
+    def apply(self, target):
+        target.remove_action(self.row)
+
+    def revert(self, target):
+        target.insert_action(self.row, self.action)
+
+
+class MoveAction:
+    def __init__(self, src, dst):
+        self.src = src
+        self.dst = dst
+        self.size = ENTRY_OVERHEAD
+
+    def apply(self, target):
+        target.move_row(self.src, self.dst)
+
+    def revert(self, target):
+        target.move_row(self.dst, self.src)
+
+
+class EditAction:
+    def __init__(self, row, old, new):
+        self.row = row
+        self.old = old
+        self.new = new
+        self.size = ENTRY_OVERHEAD + _action_size(old) + _action_size(new)
+
+    def apply(self, target):
+        target.set_action(self.row, self.new)
+
+    def revert(self, target):
+        target.set_action(self.row, self.old)
+
+
+class EditRows:
+    """Several rows changed in one step (e.g. a bulk coordinate transform)"""
+
+    def __init__(self, rows, old, new):
+        self.rows = list(rows)
+        self.old = list(old)
+        self.new = list(new)
+        self.size = ENTRY_OVERHEAD + sum(_action_size(a) for a in self.old + self.new)
+
+    def apply(self, target):
+        for row, action in zip(self.rows, self.new):
+            target.set_action(row, action)
+
+    def revert(self, target):
+        for row, action in zip(self.rows, self.old):
+            target.set_action(row, action)
+
+
+class InsertBlock:
+    """A run of actions added in one go (e.g. a continuous recording)"""
+
+    def __init__(self, row, actions):
+        self.row = row
+        self.actions = list(actions)
+        self.size = ENTRY_OVERHEAD + sum(_action_size(a) for a in self.actions)
+
+    def apply(self, target):
+        target.insert_actions(self.row, self.actions)
+
+    def revert(self, target):
+        target.remove_actions(self.row, len(self.actions))
+
+
+class ReplaceStore:
+    """Swap in a whole new store (load, clear). Both store objects are kept as they are, not copied"""
+
+    def __init__(self, old, new):
+        self.old = old
+        self.new = new
+        self.size = self.measure()
+
+    def measure(self):
+        # The entry holds on to both stores; a load fills `new` after this
+        # entry was made, so History.remeasure() asks again once it is done
+        return ENTRY_OVERHEAD + _store_size(self.old) + _store_size(self.new)
+
+    def apply(self, target):
+        target.set_store(self.new)
+
+    def revert(self, target):
+        target.set_store(self.old)
+# ----------------------------------
+
+
+# --- History ---
+class History:
+    """Undo/redo over small deltas, capped by an estimate of the memory they hold.
+
+    do(), undo() and redo() are O(1) apart from the edit itself; when the
+    cap is exceeded the oldest entries are dropped.
+    """
+
+    def __init__(self, target, max_bytes=DEFAULT_MAX_BYTES):
+        self.target = target
+        self.max_bytes = max_bytes
+        self._undo = deque()
+        self._redo = []
+        self._bytes = 0
+        # Entries evicted so far; keeps marks valid after eviction
+        self.dropped = 0
+
+    def do(self, command):
+        command.apply(self.target)
+        self.record(command)
+
+    def record(self, command):
+        """Add a command whose change the target has already gone through"""
+        self._undo.append(command)
+        self._bytes += command.size
+        for cmd in self._redo:
+            self._bytes -= cmd.size
+        self._redo.clear()
+        self._evict()
+
+    def undo(self):
+        if not self._undo:
+            return False
+        command = self._undo.pop()
+        command.revert(self.target)
+        self._redo.append(command)
+        return True
+
+    def redo(self):
+        if not self._redo:
+            return False
+        command = self._redo.pop()
+        command.apply(self.target)
+        self._undo.append(command)
+        return True
+
+    def mark(self):
+        """Position in the history, for undo_to()"""
+        return self.dropped + len(self._undo)
+
+    def undo_to(self, mark):
+        while self.dropped + len(self._undo) > mark and self.undo():
+            pass
+        # Work undone this way is abandoned, not redoable
+        for cmd in self._redo:
+            self._bytes -= cmd.size
+        self._redo.clear()
+
+    def can_undo(self):
+        return bool(self._undo)
+
+    def can_redo(self):
+        return bool(self._redo)
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+        self._bytes = 0
+
+    @property
+    def nbytes(self):
+        return self._bytes
+
+    def remeasure(self, command):
+        """Account for `command` again after what it holds has grown (a finished load)"""
+        if command not in self._undo and command not in self._redo:
+            return
+        self._bytes -= command.size
+        command.size = command.measure()
+        self._bytes += command.size
+        self._evict()
+
+    def set_max_bytes(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._evict()
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and len(self._undo) > 1:
+            self._bytes -= self._undo.popleft().size
+            self.dropped += 1
+# ----------------------------------
@@ -0,0 +1,144 @@
+import time
+import threading
+
+DEFAULT_CAPACITY = 65536
+
+# Events are tuples that start with the perf_counter() time they were seen:
+#   (t, 'move', x, y)
+#   (t, 'click', x, y, button, pressed)     button is 'left', 'right' or 'middle'
+#   (t, 'scroll', x, y, dx, dy)
+#   (t, 'key', key, pressed)                key is the pynput Key/KeyCode
+
+
+# --- Ring Buffer ---
+class EventRing:
+    """Bounded FIFO shared by the hook threads and the consumer.
+
+    Slots are allocated once. When the consumer falls behind, the oldest
+    events are overwritten and counted in `dropped`.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self._slots = [None] * capacity
+        self._write = 0
+        self._read = 0
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def __len__(self):
+        return self._write - self._read
+
+    def push(self, event):
+        with self._lock:
+            if self._write - self._read >= self.capacity:
+                self._read += 1
+                self.dropped += 1
+            self._slots[self._write % self.capacity] = event
+            self._write += 1
+
+    def drain(self):
+        """Take every event currently buffered, oldest first"""
+        # Copied under the lock: a push right after it may reuse these slots
+        with self._lock:
+            start, end = self._read, self._write
+            if start == end:
+                return []
+            self._read = end
+            cap = self.capacity
+            first, last = start % cap, end % cap
+            if first < last:
+                return self._slots[first:last]
+            return self._slots[first:] + self._slots[:last]
+
+    def clear(self):
+        with self._lock:
+            self._read = self._write
+# ----------------------------------
+
+
+# --- Hook Service ---
+class HookService:
+    """One long-lived mouse + keyboard hook feeding an EventRing.
+
+    The pynput listeners are started once and kept running; while
+    `enabled` is False their callbacks return straight away, so an idle
+    hook costs next to nothing.
+    """
+
+    BUTTON_NAMES = ('left', 'right', 'middle')
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.ring = EventRing(capacity)
+        self.enabled = False
+        self._mouse = None
+        self._keyboard = None
+        # Capture latency: event time -> handed to the consumer
+        self.delivered = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    @property
+    def running(self):
+        return self._mouse is not None
+
+    def start(self):
+        if self._mouse is not None:
+            return
+        from pynput import mouse, keyboard
+        push = self.ring.push
+        clock = time.perf_counter
+        buttons = {getattr(mouse.Button, name): name for name in self.BUTTON_NAMES}
+
+        def on_move(x, y):
+            if self.enabled:
+                push((clock(), 'move', x, y))
+
+        def on_click(x, y, button, pressed):
+            if self.enabled:
+                push((clock(), 'click', x, y, buttons.get(button, 'left'), pressed))
+
+        def on_scroll(x, y, dx, dy):
+            if self.enabled:
+                push((clock(), 'scroll', x, y, dx, dy))
+
+        def on_press(key):
+            if self.enabled:
+                push((clock(), 'key', key, True))
+
+        def on_release(key):
+            if self.enabled:
+                push((clock(), 'key', key, False))
+
+        self._mouse = mouse.Listener(on_move=on_move, on_click=on_click, on_scroll=on_scroll)
+        self._keyboard = keyboard.Listener(on_press=on_press, on_release=on_release)
+        self._mouse.start()
+        self._keyboard.start()
+
+    def stop(self):
+        self.enabled = False
+        for listener in (self._mouse, self._keyboard):
+            if listener is not None:
+                listener.stop()
+        self._mouse = None
+        self._keyboard = None
+
+    def collect(self):
+        """Drain the ring and update the latency counters"""
+        events = self.ring.drain()
+        if events:
+            now = time.perf_counter()
+            self.delivered += len(events)
+            self.latency_total += sum(now - ev[0] for ev in events)
+            self.latency_max = max(self.latency_max, now - events[0][0])
+        return events
+
+    def stats(self):
+        return {
+            'delivered': self.delivered,
+            'dropped': self.ring.dropped,
+            'buffered': len(self.ring),
+            'latency_mean': self.latency_total / self.delivered if self.delivered else 0.0,
+            'latency_max': self.latency_max,
+        }
+# ----------------------------------
@@ -0,0 +1,269 @@
+import os
+import json
+import sqlite3
+import recfile
+from geometry import _XY_AT
+
+DEFAULT_DB_PATH = os.path.join(os.path.expanduser("~"), ".aut0mate", "library.sqlite")
+# Rows written per transaction while scanning; an interrupted scan keeps what it committed
+COMMIT_EVERY = 200
+DEFAULT_LIMIT = 200
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS roots (
+    path TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS macros (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    actions INTEGER NOT NULL,
+    counts TEXT NOT NULL,
+    shortcuts TEXT NOT NULL,
+    min_x INTEGER, min_y INTEGER, max_x INTEGER, max_y INTEGER,
+    error TEXT
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS macro_text USING fts5(
+    name, text, shortcuts, tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+
+def summarize(path):
+    """What the index keeps about one .rec file, read as a stream.
+
+    Returns a dict: actions, counts {kind: n}, texts (typed text in
+    order), shortcuts (distinct, in order of first use), bounds
+    (min_x, min_y, max_x, max_y) or None. Coordinates that aren't
+    numbers (dataset placeholders like '{{x}}') stay out of the bounds.
+    """
+    counts = {}
+    texts = []
+    shortcuts = {}
+    min_x = min_y = max_x = max_y = None
+    total = 0
+    for action in recfile.iter_actions(path):
+        if type(action[-1]) is dict:
+            action = action[:-1]
+        kind = action[0]
+        total += 1
+        counts[kind] = counts.get(kind, 0) + 1
+        if kind == 'type':
+            texts.append(action[1])
+        elif kind == 'shortcut':
+            shortcuts.setdefault(action[1], None)
+        at = _XY_AT.get(kind)
+        if at is None or len(action) < at + 2:
+            continue
+        x, y = action[at], action[at + 1]
+        if type(x) is not int or type(y) is not int:
+            continue
+        if min_x is None:
+            min_x = max_x = x
+            min_y = max_y = y
+        else:
+            min_x, max_x = min(min_x, x), max(max_x, x)
+            min_y, max_y = min(min_y, y), max(max_y, y)
+    return {
+        'actions': total,
+        'counts': counts,
+        'texts': texts,
+        'shortcuts': list(shortcuts),
+        'bounds': None if min_x is None else (min_x, min_y, max_x, max_y),
+    }
+
+
+def _fts_query(text):
+    """User text -> FTS5 query: every word must match, as a prefix"""
+    words = text.split()
+    return " ".join('"' + word.replace('"', '""') + '"*' for word in words)
+
+
+def _iter_rec_files(root):
+    stack = [root]
+    while stack:
+        folder = stack.pop()
+        try:
+            entries = list(os.scandir(folder))
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.lower().endswith(".rec") and entry.is_file():
+                    yield entry.path, entry.stat()
+            except OSError:
+                continue
+
+
+class ScanCancelled(Exception):
+    pass
+
+
+# --- Macro Library ---
+class MacroLibrary:
+    """SQLite index of .rec files: counts, typed text, shortcuts, bounds.
+
+    The database is opened on first use. update() only reads files whose
+    size or mtime changed since the last scan; search() is a full-text
+    query over typed text, shortcut names and file names. A connection
+    belongs to the thread that opened it, so give every thread its own
+    MacroLibrary.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        self.db_path = db_path
+        self._db = None
+
+    @property
+    def db(self):
+        if self._db is None:
+            folder = os.path.dirname(self.db_path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            db = sqlite3.connect(self.db_path, timeout=10.0)
+            db.row_factory = sqlite3.Row
+            # Readers (the search box) don't wait for a scan that is writing
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.executescript(_SCHEMA)
+            self._db = db
+        return self._db
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def roots(self):
+        return [row[0] for row in self.db.execute("SELECT path FROM roots ORDER BY path")]
+
+    def _forget_under(self, root, keep):
+        prefix = os.path.join(root, "")
+        gone = [(row[0],) for row in self.db.execute(
+            "SELECT id, path FROM macros WHERE substr(path, 1, ?) = ?", (len(prefix), prefix))
+            if row[1] not in keep]
+        self.db.executemany("DELETE FROM macro_text WHERE rowid = ?", gone)
+        self.db.executemany("DELETE FROM macros WHERE id = ?", gone)
+        return len(gone)
+
+    def _store(self, path, st, old_id):
+        """Index one file, replacing its old entry (`old_id`) if any"""
+        try:
+            info = summarize(path)
+            error = None
+        except Exception as e:
+            # Kept, with the error, so it isn't read again until it changes;
+            # one unreadable file must not stop the scan
+            info = {'actions': 0, 'counts': {}, 'texts': [], 'shortcuts': [], 'bounds': None}
+            error = str(e)
+        bounds = info['bounds'] or (None, None, None, None)
+        row = (path, st.st_size, st.st_mtime_ns, info['actions'], json.dumps(info['counts']),
+               " ".join(info['shortcuts'])) + tuple(bounds) + (error,)
+        db = self.db
+        if old_id is not None:
+            # A changed file gets a new id: ids order the results newest first
+            db.execute("DELETE FROM macros WHERE id = ?", (old_id,))
+            db.execute("DELETE FROM macro_text WHERE rowid = ?", (old_id,))
+        rowid = db.execute(
+            "INSERT INTO macros (path, size, mtime_ns, actions, counts, shortcuts,"
+            " min_x, min_y, max_x, max_y, error) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", row).lastrowid
+        db.execute("INSERT INTO macro_text (rowid, name, text, shortcuts) VALUES (?, ?, ?, ?)",
+                   (rowid, os.path.splitext(os.path.basename(path))[0], "\n".join(info['texts']),
+                    " ".join(info['shortcuts'])))
+
+    def update(self, root, on_progress=None, cancelled=None):
+        """Bring the index of `root` (a folder, scanned recursively) up to date.
+
+        Files with the size and mtime already on record are not opened.
+        `on_progress(files seen, path)` is called per file. When
+        `cancelled()` returns true the scan stops, keeps what it read and
+        raises ScanCancelled. Returns (files read, files removed, files
+        unchanged).
+        """
+        root = os.path.abspath(root)
+        db = self.db
+        with db:
+            db.execute("INSERT OR IGNORE INTO roots (path) VALUES (?)", (root,))
+        prefix = os.path.join(root, "")
+        known = {row[1]: (row[0], row[2], row[3]) for row in db.execute(
+            "SELECT id, path, size, mtime_ns FROM macros WHERE substr(path, 1, ?) = ?",
+            (len(prefix), prefix))}
+        seen = set()
+        read = unchanged = pending = 0
+        try:
+            for path, st in _iter_rec_files(root):
+                if cancelled is not None and cancelled():
+                    raise ScanCancelled(root)
+                seen.add(path)
+                old = known.get(path)
+                if old is not None and old[1] == st.st_size and old[2] == st.st_mtime_ns:
+                    unchanged += 1
+                else:
+                    self._store(path, st, None if old is None else old[0])
+                    read += 1
+                    pending += 1
+                    if pending >= COMMIT_EVERY:
+                        db.commit()
+                        pending = 0
+                if on_progress is not None:
+                    on_progress(len(seen), path)
+            removed = self._forget_under(root, seen)
+        finally:
+            db.commit()
+        return read, removed, unchanged
+
+    def update_all(self, on_progress=None, cancelled=None):
+        """update() every folder added so far; returns the summed counts"""
+        totals = [0, 0, 0]
+        for root in self.roots():
+            for i, n in enumerate(self.update(root, on_progress, cancelled)):
+                totals[i] += n
+        return tuple(totals)
+
+    def _result(self, row):
+        result = dict(row)
+        result['name'] = os.path.basename(result['path'])
+        result['counts'] = json.loads(result['counts'])
+        result['shortcuts'] = result['shortcuts'].split()
+        if result['min_x'] is None:
+            result['bounds'] = None
+        else:
+            result['bounds'] = (result['min_x'], result['min_y'], result['max_x'], result['max_y'])
+        for key in ('min_x', 'min_y', 'max_x', 'max_y'):
+            del result[key]
+        return result
+
+    def search(self, text="", limit=DEFAULT_LIMIT):
+        """Indexed files whose typed text, shortcuts or name contain every word of `text`.
+
+        Words match as prefixes. Files indexed or changed most recently
+        come first; empty `text` lists all files that way. Each result is
+        a dict: path, name, size, mtime_ns, actions, counts, shortcuts,
+        bounds, error and, for a text search, snippet (the matching
+        typed text).
+        """
+        query = _fts_query(text)
+        if not query:
+            rows = self.db.execute(
+                "SELECT *, NULL AS snippet FROM macros ORDER BY id DESC LIMIT ?", (limit,))
+        else:
+            # Not ORDER BY rank: bm25 and snippet() would run for every match
+            # before the LIMIT; in rowid order FTS5 stops after `limit` rows
+            rows = self.db.execute(
+                "SELECT m.*, snippet(macro_text, 1, '[', ']', '…', 8) AS snippet"
+                " FROM macro_text JOIN macros m ON m.id = macro_text.rowid"
+                " WHERE macro_text MATCH ? ORDER BY macro_text.rowid DESC LIMIT ?", (query, limit))
+        return [self._result(row) for row in rows]
+
+    def count(self):
+        return self.db.execute("SELECT count(*) FROM macros").fetchone()[0]
+# ----------------------------------
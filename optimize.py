@@ -0,0 +1,105 @@
+from replay import CONTROL_KINDS, action_meta, total_pause
+
+# --- Peephole optimizer ---
+# Each rule looks at the action about to be emitted and the one before it.
+# Recorded timing survives: when an action with a 'dt' is dropped, its gap
+# is added to the next action's 'dt'.
+
+
+def _xy(action):
+    """Where the action puts the pointer, or None"""
+    kind = action[0]
+    if kind in ('move', 'click'):
+        return action[1], action[2]
+    if kind == 'type' and len(action) > 3:
+        return action[2], action[3]
+    return None
+
+
+def _gap(meta):
+    return meta.get('dt') or 0.0 if meta else 0.0
+
+
+def _carry_dt(carried, action):
+    """`action` with the recorded gaps of dropped predecessors folded in"""
+    if not carried:
+        return action
+    core, meta = action_meta(action)
+    if meta is None or meta.get('dt') is None:
+        return action
+    meta = dict(meta, dt=round(meta['dt'] + carried, 4))
+    return core + (meta,)
+
+
+def optimize(actions):
+    """Rewrite `actions` into a shorter program that does the same.
+
+    - a 'move' followed by a click/type at the same spot is dropped (both
+      move the pointer themselves), as is a 'move' to where it already is
+    - back-to-back 'type' actions at the same spot, or without a position,
+      become one, unless the second has a recorded gap of its own
+    - a 'show_screen' that repeats the size already recorded is dropped
+
+    Returns (new_actions, origin) where origin[i] is the index in `actions`
+    of the action new_actions[i] came from.
+    """
+    out = []
+    origin = []
+    pointer = None
+    screen = None
+    carried = 0.0
+    for i, action in enumerate(actions):
+        action = _carry_dt(carried, action)
+        carried = 0.0
+        core, meta = action_meta(action)
+        kind = core[0]
+
+        if kind == 'show_screen':
+            if (core[1], core[2]) == screen:
+                carried = _gap(meta)
+                continue
+            screen = (core[1], core[2])
+
+        elif kind in CONTROL_KINDS:
+            # What comes next may follow a repeat, a skipped branch or another macro
+            pointer = screen = None
+
+        elif kind == 'move' and (core[1], core[2]) == pointer and not (meta and meta.get('delay')):
+            carried = _gap(meta)
+            continue
+
+        elif kind in ('click', 'type') and out:
+            prev_core, prev_meta = action_meta(out[-1])
+            if (prev_core[0] == 'move' and _xy(core) is not None
+                    and (prev_core[1], prev_core[2]) == _xy(core)
+                    and not (prev_meta and prev_meta.get('delay'))):
+                out.pop()
+                origin.pop()
+                action = _carry_dt(_gap(prev_meta), action)
+                core, meta = action_meta(action)
+            elif (kind == 'type' and prev_core[0] == 'type' and prev_core[2:] == core[2:]
+                    and (prev_meta or {}).get('entry') == (meta or {}).get('entry')
+                    and not (prev_meta and prev_meta.get('delay'))
+                    and not (meta and meta.get('dt'))):
+                merged = ('type', prev_core[1] + core[1]) + core[2:]
+                if meta and meta.get('delay') is not None:
+                    prev_meta = dict(prev_meta or {}, delay=meta['delay'])
+                out[-1] = merged + (prev_meta,) if prev_meta else merged
+                continue
+
+        xy = _xy(core)
+        if xy is not None:
+            pointer = xy
+        elif kind == 'scroll':
+            pointer = (core[1], core[2])
+        out.append(action)
+        origin.append(i)
+    return out, origin
+
+
+def optimize_report(actions, delay):
+    """optimize() plus (steps removed, pause seconds saved per run)"""
+    new, origin = optimize(actions)
+    saved = total_pause(actions, delay) - total_pause(new, delay)
+    return new, origin, len(actions) - len(new), saved
+# ----------------------------------
@@ -0,0 +1,218 @@
+import os
+import time
+import shutil
+import subprocess
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from backends import create_backend
+from replay import ReplayControl, compile_actions, run_program
+from optimize import optimize
+
+# Displays :99, :100, ... unless they are already taken
+DISPLAY_BASE = 99
+DEFAULT_SIZE = (1920, 1080)
+XVFB_START_TIMEOUT = 5.0
+
+
+# --- Virtual Displays ---
+def free_display_numbers(count, base=DISPLAY_BASE):
+    """`count` X display numbers with no server (lock file) on them"""
+    numbers = []
+    n = base
+    while len(numbers) < count:
+        if not os.path.exists(f"/tmp/.X{n}-lock"):
+            numbers.append(n)
+        n += 1
+    return numbers
+
+
+class VirtualDisplay:
+    """An Xvfb server on display :number, running between start() and stop()"""
+
+    def __init__(self, number, size=DEFAULT_SIZE, depth=24):
+        self.number = number
+        self.size = size
+        self.depth = depth
+        self.process = None
+
+    @property
+    def name(self):
+        return f":{self.number}"
+
+    def start(self):
+        xvfb = shutil.which("Xvfb")
+        if xvfb is None:
+            raise OSError("Xvfb not found; install it (e.g. the xvfb package) to replay headless")
+        w, h = self.size
+        self.process = subprocess.Popen(
+            [xvfb, self.name, "-screen", "0", f"{w}x{h}x{self.depth}", "-nolisten", "tcp"],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        # The server is ready once it has created its socket
+        socket = f"/tmp/.X11-unix/X{self.number}"
+        deadline = time.monotonic() + XVFB_START_TIMEOUT
+        while not os.path.exists(socket):
+            if self.process.poll() is not None:
+                raise OSError(f"Xvfb exited on display {self.name} (code {self.process.returncode})")
+            if time.monotonic() > deadline:
+                self.stop()
+                raise OSError(f"Xvfb did not start on display {self.name}")
+            time.sleep(0.02)
+        return self
+
+    def stop(self):
+        if self.process is not None:
+            self.process.terminate()
+            try:
+                self.process.wait(2.0)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+            self.process = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+# ----------------------------------
+
+
+# --- Worker Processes ---
+# State of the worker process this module is running in
+_worker = {}
+
+
+def _init_worker(display, actions, delay, backend_name, speed, fit, base_dir):
+    # The process keeps its display for its whole life; it is set before
+    # anything (pyautogui, screen grabs) has looked at $DISPLAY
+    os.environ["DISPLAY"] = display
+    control = ReplayControl()
+    _worker.update(control=control, speed=speed, error=None)
+    try:
+        if backend_name == "xtest":
+            backend = create_backend(backend_name, display=display)
+        else:
+            backend = create_backend(backend_name)
+        _worker["program"] = compile_actions(actions, delay, control, backend, speed=speed,
+                                             base_dir=base_dir, fit=fit)
+    except Exception as e:
+        # Raising here would break the pool without saying why; report it instead
+        _worker["error"] = f"Worker setup failed: {type(e).__name__}: {e}"
+
+
+def _run_iteration(run):
+    """One replay on this worker's display: (seconds, error or None, setup error or None)"""
+    if _worker["error"] is not None:
+        return 0.0, None, _worker["error"]
+    control = _worker["control"]
+    start = control.clock()
+    try:
+        run_program(_worker["program"], 1, control, speed=_worker["speed"])
+    except Exception as e:
+        return control.clock() - start, f"{type(e).__name__}: {e}", None
+    return control.clock() - start, None, None
+# ----------------------------------
+
+
+def run_parallel(actions, replay_count, delay, workers=None, backend="xtest", speed=1.0,
+                 size=DEFAULT_SIZE, displays=None, on_result=None, fit=True, base_dir=None):
+    """Replay `actions` `replay_count` times spread over worker processes.
+
+    Each worker process owns one X display: a fresh Xvfb server of `size`,
+    or one of the existing `displays` (names like ':1') when given.
+    Iterations are handed out one at a time, so a slow display doesn't
+    hold up the rest. A failed iteration is recorded and the worker moves
+    on to the next. A worker that could not set up (dead display, missing
+    library) is retired and its run goes to another display; one whose
+    process died has that run recorded as failed and is retired too.
+    `on_result(display, run, seconds, error)` is called in this process
+    as each iteration finishes. With `fit` the coordinates are mapped to
+    each display's size. Relative sub-macro paths are looked up in
+    `base_dir`.
+
+    Returns one dict per worker: display, runs, failures [(run, message)],
+    busy (seconds spent replaying), error (why it was retired, or None).
+    """
+    actions, _ = optimize(list(actions))
+    if displays is None:
+        if workers is None:
+            workers = os.cpu_count() or 1
+        # A server and a worker process per display; more than the runs would idle
+        workers = min(workers, replay_count)
+        servers = [VirtualDisplay(n, size) for n in free_display_numbers(workers)]
+    else:
+        servers = []
+        displays = list(displays)
+        workers = len(displays)
+    if workers < 1:
+        raise ValueError("At least one worker is needed")
+
+    results = {}
+    pools = {}
+    # spawn, not fork: each worker must import the input libraries itself,
+    # after it has been given its display
+    context = multiprocessing.get_context("spawn")
+    try:
+        for server in servers:
+            server.start()
+        names = displays or [server.name for server in servers]
+        for name in names:
+            results[name] = {'display': name, 'runs': 0, 'failures': [], 'busy': 0.0, 'error': None}
+            # One single-process pool per display, so a broken one can be retired alone
+            pools[name] = ProcessPoolExecutor(
+                1, mp_context=context, initializer=_init_worker,
+                initargs=(name, actions, delay, backend, speed, fit, base_dir))
+        pending = deque(range(replay_count))
+        running = {}
+        retired = None
+
+        def hand_out(name):
+            if pending:
+                run = pending.popleft()
+                running[pools[name].submit(_run_iteration, run)] = (name, run)
+
+        for name in names:
+            hand_out(name)
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, run = running.pop(future)
+                result = results[name]
+                try:
+                    seconds, error, setup_error = future.result()
+                except Exception as e:
+                    # The worker process died during this run (BrokenProcessPool)
+                    seconds, error, setup_error = 0.0, f"{type(e).__name__}: {e}", None
+                    result['error'] = error
+                if setup_error is not None:
+                    result['error'] = setup_error
+                    pending.appendleft(run)
+                else:
+                    result['runs'] += 1
+                    result['busy'] += seconds
+                    if error is not None:
+                        result['failures'].append((run, error))
+                    if on_result is not None:
+                        on_result(name, run, seconds, error)
+                if result['error'] is None:
+                    hand_out(name)
+                else:
+                    pools.pop(name).shutdown(wait=False, cancel_futures=True)
+                    retired = name
+                    # A run given back goes to a display that is idle, if any
+                    busy = {n for n, _ in running.values()}
+                    for other in pools:
+                        if other not in busy:
+                            hand_out(other)
+        # Left over only when every display was retired
+        for run in pending:
+            results[retired]['failures'].append((run, "No worker left to run on"))
+    finally:
+        for pool in pools.values():
+            pool.shutdown()
+        for server in servers:
+            server.stop()
+    for result in results.values():
+        result['failures'].sort()
+    return list(results.values())
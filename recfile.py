@@ -0,0 +1,431 @@
+import os
+import json
+import mmap
+import struct
+from collections import OrderedDict
+
+# .rec v1: one JSON array holding every action (what the app always wrote).
+# .rec v2: JSON Lines - a header object on the first line, then one action
+#          array per line, so files can be appended to and read as a stream.
+# .rec v3: binary - fixed-width records plus an interned string table,
+#          opened through mmap so nothing is parsed until it is asked for.
+FORMAT_NAME = "aut0mate-rec"
+VERSION_JSON = 1
+VERSION_JSONL = 2
+VERSION_BINARY = 3
+
+CHUNK_SIZE = 5000
+
+_encode = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+_HEADER = _encode({"format": FORMAT_NAME, "version": VERSION_JSONL}) + "\n"
+
+
+def detect_version(path):
+    with open(path, 'rb') as f:
+        head = f.read(len(BINARY_MAGIC))
+        if head == BINARY_MAGIC:
+            return VERSION_BINARY
+        head = head.lstrip()
+        if head.startswith(b"\xef\xbb\xbf"):
+            head = head[3:].lstrip()
+        while not head:
+            block = f.read(4096)
+            if not block:
+                raise ValueError("Empty .rec file")
+            head = block.lstrip()
+    if head[:1] == b"[":
+        return VERSION_JSON
+    if head[:1] == b"{":
+        return VERSION_JSONL
+    raise ValueError("Not a .rec file")
+
+
+def _check_header(line):
+    header = json.loads(line)
+    if not isinstance(header, dict) or header.get("format") != FORMAT_NAME:
+        raise ValueError("Not a .rec file")
+    if header.get("version", VERSION_JSONL) > VERSION_JSONL:
+        raise ValueError(f"Unsupported .rec version: {header.get('version')}")
+
+
+def _parse_lines(lines, line_numbers):
+    """Parse a batch of v2 lines with one json.loads call"""
+    try:
+        items = json.loads("[" + ",".join(lines) + "]")
+        if len(items) == len(lines) and all(type(item) is list for item in items):
+            return [tuple(item) for item in items]
+    except ValueError:
+        pass
+    # Something is off in this batch; go line by line to find it
+    actions = []
+    for line_no, line in zip(line_numbers, lines):
+        try:
+            item = json.loads(line)
+            if type(item) is not list:
+                raise ValueError()
+        except ValueError:
+            if not line.endswith("\n"):
+                # Half-written last line from an interrupted append
+                break
+            raise ValueError(f"Corrupt action on line {line_no}") from None
+        actions.append(tuple(item))
+    return actions
+
+
+def _iter_jsonl_chunks(path, chunk_size):
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        _check_header(f.readline())
+        lines = []
+        line_numbers = []
+        for line_no, line in enumerate(f, 2):
+            if not line.strip():
+                continue
+            lines.append(line)
+            line_numbers.append(line_no)
+            if len(lines) >= chunk_size:
+                yield _parse_lines(lines, line_numbers)
+                lines = []
+                line_numbers = []
+        if lines:
+            yield _parse_lines(lines, line_numbers)
+
+
+def iter_actions(path):
+    """Yield the actions of a .rec file one tuple at a time"""
+    version = detect_version(path)
+    if version == VERSION_BINARY:
+        with BinaryRecFile(path) as rec:
+            yield from rec
+    elif version == VERSION_JSON:
+        # The old format has no line structure, it has to be parsed in one go
+        with open(path, 'r', encoding='utf-8-sig') as f:
+            for item in json.load(f):
+                yield tuple(item)
+    else:
+        for chunk in _iter_jsonl_chunks(path, CHUNK_SIZE):
+            yield from chunk
+
+
+def iter_chunks(path, chunk_size=CHUNK_SIZE):
+    """Yield lists of at most `chunk_size` actions"""
+    if detect_version(path) == VERSION_JSONL:
+        for chunk in _iter_jsonl_chunks(path, chunk_size):
+            if chunk:
+                yield chunk
+        return
+    chunk = []
+    for action in iter_actions(path):
+        chunk.append(action)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def load_actions(path):
+    return list(iter_actions(path))
+
+
+def save_actions(path, actions):
+    """Write `actions` as a v2 (JSON Lines) file"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8', newline="\n") as f:
+        f.write(_HEADER)
+        f.writelines(_encode(action) + "\n" for action in actions)
+    os.replace(tmp_path, path)
+
+
+def save_actions_as(path, actions, version):
+    if version == VERSION_BINARY:
+        save_actions_binary(path, actions)
+    elif version == VERSION_JSONL:
+        save_actions(path, actions)
+    else:
+        raise ValueError(f"Cannot write .rec version {version}")
+
+
+def convert(src_path, dst_path, version=VERSION_BINARY):
+    """Rewrite any .rec file in another format, streaming the actions across"""
+    save_actions_as(dst_path, iter_actions(src_path), version)
+
+
+def _drop_torn_line(path):
+    """Cut off a half-written last line left behind by an interrupted append"""
+    with open(path, 'rb+') as f:
+        end = f.seek(0, os.SEEK_END)
+        pos = end
+        while pos > 0:
+            step = min(65536, pos)
+            f.seek(pos - step)
+            block = f.read(step)
+            newline = block.rfind(b"\n")
+            if newline != -1:
+                keep = pos - step + newline + 1
+                if keep != end:
+                    f.truncate(keep)
+                return
+            pos -= step
+
+
+def append_actions(path, actions):
+    """Append to a v2 file, creating it when it does not exist yet"""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        with open(path, 'w', encoding='utf-8', newline="\n") as f:
+            f.write(_HEADER)
+    elif detect_version(path) != VERSION_JSONL:
+        raise ValueError("Only v2 .rec files can be appended to")
+    else:
+        _drop_torn_line(path)
+    with open(path, 'a', encoding='utf-8', newline="\n") as f:
+        f.writelines(_encode(action) + "\n" for action in actions)
+
+
+# --- Binary format (v3) ---
+# header | records (RECORD.size bytes each) | metadata columns | string offsets | string data
+BINARY_MAGIC = b"AUT0REC\x00"
+HEADER = struct.Struct("<8sHHQQQQ")   # magic, version, flags, count, records, offsets, data
+RECORD = struct.Struct("<BB2xiii")    # opcode, metadata flags, a, b, c
+OFFSET = struct.Struct("<Q")
+SECONDS = struct.Struct("<d")
+
+OP_MOVE = 1
+OP_CLICK = 2
+OP_SHORTCUT = 3
+OP_SHOW_SCREEN = 4
+OP_TYPE = 5
+OP_TEXT = 6      # 'type' without a position, typed wherever the focus is
+OP_SCROLL = 7
+OP_JSON = 255    # anything else, stored as a JSON string in the string table
+
+# A record whose action ends in {'dt': ..., 'delay': ...} says which keys it
+# has in its flags; the values live in one column of doubles per key, right
+# after the records. The header flags say which columns the file has.
+META_DT = 1
+META_DELAY = 2
+# Buttons other than the default left, in the c field of a click record
+BUTTON_CODES = {'right': 1, 'middle': 2}
+BUTTON_NAMES = {code: name for name, code in BUTTON_CODES.items()}
+
+# Decoded strings kept per open file; a long recording has too many to keep all
+STRING_CACHE_SIZE = 4096
+
+_FIXED_KINDS = {'move': OP_MOVE, 'click': OP_CLICK, 'show_screen': OP_SHOW_SCREEN}
+
+
+def _is_int32(value):
+    return type(value) is int and -2**31 <= value < 2**31
+
+
+def split_meta(action):
+    """(action, dt, delay), or None when the metadata doesn't fit the columns.
+
+    dt and delay are None when the action doesn't have them. Metadata fits
+    when its only keys are 'dt' and 'delay' and their values are floats.
+    """
+    last = action[-1]
+    if type(last) is not dict or len(action) < 2:
+        return action, None, None
+    if not last or not last.keys() <= {'dt', 'delay'}:
+        return None
+    dt = last.get('dt')
+    delay = last.get('delay')
+    if (dt is not None and type(dt) is not float) or (delay is not None and type(delay) is not float):
+        return None
+    return action[:-1], dt, delay
+
+
+def _fixed_record(action, intern):
+    """(op, a, b, c) for the actions with a fixed-width record, else None"""
+    act_type = action[0]
+    n = len(action)
+    op = _FIXED_KINDS.get(act_type)
+    if op is not None and n == 3 and _is_int32(action[1]) and _is_int32(action[2]):
+        return op, action[1], action[2], 0
+    if act_type == 'click' and n == 4 and action[3] in BUTTON_CODES \
+            and _is_int32(action[1]) and _is_int32(action[2]):
+        return OP_CLICK, action[1], action[2], BUTTON_CODES[action[3]]
+    if act_type == 'type' and n == 4 and isinstance(action[1], str) \
+            and _is_int32(action[2]) and _is_int32(action[3]):
+        return OP_TYPE, action[2], action[3], intern(action[1])
+    if act_type == 'type' and n == 2 and isinstance(action[1], str):
+        return OP_TEXT, 0, 0, intern(action[1])
+    if act_type == 'shortcut' and n == 2 and isinstance(action[1], str):
+        return OP_SHORTCUT, intern(action[1]), 0, 0
+    if act_type == 'scroll' and n == 4 and _is_int32(action[1]) and _is_int32(action[2]) \
+            and _is_int32(action[3]):
+        return OP_SCROLL, action[1], action[2], action[3]
+    return None
+
+
+def save_actions_binary(path, actions):
+    strings = {}
+    pack = RECORD.pack
+    pack_seconds = SECONDS.pack
+
+    def intern(text):
+        idx = strings.get(text)
+        if idx is None:
+            idx = strings[text] = len(strings)
+        return idx
+
+    records = bytearray()
+    dts = bytearray()
+    delays = bytearray()
+    used = 0
+    count = 0
+    for action in actions:
+        split = split_meta(action)
+        record = None
+        if split is not None:
+            record = _fixed_record(split[0], intern)
+        if record is None:
+            records += pack(OP_JSON, 0, 0, 0, intern(_encode(list(action))))
+            dt = delay = None
+        else:
+            _, dt, delay = split
+            flags = 0
+            if dt is not None:
+                flags |= META_DT
+            if delay is not None:
+                flags |= META_DELAY
+            used |= flags
+            records += pack(record[0], flags, *record[1:])
+        dts += pack_seconds(0.0 if dt is None else dt)
+        delays += pack_seconds(0.0 if delay is None else delay)
+        count += 1
+
+    offsets = bytearray()
+    data = bytearray()
+    for text in strings:
+        offsets += OFFSET.pack(len(data))
+        data += text.encode('utf-8')
+    offsets += OFFSET.pack(len(data))
+
+    columns = bytearray()
+    if used & META_DT:
+        columns += dts
+    if used & META_DELAY:
+        columns += delays
+    records_at = HEADER.size
+    offsets_at = records_at + len(records) + len(columns)
+    data_at = offsets_at + len(offsets)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(BINARY_MAGIC, VERSION_BINARY, used, count, records_at, offsets_at, data_at))
+        f.write(records)
+        f.write(columns)
+        f.write(offsets)
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class BinaryRecFile:
+    """Read-only, memory-mapped view of a v3 file that behaves like a list of actions.
+
+    Opening it only reads the header; records and strings are decoded on
+    access, so len(), random access and the first screenful are instant
+    whatever the file size.
+    """
+
+    BLOCK = 65536
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError("Empty .rec file") from None
+        if len(self._mm) < HEADER.size:
+            self.close()
+            raise ValueError("Truncated .rec file")
+        (magic, version, flags, self._count, self._records_at,
+         self._offsets_at, self._data_at) = HEADER.unpack_from(self._mm, 0)
+        if magic != BINARY_MAGIC or version != VERSION_BINARY:
+            self.close()
+            raise ValueError("Not a binary .rec file")
+        at = self._records_at + self._count * RECORD.size
+        self._dt_at = self._delay_at = None
+        if flags & META_DT:
+            self._dt_at = at
+            at += self._count * SECONDS.size
+        if flags & META_DELAY:
+            self._delay_at = at
+        self._strings = OrderedDict()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._file.close()
+
+    def __len__(self):
+        return self._count
+
+    def _read_string(self, idx):
+        start, end = struct.unpack_from("<QQ", self._mm, self._offsets_at + idx * OFFSET.size)
+        return self._mm[self._data_at + start:self._data_at + end].decode('utf-8')
+
+    def string(self, idx):
+        strings = self._strings
+        text = strings.get(idx)
+        if text is None:
+            text = strings[idx] = self._read_string(idx)
+            if len(strings) > STRING_CACHE_SIZE:
+                strings.popitem(last=False)
+        else:
+            strings.move_to_end(idx)
+        return text
+
+    def _decode(self, i, op, flags, a, b, c):
+        if op == OP_MOVE:
+            action = ('move', a, b)
+        elif op == OP_CLICK:
+            action = ('click', a, b, BUTTON_NAMES[c]) if c else ('click', a, b)
+        elif op == OP_TYPE:
+            action = ('type', self.string(c), a, b)
+        elif op == OP_TEXT:
+            action = ('type', self.string(c))
+        elif op == OP_SHORTCUT:
+            action = ('shortcut', self.string(a))
+        elif op == OP_SHOW_SCREEN:
+            action = ('show_screen', a, b)
+        elif op == OP_SCROLL:
+            action = ('scroll', a, b, c)
+        else:
+            # Mostly one of a kind; not worth a place in the string cache
+            return tuple(json.loads(self._read_string(c)))
+        if not flags:
+            return action
+        meta = {}
+        if flags & META_DT:
+            meta['dt'] = SECONDS.unpack_from(self._mm, self._dt_at + i * SECONDS.size)[0]
+        if flags & META_DELAY:
+            meta['delay'] = SECONDS.unpack_from(self._mm, self._delay_at + i * SECONDS.size)[0]
+        return action + (meta,)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._count))]
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError("action index out of range")
+        return self._decode(i, *RECORD.unpack_from(self._mm, self._records_at + i * RECORD.size))
+
+    def __iter__(self):
+        decode = self._decode
+        for first in range(0, self._count, self.BLOCK):
+            last = min(first + self.BLOCK, self._count)
+            block = self._mm[self._records_at + first * RECORD.size:self._records_at + last * RECORD.size]
+            for i, record in enumerate(RECORD.iter_unpack(block), first):
+                yield decode(i, *record)
+# ----------------------------------
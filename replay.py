@@ -0,0 +1,519 @@
+import time
+import threading
+from functools import partial
+from operator import itemgetter
+from backends import InputBackend, PyAutoGuiBackend, NullBackend
+from textentry import ENTRY_PASTE, ENTRY_BATCH, choose_entry, paste_text
+from screen import RegionProbe, WAIT_STABLE, wait_for_change, wait_for_stable
+from geometry import fit_to_screen, fit_stream
+
+# Control-flow actions, run by structure.StructuredProgram:
+# ('loop', count) ... ('end_loop',), ('call', path),
+# ('if_pixel', x, y, '#rrggbb', tolerance) ... [('else',) ...] ('end_if',)
+LOOP = 'loop'
+END_LOOP = 'end_loop'
+CALL = 'call'
+IF_PIXEL = 'if_pixel'
+ELSE = 'else'
+END_IF = 'end_if'
+CONTROL_KINDS = frozenset((LOOP, END_LOOP, CALL, IF_PIXEL, ELSE, END_IF))
+
+# How often a blocked worker wakes up to look at pause/abort requests
+POLL_INTERVAL = 0.02
+# Waits closer than this to their deadline spin instead of sleeping
+SPIN_WINDOW = 0.002
+# Text typed key by key goes out in chunks of about this many seconds,
+# so a long text can still be aborted between them
+KEYS_CHUNK_TIME = 0.25
+
+KEY_MAP = {
+    "Enter": "enter",
+    "Backspace": "backspace",
+    "Delete": "delete",
+    "Tab": "tab",
+    "Esc": "esc",
+    "Ctrl": "ctrl",
+    "Shift": "shift",
+    "Alt": "alt",
+    "Space": "space",
+    "F1": "f1",
+    "F2": "f2",
+    "F3": "f3",
+    "F4": "f4",
+    "F5": "f5",
+    "F6": "f6",
+    "F7": "f7",
+    "F8": "f8",
+    "F9": "f9",
+    "F10": "f10",
+    "F11": "f11",
+    "F12": "f12",
+    "Win": "win"
+}
+
+
+class ReplayAborted(Exception):
+    pass
+
+
+# --- Replay Control ---
+class ReplayControl:
+    """Pause/resume/abort flags shared between the GUI and the replay thread"""
+
+    def __init__(self):
+        self._running = threading.Event()
+        self._running.set()
+        self._abort = threading.Event()
+        # Plain flag the replay loop can test without a method call
+        self.interrupted = False
+        self.paused_total = 0.0
+        self._paused_at = None
+
+    def pause(self):
+        if self._paused_at is None:
+            self._paused_at = time.perf_counter()
+        self._running.clear()
+        self.interrupted = True
+
+    def resume(self):
+        if self._paused_at is not None:
+            self.paused_total += time.perf_counter() - self._paused_at
+            self._paused_at = None
+        self._running.set()
+        self.interrupted = self._abort.is_set()
+
+    def abort(self):
+        self._abort.set()
+        self._running.set()
+        self.interrupted = True
+
+    @property
+    def paused(self):
+        return not self._running.is_set()
+
+    @property
+    def aborted(self):
+        return self._abort.is_set()
+
+    def checkpoint(self):
+        """Block while paused; raise ReplayAborted once abort was requested"""
+        if not self._running.is_set():
+            while not self._running.wait(POLL_INTERVAL):
+                pass
+        if self._abort.is_set():
+            raise ReplayAborted()
+
+    def clock(self):
+        """perf_counter() minus the time spent paused, so deadlines survive a pause"""
+        paused_at = self._paused_at
+        if paused_at is not None:
+            return paused_at - self.paused_total
+        return time.perf_counter() - self.paused_total
+
+    def sleep_until(self, deadline):
+        """Sleep until clock() reaches `deadline`; the last moments are spun for precision"""
+        while True:
+            if self.interrupted:
+                self.checkpoint()
+            remaining = deadline - self.clock()
+            if remaining <= 0:
+                return
+            if remaining > SPIN_WINDOW:
+                if self._abort.wait(min(remaining - SPIN_WINDOW, POLL_INTERVAL)):
+                    raise ReplayAborted()
+            else:
+                time.sleep(0)
+
+    def sleep(self, seconds):
+        """Sleep that wakes up immediately on abort and stretches across a pause"""
+        deadline = time.perf_counter() + seconds
+        while True:
+            if self.paused:
+                # Time spent paused does not count against the delay
+                paused_at = time.perf_counter()
+                self.checkpoint()
+                deadline += time.perf_counter() - paused_at
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            if self._abort.wait(min(remaining, POLL_INTERVAL)):
+                raise ReplayAborted()
+        self.checkpoint()
+# ----------------------------------
+
+
+def resolve_key(key_name):
+    return KEY_MAP.get(key_name, key_name.lower())
+
+
+def split_chord(name):
+    """'Ctrl+Shift+S' -> ['Ctrl', 'Shift', 'S']; the key itself may be '+'"""
+    head, sep, key = name.rpartition('+')
+    if not sep:
+        return [name]
+    if not key:
+        key = '+'
+        head = head[:-1]
+    return (head.split('+') if head else []) + [key]
+
+
+def _type_text(backend, control, text, x, y, interval, entry):
+    # Recorded keystrokes carry no position; they go wherever the focus is
+    if x is not None:
+        backend.click(x, y)
+    if entry == ENTRY_PASTE:
+        paste_text(backend, control, text)
+        return
+    if entry == ENTRY_BATCH:
+        backend.write(text)
+        return
+    if not interval:
+        backend.write(text)
+        return
+    # The backend spaces the keys of a chunk itself, in one call
+    step = max(1, int(KEYS_CHUNK_TIME / interval))
+    for start in range(0, len(text), step):
+        if control.interrupted:
+            control.checkpoint()
+        backend.write(text[start:start + step], interval)
+
+
+# --- Compiler ---
+_kind = itemgetter(0)
+
+
+def _then_flush(call, flush):
+    call()
+    flush()
+
+
+def action_meta(action):
+    """Split off the optional trailing metadata dict: ('move', 1, 2, {'dt': 0.1})"""
+    if len(action) > 1 and type(action[-1]) is dict:
+        return action[:-1], action[-1]
+    return action, None
+
+
+def with_meta(action, **changes):
+    """Copy of `action` with metadata keys set (or removed, when given None)"""
+    action, meta = action_meta(action)
+    meta = dict(meta or {})
+    for key, value in changes.items():
+        if value is None:
+            meta.pop(key, None)
+        else:
+            meta[key] = value
+    return action + (meta,) if meta else action
+
+
+def _wait_step(control, get_probe, mode, region, hold, timeout, poll, baseline):
+    if mode == WAIT_STABLE:
+        wait_for_stable(get_probe(), control, region, hold, timeout, poll)
+    else:
+        wait_for_change(get_probe(), control, region, timeout, poll, baseline.pop('sample', None))
+
+
+def _sample_then(get_probe, region, baseline, call):
+    # Look at the region before the action that is expected to change it
+    baseline['sample'] = get_probe().sample(region)
+    if call is not None:
+        call()
+
+
+def iter_program(actions, delay, control, backend=None, type_interval=None, speed=1.0, probe=None):
+    """Turn recorded actions into (index, call, pause) steps, one at a time.
+
+    Dispatch on the action type, tuple unpacking and key-name lookups all
+    happen here once, so the replay loop only calls pre-bound functions.
+    Actions that send nothing (show_screen) produce no step and cost no
+    pause unless they carry a tuned 'delay'; then `call` is None.
+    `pause` is the time from this step to the next: the action's own tuned
+    'delay' when it has one, else the next action's recorded 'dt', else
+    `delay`; None after a wait_until (go on as soon as it returns). The pause between typed
+    characters defaults to the backend's own.
+    """
+    if backend is None:
+        backend = PyAutoGuiBackend()
+    probes = [probe]
+
+    def get_probe():
+        # Screen grabbing is only set up once a macro actually waits
+        if probes[0] is None:
+            probes[0] = RegionProbe()
+        return probes[0]
+
+    if type_interval is None:
+        type_interval = backend.type_interval
+    type_interval /= speed
+    needs_flush = type(backend).flush is not InputBackend.flush
+    flush = backend.flush
+    move, click, scroll = backend.move, backend.click, backend.scroll
+    move_duration = min(0.5, delay) / speed
+    # Shortcut names repeat; split and resolve each one once
+    chords = {}
+    prev = None
+    for i, action in enumerate(actions):
+        # action_meta(), inlined: this loop runs once per recorded step
+        if type(action[-1]) is dict and len(action) > 1:
+            meta = action[-1]
+            action = action[:-1]
+            gap = meta.get('dt')
+            own = meta.get('delay')
+            entry = meta.get('entry')
+        else:
+            gap = own = entry = None
+        act_type = action[0]
+        if act_type == 'move':
+            # A recorded path has its own timing; don't tween past the next point
+            duration = move_duration if gap is None else min(move_duration, gap / speed)
+            call = partial(move, action[1], action[2], duration)
+        elif act_type == 'click':
+            if len(action) > 3:
+                call = partial(click, action[1], action[2], button=action[3])
+            else:
+                call = partial(click, action[1], action[2])
+        elif act_type == 'scroll':
+            call = partial(scroll, action[1], action[2], action[3])
+        elif act_type == 'shortcut':
+            keys = chords.get(action[1])
+            if keys is None:
+                keys = chords[action[1]] = [resolve_key(k) for k in split_chord(action[1])]
+            if len(keys) > 1:
+                call = partial(backend.hotkey, *keys)
+            else:
+                call = partial(backend.press, keys[0])
+        elif act_type == 'type':
+            if len(action) > 3:
+                x, y = action[2], action[3]
+            else:
+                x = y = None
+            if entry is None:
+                entry = choose_entry(action[1], backend)
+            call = partial(_type_text, backend, control, action[1], x, y, type_interval, entry)
+        elif act_type == 'wait_until':
+            _, mode, x, y, w, h, hold, timeout, poll = action
+            region = (x, y, w, h)
+            baseline = {}
+            call = partial(_wait_step, control, get_probe, mode, region, hold, timeout, poll, baseline)
+            if prev is not None:
+                prev_call = prev[1]
+                if mode != WAIT_STABLE:
+                    prev_call = partial(_sample_then, get_probe, region, baseline, prev_call)
+                # No fixed delay in front of a wait; the wait is the delay
+                prev = (prev[0], prev_call, 0.0, True)
+        elif act_type in CONTROL_KINDS:
+            raise ValueError(f"Action {i + 1} ({act_type}) needs a compiled replay, not a streamed one")
+        elif own is None:
+            continue
+        else:
+            call = None
+        if needs_flush and call is not None and act_type != 'wait_until':
+            call = partial(_then_flush, call, flush)
+        if prev is not None:
+            yield (prev[0], prev[1], prev[2] if prev[3] or gap is None else gap)
+        if act_type == 'wait_until':
+            prev = (i, call, None, True)
+        elif own is not None:
+            prev = (i, call, own, True)
+        else:
+            prev = (i, call, delay, False)
+    if prev is not None:
+        yield (prev[0], prev[1], delay if prev[2] is None else prev[2])
+
+
+def compile_actions(actions, delay, control, backend=None, type_interval=None, speed=1.0, probe=None,
+                    base_dir=None, fit=True):
+    """The whole program, built once and reused for every run.
+
+    A list of steps; for macros with loops, calls or conditions an
+    iterable that walks the structure instead (see structure.py).
+    Relative sub-macro paths are looked up in `base_dir`. With `fit`,
+    coordinates recorded under a 'show_screen' are mapped to the
+    backend's current screen size (see geometry.py).
+    """
+    if backend is None:
+        backend = PyAutoGuiBackend()
+    size = backend.screen_size() if fit else None
+    if size is not None:
+        actions = fit_to_screen(actions, size)
+    if not CONTROL_KINDS.isdisjoint(map(_kind, actions)):
+        from structure import StructuredProgram
+        return StructuredProgram(actions, delay, control, backend, type_interval, speed, probe, base_dir,
+                                 size)
+    return list(iter_program(actions, delay, control, backend, type_interval, speed, probe))
+# ----------------------------------
+
+
+# --- Scheduler ---
+MIN_SPEED = 0.25
+MAX_SPEED = 10.0
+# A step that overruns its slot by more than this keeps its full pause
+# afterwards instead of the following steps racing to catch up
+RESYNC_AFTER = 0.25
+
+
+def _check_speed(speed):
+    if not MIN_SPEED <= speed <= MAX_SPEED:
+        raise ValueError(f"Replay speed must be between {MIN_SPEED}x and {MAX_SPEED}x")
+
+
+def _play(steps, run, control, start, deadline, scale, on_progress, lateness):
+    """Run one pass over `steps` against absolute deadlines; returns the next deadline.
+
+    Every step is due at the previous deadline plus its pause, all measured
+    from the start of the replay, so sleep overshoot and the time the
+    calls themselves take are absorbed instead of adding up.
+    """
+    clock = control.clock
+    # Only look at the clock when a step could be early or someone wants the time
+    timed = lateness is not None or on_progress is not None
+    now = clock()
+    for index, call, pause in steps:
+        if control.interrupted:
+            control.checkpoint()
+        if deadline > now or timed:
+            now = clock()
+            if now < deadline:
+                control.sleep_until(deadline)
+                now = clock()
+        if lateness is not None:
+            lateness.append(now - deadline)
+        if on_progress is not None:
+            on_progress(run, index, now - start)
+        if call is not None:
+            call()
+        if pause:
+            deadline += pause * scale
+            end = clock()
+            if end - deadline > RESYNC_AFTER:
+                deadline = end + pause * scale
+        elif pause is None:
+            # The step waited for the screen itself; carry on from here
+            deadline = now = clock()
+    return deadline
+
+
+def _play_traced(steps, run, control, start, deadline, scale, on_progress, lateness, trace):
+    """_play, also timing every step into `trace`.
+
+    A separate loop so that replays without a trace don't pay for it.
+    """
+    clock = control.clock
+    record = trace.records.append
+    for index, call, pause in steps:
+        if control.interrupted:
+            control.checkpoint()
+        now = clock()
+        slept = 0.0
+        if now < deadline:
+            control.sleep_until(deadline)
+            woke = clock()
+            slept = woke - now
+            now = woke
+        if lateness is not None:
+            lateness.append(now - deadline)
+        if on_progress is not None:
+            on_progress(run, index, now - start)
+        if call is not None:
+            call()
+        end = clock()
+        record((run, index, deadline - start, now - start, end - now, slept))
+        if pause:
+            deadline += pause * scale
+            if end - deadline > RESYNC_AFTER:
+                deadline = end + pause * scale
+        elif pause is None:
+            deadline = end
+    return deadline
+
+
+def _player(trace):
+    if trace is None:
+        return _play
+    return partial(_play_traced, trace=trace)
+
+
+def _note_kinds(actions, kinds):
+    # Streamed actions are never held in a list; remember only their types
+    for action in actions:
+        kinds.append(action[0])
+        yield action
+
+
+def run_program(program, replay_count, control, on_progress=None, speed=1.0, lateness=None,
+                trace=None):
+    """Execute a compiled program `replay_count` times and return the elapsed seconds.
+
+    Pauses are divided by `speed`. When `lateness` is a list, how late
+    each step started (seconds) is appended to it. A tracing.ReplayTrace
+    as `trace` gets the timings of every step.
+    """
+    _check_speed(speed)
+    scale = 1.0 / speed
+    play = _player(trace)
+    start = deadline = control.clock()
+    for run in range(replay_count):
+        deadline = play(program, run, control, start, deadline, scale, on_progress, lateness)
+    return control.clock() - start
+# ----------------------------------
+
+
+def run_actions(actions, replay_count, delay, control, on_progress=None, backend=None,
+                speed=1.0, lateness=None, probe=None, trace=None, base_dir=None, fit=True):
+    """Compile `actions` once and replay them `replay_count` times"""
+    program = compile_actions(actions, delay, control, backend, speed=speed, probe=probe,
+                              base_dir=base_dir, fit=fit)
+    if trace is not None:
+        trace.kinds = [action[0] for action in actions]
+    return run_program(program, replay_count, control, on_progress, speed, lateness, trace)
+
+
+def run_stream(open_actions, replay_count, delay, control, on_progress=None, backend=None,
+               speed=1.0, lateness=None, probe=None, trace=None, fit=True):
+    """Replay without holding the macro in memory.
+
+    `open_actions` is called at the start of every run and must return a
+    fresh iterable of actions, e.g. ``lambda: recfile.iter_actions(path)``.
+    """
+    _check_speed(speed)
+    if backend is None:
+        backend = PyAutoGuiBackend()
+    scale = 1.0 / speed
+    play = _player(trace)
+    size = backend.screen_size() if fit else None
+    start = deadline = control.clock()
+    for run in range(replay_count):
+        actions = open_actions()
+        if size is not None:
+            actions = fit_stream(actions, size)
+        if trace is not None and run == 0:
+            trace.kinds = []
+            actions = _note_kinds(actions, trace.kinds)
+        steps = iter_program(actions, delay, control, backend, speed=speed, probe=probe)
+        deadline = play(steps, run, control, start, deadline, scale, on_progress, lateness)
+    return control.clock() - start
+
+
+def total_pause(actions, delay):
+    """Seconds one run spends in pauses between steps, as iter_program would schedule them.
+
+    Loop bodies count once and both branches of a condition count.
+    """
+    actions = [action for action in actions if action[0] not in CONTROL_KINDS]
+    program = iter_program(actions, delay, ReplayControl(), NullBackend())
+    return sum(pause for _, _, pause in program if pause)
+
+
+def lateness_summary(lateness):
+    """count / mean / p50 / p95 / max of per-step lateness, in seconds"""
+    if not lateness:
+        return {'count': 0, 'mean': 0.0, 'p50': 0.0, 'p95': 0.0, 'max': 0.0}
+    values = sorted(lateness)
+    n = len(values)
+    return {
+        'count': n,
+        'mean': sum(values) / n,
+        'p50': values[(n - 1) // 2],
+        'p95': values[min(n - 1, int(n * 0.95))],
+        'max': values[-1],
+    }
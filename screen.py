@@ -0,0 +1,116 @@
+import hashlib
+
+# NumPy takes longer to import than the rest of the replay engine together;
+# it is loaded with the first probe. None when it is not installed.
+numpy = None
+_numpy_tried = False
+
+# Region grabs are shrunk by this factor before comparing
+DEFAULT_SCALE = 4
+# Mean grey-level difference (0-255) below which two samples count as equal;
+# absorbs anti-aliasing noise and a blinking caret
+DEFAULT_DIFF_TOLERANCE = 1.5
+DEFAULT_POLL = 0.05
+DEFAULT_TIMEOUT = 10.0
+
+WAIT_CHANGE = 'change'
+WAIT_STABLE = 'stable'
+
+
+class WaitTimeout(Exception):
+    pass
+
+
+def load_numpy():
+    global numpy, _numpy_tried
+    if not _numpy_tried:
+        _numpy_tried = True
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+    return numpy
+
+
+def _pyautogui_grab(region):
+    import pyautogui
+    return pyautogui.screenshot(region=region)
+
+
+# --- Region Probe ---
+class RegionProbe:
+    """Takes small greyscale samples of a screen region and compares them.
+
+    With NumPy a sample is a uint8 array and two samples are equal when
+    their mean difference is within `tolerance`; without it a sample is a
+    digest of the pixels and only exact matches count.
+    """
+
+    def __init__(self, grab=None, scale=DEFAULT_SCALE, tolerance=DEFAULT_DIFF_TOLERANCE):
+        load_numpy()
+        self.grab = grab or _pyautogui_grab
+        self.scale = scale
+        self.tolerance = tolerance
+
+    def sample(self, region):
+        image = self.grab(region)
+        if self.scale > 1:
+            image = image.reduce(self.scale)
+        image = image.convert('L')
+        if numpy is not None:
+            return numpy.asarray(image)
+        return hashlib.blake2b(image.tobytes(), digest_size=16).digest()
+
+    def same(self, a, b):
+        if numpy is None:
+            return a == b
+        if a.shape != b.shape:
+            return False
+        diff = numpy.abs(a.astype(numpy.int16) - b)
+        return float(diff.mean()) <= self.tolerance
+
+
+def parse_color(text):
+    """'#rrggbb' -> (r, g, b)"""
+    text = text.lstrip('#')
+    if len(text) != 6:
+        raise ValueError(f"Not a #rrggbb colour: {text!r}")
+    return tuple(int(text[i:i + 2], 16) for i in (0, 2, 4))
+
+
+def pixel_matches(probe, x, y, rgb, tolerance):
+    """Whether the pixel at (x, y) is `rgb`, each channel within `tolerance`"""
+    pixel = probe.grab((x, y, 1, 1)).convert('RGB').getpixel((0, 0))
+    return max(abs(a - b) for a, b in zip(pixel, rgb)) <= tolerance
+
+
+def wait_for_change(probe, control, region, timeout=DEFAULT_TIMEOUT, poll=DEFAULT_POLL, base=None):
+    """Return the seconds it took for `region` to differ from `base` (how it looked on entry)"""
+    start = control.clock()
+    if base is None:
+        base = probe.sample(region)
+    while True:
+        if not probe.same(base, probe.sample(region)):
+            return control.clock() - start
+        if control.clock() - start >= timeout:
+            raise WaitTimeout(f"Screen region {region} did not change within {timeout:g} s")
+        control.sleep(poll)
+
+
+def wait_for_stable(probe, control, region, hold, timeout=DEFAULT_TIMEOUT, poll=DEFAULT_POLL):
+    """Return once `region` has not changed for `hold` seconds"""
+    start = control.clock()
+    last = probe.sample(region)
+    since = start
+    while True:
+        control.sleep(poll)
+        current = probe.sample(region)
+        now = control.clock()
+        if not probe.same(last, current):
+            last = current
+            since = now
+        elif now - since >= hold:
+            return now - start
+        if now - start >= timeout:
+            raise WaitTimeout(f"Screen region {region} did not settle within {timeout:g} s")
+# ----------------------------------
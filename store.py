@@ -0,0 +1,375 @@
+from array import array
+from recfile import (OP_MOVE, OP_CLICK, OP_SHORTCUT, OP_SHOW_SCREEN, OP_TYPE, OP_TEXT, OP_SCROLL,
+                     BUTTON_CODES, BUTTON_NAMES, split_meta)
+
+# Actions that don't fit the columns are kept as the original tuple
+OP_OBJECT = 255
+
+_XY_KINDS = {'move': OP_MOVE, 'click': OP_CLICK, 'show_screen': OP_SHOW_SCREEN}
+_INT_MIN = -2**31
+_INT_MAX = 2**31 - 1
+# Empty slot of the dt / delay columns
+_NONE = float('nan')
+# Rows removed or overwritten before the string pool and the object list
+# are checked for entries nothing refers to any more
+COMPACT_MIN = 4096
+
+
+def _is_int32(value):
+    return type(value) is int and _INT_MIN <= value <= _INT_MAX
+
+
+# --- Action Store ---
+class ActionStore:
+    """Column-oriented list of actions.
+
+    Each action takes one byte of opcode, two int32 coordinates and one
+    int32 index into a shared string pool (text of 'type', key name of
+    'shortcut'), instead of a tuple of Python objects. Recorded 'dt' and
+    tuned 'delay' metadata go into columns of doubles, made the first time
+    a row needs them. Indexing still returns the usual tuples, e.g.
+    ('type', text, x, y). Appending and popping at the end are O(1);
+    insert/delete in the middle is a single memmove per column.
+
+    A store made with over() reads its actions from a file instead, and
+    decodes them into the columns only when it is first changed.
+    """
+
+    def __init__(self, actions=()):
+        self._op = array('B')
+        self._x = array('i')
+        self._y = array('i')
+        self._s = array('i')
+        # NaN where a row has no such key; None until some row has one
+        self._dt = None
+        self._delay = None
+        self._strings = []
+        self._string_ids = {}
+        self._objects = []
+        # Rows removed or overwritten since the last compaction; each may
+        # have left a pool entry or an object behind
+        self._stale = 0
+        # Read-only sequence (a recfile.BinaryRecFile) the actions come
+        # from until the first change; owned by this store
+        self._source = None
+        if actions:
+            self.extend(actions)
+
+    @classmethod
+    def over(cls, source):
+        """A store that reads its actions straight from `source` until it is changed"""
+        store = cls()
+        store._source = source
+        return store
+
+    @property
+    def source(self):
+        return self._source
+
+    def _materialize(self):
+        source = self._source
+        self._source = None
+        self.extend(source)
+
+    def detach(self):
+        """Decode every action from the source into the store and close the source"""
+        source = self._source
+        if source is not None:
+            self._materialize()
+            source.close()
+
+    def _intern(self, text):
+        idx = self._string_ids.get(text)
+        if idx is None:
+            idx = self._string_ids[text] = len(self._strings)
+            self._strings.append(text)
+        return idx
+
+    def _encode(self, action):
+        """(op, x, y, s, dt, delay) for one row; dt and delay are NaN when absent"""
+        dt = delay = _NONE
+        plain = action
+        if type(action[-1]) is dict and len(action) > 1:
+            split = split_meta(action)
+            if split is None:
+                return self._object(action)
+            plain, dt, delay = split
+            if dt is None:
+                dt = _NONE
+            elif self._dt is None:
+                self._dt = array('d', [_NONE]) * len(self._op)
+            if delay is None:
+                delay = _NONE
+            elif self._delay is None:
+                self._delay = array('d', [_NONE]) * len(self._op)
+        act_type = plain[0]
+        n = len(plain)
+        if n >= 3 and _is_int32(plain[1]) and _is_int32(plain[2]):
+            op = _XY_KINDS.get(act_type)
+            if op is not None and n == 3:
+                return op, plain[1], plain[2], 0, dt, delay
+            if n == 4 and act_type == 'click' and plain[3] in BUTTON_CODES:
+                return OP_CLICK, plain[1], plain[2], BUTTON_CODES[plain[3]], dt, delay
+            if n == 4 and act_type == 'scroll' and _is_int32(plain[3]):
+                return OP_SCROLL, plain[1], plain[2], plain[3], dt, delay
+        elif act_type == 'type' and n >= 2 and isinstance(plain[1], str):
+            if n == 4 and _is_int32(plain[2]) and _is_int32(plain[3]):
+                return OP_TYPE, plain[2], plain[3], self._intern(plain[1]), dt, delay
+            if n == 2:
+                return OP_TEXT, 0, 0, self._intern(plain[1]), dt, delay
+        elif act_type == 'shortcut' and n == 2 and isinstance(plain[1], str):
+            return OP_SHORTCUT, 0, 0, self._intern(plain[1]), dt, delay
+        return self._object(action)
+
+    def _object(self, action):
+        self._objects.append(tuple(action))
+        return OP_OBJECT, 0, 0, len(self._objects) - 1, _NONE, _NONE
+
+    def _decode(self, op, x, y, s):
+        if op == OP_MOVE:
+            return ('move', x, y)
+        if op == OP_CLICK:
+            return ('click', x, y, BUTTON_NAMES[s]) if s else ('click', x, y)
+        if op == OP_TYPE:
+            return ('type', self._strings[s], x, y)
+        if op == OP_TEXT:
+            return ('type', self._strings[s])
+        if op == OP_SHORTCUT:
+            return ('shortcut', self._strings[s])
+        if op == OP_SHOW_SCREEN:
+            return ('show_screen', x, y)
+        if op == OP_SCROLL:
+            return ('scroll', x, y, s)
+        return self._objects[s]
+
+    def _with_meta(self, action, i):
+        meta = None
+        if self._dt is not None:
+            dt = self._dt[i]
+            if dt == dt:
+                meta = {'dt': dt}
+        if self._delay is not None:
+            delay = self._delay[i]
+            if delay == delay:
+                if meta is None:
+                    meta = {}
+                meta['delay'] = delay
+        return action if meta is None else action + (meta,)
+
+    def _columns(self):
+        columns = [self._op, self._x, self._y, self._s]
+        if self._dt is not None:
+            columns.append(self._dt)
+        if self._delay is not None:
+            columns.append(self._delay)
+        return columns
+
+    def __len__(self):
+        if self._source is not None:
+            return len(self._source)
+        return len(self._op)
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return ActionView(self, range(len(self))[i])
+        if self._source is not None:
+            return self._source[i]
+        action = self._decode(self._op[i], self._x[i], self._y[i], self._s[i])
+        if self._dt is None and self._delay is None:
+            return action
+        return self._with_meta(action, i)
+
+    def __setitem__(self, i, action):
+        if self._source is not None:
+            self._materialize()
+        op, x, y, s, dt, delay = self._encode(action)
+        self._op[i] = op
+        self._x[i] = x
+        self._y[i] = y
+        self._s[i] = s
+        if self._dt is not None:
+            self._dt[i] = dt
+        if self._delay is not None:
+            self._delay[i] = delay
+        self._forget(1)
+
+    def __delitem__(self, i):
+        if self._source is not None:
+            self._materialize()
+        count = len(range(len(self._op))[i]) if isinstance(i, slice) else 1
+        for col in self._columns():
+            del col[i]
+        self._forget(count)
+
+    def _forget(self, rows):
+        # Compacting costs one pass over the rows, so it waits until about
+        # half of the pooled entries could be unused: amortized O(1)
+        self._stale += rows
+        if self._stale >= COMPACT_MIN and self._stale * 2 >= len(self._strings) + len(self._objects):
+            self.compact()
+
+    def compact(self):
+        """Drop pooled strings and objects no row refers to any more"""
+        strings = []
+        string_ids = {}
+        objects = []
+        old_strings = self._strings
+        old_objects = self._objects
+        col = self._s
+        for i, op in enumerate(self._op):
+            if op == OP_OBJECT:
+                objects.append(old_objects[col[i]])
+                col[i] = len(objects) - 1
+            elif op == OP_TYPE or op == OP_TEXT or op == OP_SHORTCUT:
+                text = old_strings[col[i]]
+                idx = string_ids.get(text)
+                if idx is None:
+                    idx = string_ids[text] = len(strings)
+                    strings.append(text)
+                col[i] = idx
+        self._strings = strings
+        self._string_ids = string_ids
+        self._objects = objects
+        self._stale = 0
+
+    def __iter__(self):
+        if self._source is not None:
+            yield from self._source
+            return
+        decode = self._decode
+        if self._dt is None and self._delay is None:
+            for op, x, y, s in zip(self._op, self._x, self._y, self._s):
+                yield decode(op, x, y, s)
+            return
+        with_meta = self._with_meta
+        for i, (op, x, y, s) in enumerate(zip(self._op, self._x, self._y, self._s)):
+            yield with_meta(decode(op, x, y, s), i)
+
+    def __repr__(self):
+        return f"ActionStore({len(self)} actions)"
+
+    def append(self, action):
+        if self._source is not None:
+            self._materialize()
+        op, x, y, s, dt, delay = self._encode(action)
+        self._op.append(op)
+        self._x.append(x)
+        self._y.append(y)
+        self._s.append(s)
+        if self._dt is not None:
+            self._dt.append(dt)
+        if self._delay is not None:
+            self._delay.append(delay)
+
+    def extend(self, actions):
+        for action in actions:
+            self.append(action)
+
+    def insert(self, i, action):
+        if self._source is not None:
+            self._materialize()
+        op, x, y, s, dt, delay = self._encode(action)
+        self._op.insert(i, op)
+        self._x.insert(i, x)
+        self._y.insert(i, y)
+        self._s.insert(i, s)
+        if self._dt is not None:
+            self._dt.insert(i, dt)
+        if self._delay is not None:
+            self._delay.insert(i, delay)
+
+    def insert_many(self, i, actions):
+        """Insert `actions` before index `i`, moving the rows after it only once"""
+        if self._source is not None:
+            self._materialize()
+        rows = [self._encode(action) for action in actions]
+        if not rows:
+            return
+        ops, xs, ys, ss, dts, delays = zip(*rows)
+        self._op[i:i] = array('B', ops)
+        self._x[i:i] = array('i', xs)
+        self._y[i:i] = array('i', ys)
+        self._s[i:i] = array('i', ss)
+        # _encode() creates these at the old length, before the new rows go in
+        if self._dt is not None:
+            self._dt[i:i] = array('d', dts)
+        if self._delay is not None:
+            self._delay[i:i] = array('d', delays)
+
+    def pop(self, i=-1):
+        action = self[i]
+        del self[i]
+        return action
+
+    def move(self, src, dst):
+        """Move the action at `src` so that it ends up at index `dst`"""
+        if src == dst:
+            return
+        if self._source is not None:
+            self._materialize()
+        columns = self._columns()
+        if abs(src - dst) == 1:
+            for col in columns:
+                col[src], col[dst] = col[dst], col[src]
+            return
+        for col in columns:
+            value = col.pop(src)
+            col.insert(dst, value)
+
+    def clear(self):
+        source = self._source
+        self.__init__()
+        if source is not None:
+            source.close()
+
+    def copy(self):
+        if self._source is not None:
+            # The source has one owner; the copy gets the actions themselves
+            return ActionStore(self._source)
+        other = ActionStore()
+        other._op = array('B', self._op)
+        other._x = array('i', self._x)
+        other._y = array('i', self._y)
+        other._s = array('i', self._s)
+        if self._dt is not None:
+            other._dt = array('d', self._dt)
+        if self._delay is not None:
+            other._delay = array('d', self._delay)
+        other._strings = list(self._strings)
+        other._string_ids = dict(self._string_ids)
+        other._objects = list(self._objects)
+        other._stale = self._stale
+        return other
+
+    def nbytes(self):
+        """Approximate memory held: the columns plus the pooled text"""
+        if self._source is not None:
+            # A mapped file's pages belong to the OS page cache
+            return 0
+        columns = sum(col.itemsize * len(col) for col in self._columns())
+        return columns + sum(len(s) for s in self._strings) + 64 * len(self._objects)
+
+
+class ActionView:
+    """Live, read-only window onto part of an ActionStore; slicing makes no copy"""
+
+    def __init__(self, store, indices):
+        self.store = store
+        self.indices = indices
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return ActionView(self.store, self.indices[i])
+        return self.store[self.indices[i]]
+
+    def __iter__(self):
+        store = self.store
+        for i in self.indices:
+            yield store[i]
+# ----------------------------------
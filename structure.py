@@ -0,0 +1,186 @@
+import os
+from collections import OrderedDict
+from functools import partial
+import recfile
+from replay import (LOOP, END_LOOP, IF_PIXEL, ELSE, END_IF, CONTROL_KINDS,
+                    action_meta, iter_program)
+from screen import RegionProbe, parse_color, pixel_matches
+from optimize import optimize
+from geometry import fit_to_screen
+
+# Sub-macros stay parsed between replays; reloaded when the file changes
+CALL_CACHE_SIZE = 32
+_call_cache = OrderedDict()
+
+
+# --- Parsing ---
+def parse(actions):
+    """Nest the flat list of actions at its control markers.
+
+    Returns a list of nodes:
+      ('flat', [(index, action), ...])   plain actions, in order
+      ('loop', index, count, body)
+      ('if', index, (x, y, rgb, tolerance), then, otherwise)
+      ('call', index, path)
+    where `index` is the marker's position in `actions`. Raises
+    ValueError naming the action when the markers don't pair up.
+    """
+    root = []
+    # (kind, index, node list being filled, node)
+    stack = [(None, None, root, None)]
+    for i, action in enumerate(actions):
+        core, _ = action_meta(action)
+        kind = core[0]
+        body = stack[-1][2]
+        if kind not in CONTROL_KINDS:
+            if body and body[-1][0] == 'flat':
+                body[-1][1].append((i, action))
+            else:
+                body.append(('flat', [(i, action)]))
+        elif kind == LOOP:
+            count = int(core[1])
+            if count < 0:
+                raise ValueError(f"Action {i + 1}: loop count must not be negative")
+            node = ('loop', i, count, [])
+            body.append(node)
+            stack.append((LOOP, i, node[3], node))
+        elif kind == IF_PIXEL:
+            _, x, y, color, tolerance = core
+            try:
+                rgb = parse_color(color)
+            except ValueError as e:
+                raise ValueError(f"Action {i + 1}: {e}") from None
+            node = ('if', i, (x, y, rgb, tolerance), [], [])
+            body.append(node)
+            stack.append((IF_PIXEL, i, node[3], node))
+        elif kind == ELSE:
+            if stack[-1][0] != IF_PIXEL:
+                raise ValueError(f"Action {i + 1}: 'else' without an open condition")
+            node = stack[-1][3]
+            stack[-1] = (ELSE, stack[-1][1], node[4], node)
+        elif kind == END_IF:
+            if stack[-1][0] not in (IF_PIXEL, ELSE):
+                raise ValueError(f"Action {i + 1}: 'end_if' without an open condition")
+            stack.pop()
+        elif kind == END_LOOP:
+            if stack[-1][0] != LOOP:
+                raise ValueError(f"Action {i + 1}: 'end_loop' without an open loop")
+            stack.pop()
+        else:
+            body.append(('call', i, core[1]))
+    if len(stack) > 1:
+        kind, index = stack[-1][:2]
+        raise ValueError(f"Action {index + 1}: '{kind}' is never closed")
+    return root
+
+
+def load_called(path):
+    """The optimized actions of a sub-macro file, cached until the file changes"""
+    st = os.stat(path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _call_cache.get(path)
+    if cached is not None and cached[0] == stamp:
+        _call_cache.move_to_end(path)
+        return cached[1]
+    actions, _ = optimize(recfile.load_actions(path))
+    _call_cache[path] = (stamp, actions)
+    if len(_call_cache) > CALL_CACHE_SIZE:
+        _call_cache.popitem(last=False)
+    return actions
+# ----------------------------------
+
+
+# --- Structured Program ---
+def _test_pixel(get_probe, x, y, rgb, tolerance, cell):
+    cell[0] = pixel_matches(get_probe(), x, y, rgb, tolerance)
+
+
+class StructuredProgram:
+    """A compiled macro with loops, calls and conditions, walked on every run.
+
+    Each stretch of plain actions is compiled once by iter_program; loops
+    replay their compiled body instead of copying it and sub-macros are
+    compiled once per call site. Iterating yields (index, call, pause)
+    steps like a compiled list does. A condition is a step of its own:
+    it samples the pixel when the scheduler runs it, and the branch is
+    chosen only when the next step is asked for. Steps of a sub-macro
+    report the index of the 'call' action. With `size`, sub-macros are
+    fitted to that screen size like the caller was.
+    """
+
+    def __init__(self, actions, delay, control, backend, type_interval=None, speed=1.0,
+                 probe=None, base_dir=None, size=None):
+        self.delay = delay
+        self.size = size
+        self.control = control
+        self.backend = backend
+        self.type_interval = type_interval
+        self.speed = speed
+        self._probes = [probe]
+        self.nodes = self._compile(parse(actions), base_dir, None, [])
+
+    def _get_probe(self):
+        if self._probes[0] is None:
+            self._probes[0] = RegionProbe()
+        return self._probes[0]
+
+    def _compile(self, nodes, base_dir, at, calls):
+        """Compiled nodes; `at` replaces every index (steps of a sub-macro),
+        `calls` are the files being compiled, to catch recursion"""
+        compiled = []
+        for node in nodes:
+            kind = node[0]
+            if kind == 'flat':
+                indices = [i for i, _ in node[1]]
+                actions = [action for _, action in node[1]]
+                probe = None
+                if any(action[0] == 'wait_until' for action in actions):
+                    probe = self._get_probe()
+                steps = iter_program(actions, self.delay, self.control, self.backend,
+                                     self.type_interval, self.speed, probe)
+                compiled.append(('steps', [(indices[j] if at is None else at, call, pause)
+                                           for j, call, pause in steps]))
+            elif kind == 'loop':
+                compiled.append(('loop', node[2], self._compile(node[3], base_dir, at, calls)))
+            elif kind == 'if':
+                x, y, rgb, tolerance = node[2]
+                cell = [False]
+                test = partial(_test_pixel, self._get_probe, x, y, rgb, tolerance, cell)
+                # pause None: what follows is timed from when the test returned
+                compiled.append(('if', (node[1] if at is None else at, test, None), cell,
+                                 self._compile(node[3], base_dir, at, calls),
+                                 self._compile(node[4], base_dir, at, calls)))
+            else:
+                path = node[2]
+                if base_dir is not None and not os.path.isabs(path):
+                    path = os.path.join(base_dir, path)
+                path = os.path.abspath(path)
+                if path in calls:
+                    raise ValueError(f"Action {node[1] + 1}: {os.path.basename(path)} calls itself")
+                try:
+                    actions = load_called(path)
+                    if self.size is not None:
+                        actions = fit_to_screen(actions, self.size)
+                    nodes = parse(actions)
+                except (OSError, ValueError) as e:
+                    raise ValueError(f"Action {node[1] + 1}: {e}") from None
+                compiled.extend(self._compile(nodes, os.path.dirname(path),
+                                              node[1] if at is None else at, calls + [path]))
+        return compiled
+
+    def __iter__(self):
+        return self._expand(self.nodes)
+
+    def _expand(self, nodes):
+        for node in nodes:
+            kind = node[0]
+            if kind == 'steps':
+                yield from node[1]
+            elif kind == 'loop':
+                for _ in range(node[1]):
+                    yield from self._expand(node[2])
+            else:
+                # The scheduler runs the test before asking for the next step
+                yield node[1]
+                yield from self._expand(node[3] if node[2][0] else node[4])
+# ----------------------------------
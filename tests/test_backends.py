@@ -0,0 +1,139 @@
+import sys
+import time
+import pytest
+from backends import (RecordingBackend, NullBackend, XTestBackend, XK_SHIFT_L, XK_RETURN,
+                      create_backend)
+from replay import ReplayControl, compile_actions, run_actions, run_program, split_chord
+
+
+def test_recording_backend_keeps_every_event_in_order():
+    backend = RecordingBackend(screen=(800, 600))
+    backend.move(1, 2, 0.5)
+    backend.click(3, 4, 'right')
+    backend.scroll(5, 6, -2)
+    backend.write("سلام", 0.1)
+    backend.press('enter')
+    backend.hotkey('ctrl', 's')
+    assert [event[1:] for event in backend.events] == [
+        ('move', (1, 2)), ('click', (3, 4, 'right')), ('scroll', (5, 6, -2)), ('write', ("سلام",)),
+        ('press', ('enter',)), ('hotkey', ('ctrl', 's'))]
+    stamps = backend.timestamps()
+    assert stamps == sorted(stamps) and stamps[0] >= 0
+    assert len(backend.timestamps('click')) == 1
+    assert backend.screen_size() == (800, 600)
+    backend.reset()
+    assert backend.events == []
+
+
+def test_null_backend_throughput():
+    program = compile_actions([('move', i % 100, 0) for i in range(50000)], 0.0,
+                              ReplayControl(), NullBackend())
+    start = time.perf_counter()
+    run_program(program, 2, ReplayControl())
+    assert time.perf_counter() - start < 2.0
+
+
+def test_shortcuts_become_hotkeys():
+    backend = RecordingBackend()
+    run_actions([('shortcut', 'Ctrl+Shift+S'), ('shortcut', 'Enter'), ('shortcut', 'Ctrl++')],
+                1, 0.0, ReplayControl(), backend=backend)
+    assert [(name, args) for _, name, args in backend.events] == [
+        ('hotkey', ('ctrl', 'shift', 's')), ('press', ('enter',)), ('hotkey', ('ctrl', '+'))]
+    assert split_chord('+') == ['+']
+
+
+def test_backends_are_created_by_name():
+    assert isinstance(create_backend("null"), NullBackend)
+    assert create_backend("recording", screen=(1, 2)).screen_size() == (1, 2)
+    with pytest.raises(ValueError, match="Unknown input backend: nope"):
+        create_backend("nope")
+
+
+class FakePyAutoGui:
+    PAUSE = 0.1
+    FAILSAFE = True
+
+    def __init__(self):
+        self.calls = []
+
+    def size(self):
+        return 800, 600
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.calls.append((name, args, kwargs))
+
+
+def test_pyautogui_pause_is_per_backend(monkeypatch):
+    import backends
+    fake = FakePyAutoGui()
+    monkeypatch.setitem(sys.modules, 'pyautogui', fake)
+    slept = []
+    monkeypatch.setattr(backends.time, 'sleep', slept.append)
+    default, quick = backends.PyAutoGuiBackend(), backends.PyAutoGuiBackend(pause=0.0)
+    assert (default.pause, quick.pause, fake.PAUSE) == (0.1, 0.0, 0.1)
+    run_actions([('click', 1, 2), ('shortcut', 'Enter')], 1, 0.0, ReplayControl(), backend=default)
+    # pyautogui's own sleep is switched off; the backend sleeps once per action
+    assert [kwargs for _, _, kwargs in fake.calls] == [{'_pause': False}] * 2
+    assert slept == [0.1, 0.1]
+    quick.flush()
+    assert slept == [0.1, 0.1]
+
+
+class FakeX:
+    """Just enough of libX11 / libXtst to watch which keycodes go out"""
+
+    def __init__(self):
+        self.keys = []
+        self.bound = {}
+
+    def XTestFakeKeyEvent(self, dpy, code, down, delay):
+        self.keys.append((code, bool(down)))
+
+    def XChangeKeyboardMapping(self, dpy, code, per_code, syms, count):
+        self.bound[code] = syms[0]
+
+    def XSync(self, dpy, discard):
+        pass
+
+    def XFlush(self, dpy):
+        pass
+
+    def XStringToKeysym(self, name):
+        return {b'Return': XK_RETURN}.get(name, 0)
+
+    def XKeysymToKeycode(self, dpy, keysym):
+        return {XK_RETURN: 36}.get(keysym, 0)
+
+
+def xtest_backend(keymap, scratch):
+    backend = XTestBackend.__new__(XTestBackend)
+    backend.x11 = backend.xtst = FakeX()
+    backend.dpy = 1
+    backend.click_hold = backend.key_hold = 0.0
+    backend._key_cache = {}
+    backend._char_cache = {}
+    backend._scratch_codes = list(scratch)
+    backend._scratch_next = 0
+    backend._scratch_used = {}
+    backend._keymap = dict(keymap)
+    backend.shift_code = backend._keymap.get(XK_SHIFT_L, (0, 0))[0]
+    return backend
+
+
+def test_xtest_press_holds_shift_for_shifted_characters():
+    backend = xtest_backend({ord('a'): (38, False), ord('A'): (38, True), XK_SHIFT_L: (50, False)}, [])
+    backend.press('A')
+    backend.press('a')
+    backend.press('enter')
+    assert backend.x11.keys == [(50, True), (38, True), (38, False), (50, False),
+                                (38, True), (38, False), (36, True), (36, False)]
+    with pytest.raises(ValueError, match="No keycode for key: nokey"):
+        backend.press('nokey')
+
+
+def test_xtest_rebinds_a_reused_scratch_keycode():
+    backend = xtest_backend({}, [200])
+    for ch in "بپب":
+        backend.press(ch)
+        assert backend.x11.bound[200] == 0x01000000 | ord(ch)
+    assert backend.x11.keys == [(200, True), (200, False)] * 3
@@ -0,0 +1,111 @@
+from types import SimpleNamespace
+import pytest
+from capture import rdp_simplify, ContinuousRecorder, KeystrokeRecorder, OffsetStamper
+
+
+def test_rdp_keeps_the_corners_of_a_path():
+    line = [(i * 0.01, i, 0) for i in range(50)]
+    corner = [(0.5 + i * 0.01, 49, i) for i in range(1, 50)]
+    assert rdp_simplify(line + corner, 1.0) == [(0.0, 0, 0), (0.49, 49, 0), corner[-1]]
+
+
+def test_rdp_keeps_points_outside_the_tolerance():
+    points = [(0, 0, 0), (1, 5, 2), (2, 10, 0)]
+    assert rdp_simplify(points, 3.0) == [(0, 0, 0), (2, 10, 0)]
+    assert rdp_simplify(points, 1.0) == points
+    assert rdp_simplify(points[:2], 0.0) == points[:2]
+    # A path that comes back to its start still keeps its far point
+    assert rdp_simplify([(0, 0, 0), (1, 10, 10), (2, 0, 0)], 1.0) == [(0, 0, 0), (1, 10, 10), (2, 0, 0)]
+
+
+def test_a_stroke_ends_at_a_click_without_a_move_onto_it():
+    recorder = ContinuousRecorder(tolerance=1.0)
+    out = []
+    for i in range(20):
+        out += recorder.feed_move(i * 0.01, i * 5, 100)
+    out += recorder.feed_click(0.2, 95, 100)
+    out += recorder.feed_click(0.3, 95, 100, 'right')
+    assert [action for _, action in out] == [('move', 0, 100), ('click', 95, 100),
+                                             ('click', 95, 100, 'right')]
+    assert recorder.reduction == 1 - 3 / 22
+
+
+def test_resting_pointer_ends_the_stroke():
+    recorder = ContinuousRecorder(pause_threshold=0.25)
+    assert recorder.feed_move(0.0, 0, 0) == []
+    assert recorder.feed_move(0.1, 10, 10) == []
+    out = recorder.feed_move(1.0, 20, 20)
+    assert out == [(0.0, ('move', 0, 0)), (0.1, ('move', 10, 10))]
+    assert recorder.flush() == [(1.0, ('move', 20, 20))]
+
+
+def test_wheel_ticks_at_one_spot_become_one_scroll():
+    recorder = ContinuousRecorder()
+    out = recorder.feed_scroll(0.0, 5, 5, 1) + recorder.feed_scroll(0.05, 5, 5, 1)
+    out += recorder.feed_scroll(0.1, 5, 5, 1) + recorder.feed_scroll(0.15, 6, 6, -1)
+    out += recorder.flush()
+    assert out == [(0.0, ('scroll', 5, 5, 3)), (0.15, ('scroll', 6, 6, -1))]
+
+
+def test_a_never_resting_pointer_is_simplified_in_pieces():
+    recorder = ContinuousRecorder(tolerance=0.5, max_points=10)
+    out = []
+    for i in range(95):
+        # Zig-zag, so every point survives simplification
+        out += recorder.feed_move(i * 0.001, i, (i % 2) * 10)
+        assert len(recorder.stroke) <= 10
+    out += recorder.flush()
+    moves = [action for _, action in out]
+    # Every point once: the piece boundaries are not sent twice
+    assert moves == [('move', i, (i % 2) * 10) for i in range(95)]
+
+
+def test_offsets_replace_timestamps():
+    stamp = OffsetStamper()
+    assert stamp([(1.0, ('click', 1, 1)), (1.5, ('move', 2, 2))]) == [
+        ('click', 1, 1), ('move', 2, 2, {'dt': 0.5})]
+    assert stamp([(1.75, ('click', 3, 3))]) == [('click', 3, 3, {'dt': 0.25})]
+
+
+def key(name=None, char=None):
+    """A pynput Key (has a name) or KeyCode (has a char)"""
+    return SimpleNamespace(name=name, char=char)
+
+
+def typed(recorder, t, *keys):
+    out = []
+    for k in keys:
+        out += recorder.feed_key(t, k, True)
+        out += recorder.feed_key(t, k, False)
+        t += 0.1
+    return out
+
+
+def test_printable_keys_coalesce_into_one_type_action():
+    recorder = KeystrokeRecorder()
+    shift = key('shift')
+    out = recorder.feed_key(0.0, shift, True)
+    out += typed(recorder, 0.0, key(char='H'))
+    out += recorder.feed_key(0.1, shift, False)
+    out += typed(recorder, 0.2, key(char='i'), key('space'), key(char='x'), key('backspace'),
+                 key(char='ب'))
+    out += recorder.flush()
+    assert out == [(0.0, ('type', 'Hi ب'))]
+    assert recorder.reduction == 1 - 1 / 14
+
+
+def test_chords_and_special_keys_become_shortcuts():
+    recorder = KeystrokeRecorder()
+    ctrl, shift = key('ctrl_l'), key('shift_r')
+    out = typed(recorder, 0.0, key(char='a'))
+    out += recorder.feed_key(1.0, ctrl, True) + recorder.feed_key(1.0, shift, True)
+    # Some platforms report Ctrl+S as the control character
+    out += typed(recorder, 1.1, key(char='\x13'))
+    out += recorder.feed_key(1.2, shift, False)
+    out += typed(recorder, 1.3, key(char='c'), key('backspace'))
+    out += recorder.feed_key(1.5, ctrl, False)
+    out += typed(recorder, 2.0, key('enter'), key('f5'), key('caps_lock'))
+    assert [action for _, action in out] == [
+        ('type', 'a'), ('shortcut', 'Ctrl+Shift+S'), ('shortcut', 'Ctrl+C'), ('shortcut', 'Ctrl+Backspace'),
+        ('shortcut', 'Enter'), ('shortcut', 'F5')]
+    assert [t for t, _ in out] == pytest.approx([0.0, 1.1, 1.3, 1.4, 2.0, 2.1])
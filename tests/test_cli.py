@@ -0,0 +1,69 @@
+import pytest
+import recfile
+from cli import main, EXIT_OK, EXIT_FAILED, EXIT_USAGE
+
+
+def write(path, actions):
+    recfile.save_actions(str(path), actions)
+    return str(path)
+
+
+def run(*argv):
+    return main(["run", *argv, "--backend", "null", "--delay", "0"])
+
+
+def test_a_plain_run_succeeds(tmp_path, capsys):
+    path = write(tmp_path / "m.rec", [('click', 1, 1), ('move', 2, 2), ('type', 'hi', 3, 3)])
+    assert run(path, "--repeat", "2") == EXIT_OK
+    assert "x 2 runs" in capsys.readouterr().out
+    assert run(path, "--no-optimize", "-q") == EXIT_OK
+    assert capsys.readouterr().out == ""
+
+
+@pytest.mark.parametrize("extra", [["--repeat", "0"], ["--workers", "0"], ["--workers", "2", "--size", "big"],
+                                   ["--data", "missing.csv"], ["--trace", "t.json", "--data", "x.csv"]])
+def test_bad_arguments_are_usage_errors(tmp_path, capsys, extra):
+    path = write(tmp_path / "m.rec", [('click', 1, 1)])
+    assert run(path, *extra) == EXIT_USAGE
+    assert capsys.readouterr().err.startswith("error: ")
+
+
+def test_unreadable_macros_are_usage_errors(tmp_path):
+    assert run(str(tmp_path / "missing.rec")) == EXIT_USAGE
+    bad = tmp_path / "bad.rec"
+    bad.write_text("not a macro", encoding='utf-8')
+    assert run(str(bad)) == EXIT_USAGE
+    corrupt = tmp_path / "corrupt.rec"
+    recfile.save_actions(str(corrupt), [('click', 1, 1)] * 3)
+    with open(corrupt, 'a', encoding='utf-8') as f:
+        f.write('{"x": 1}\n["click", 1, 1]\n')
+    assert run(str(corrupt), "--no-optimize") == EXIT_USAGE
+
+
+def test_errors_during_playback_mean_the_replay_failed(tmp_path, capsys):
+    missing_call = write(tmp_path / "call.rec", [('click', 1, 1), ('call', 'nowhere.rec')])
+    assert run(missing_call) == EXIT_FAILED
+    assert "replay failed: " in capsys.readouterr().err
+    unbalanced = write(tmp_path / "loop.rec", [('loop', 2), ('click', 1, 1)])
+    assert run(unbalanced) == EXIT_FAILED
+    assert run(unbalanced, "--no-optimize") == EXIT_FAILED
+    data = tmp_path / "rows.csv"
+    data.write_text("x\n1\nleft\n", encoding='utf-8')
+    templated = write(tmp_path / "t.rec", [('click', '{{x}}', 1)])
+    assert run(templated, "--data", str(data)) == EXIT_FAILED
+
+
+def test_unoptimized_structured_macros_run_with_calls_beside_them(tmp_path, monkeypatch):
+    sub = tmp_path / "sub"
+    sub.mkdir()
+    write(sub / "inner.rec", [('click', 7, 7)])
+    outer = write(sub / "outer.rec", [('loop', 2), ('call', 'inner.rec'), ('end_loop',)])
+    monkeypatch.chdir(tmp_path)
+    assert run(outer, "--no-optimize") == EXIT_OK
+    assert run("sub/outer.rec") == EXIT_OK
+
+
+def test_argparse_errors_exit_with_the_usage_code():
+    with pytest.raises(SystemExit) as exit_info:
+        main(["run"])
+    assert exit_info.value.code == EXIT_USAGE
@@ -0,0 +1,83 @@
+import json
+import pytest
+from backends import RecordingBackend
+from replay import ReplayControl
+from dataset import MacroTemplate, Checkpoint, iter_rows, run_dataset, CHECKPOINT_SUFFIX
+
+MACRO = [('click', '{{x}}', '{{ y }}'), ('type', 'Hello {{name}}!', 10, 20), ('shortcut', 'Enter')]
+
+
+def write_csv(path, rows):
+    path.write_text("x,y,name\n" + "".join(f"{x},{y},{name}\n" for x, y, name in rows), encoding='utf-8')
+    return str(path)
+
+
+def events(backend):
+    return [(name, args) for _, name, args in backend.events]
+
+
+def test_template_fills_text_and_coordinates():
+    template = MacroTemplate(MACRO)
+    assert template.names == {'x', 'y', 'name'}
+    assert template.render({'x': '12', 'y': '7.6', 'name': 'علی'}) == [
+        ('click', 12, 8), ('type', 'Hello علی!', 10, 20), ('shortcut', 'Enter')]
+    # Actions without placeholders are shared, not copied
+    assert template.render({'x': '1', 'y': '1', 'name': ''})[2] is MACRO[2]
+
+
+def test_template_errors_name_the_column():
+    template = MacroTemplate(MACRO)
+    with pytest.raises(ValueError, match="No column named name"):
+        template.render({'x': '1', 'y': '2'})
+    with pytest.raises(ValueError, match="Column 'x' is not a coordinate"):
+        template.render({'x': 'left', 'y': '2', 'name': ''})
+
+
+def test_rows_from_csv_and_jsonl(tmp_path):
+    csv_path = write_csv(tmp_path / "rows.csv", [(1, 2, 'a'), (3, 4, 'b')])
+    assert list(iter_rows(csv_path)) == [(1, {'x': '1', 'y': '2', 'name': 'a'}),
+                                         (2, {'x': '3', 'y': '4', 'name': 'b'})]
+    jsonl = tmp_path / "rows.jsonl"
+    jsonl.write_text('{"x": 1, "y": null}\n\n{"x": 2, "y": 3}\n', encoding='utf-8')
+    assert list(iter_rows(str(jsonl))) == [(1, {'x': '1', 'y': ''}), (2, {'x': '2', 'y': '3'})]
+    jsonl.write_text('[1, 2]\n', encoding='utf-8')
+    with pytest.raises(ValueError, match="Line 1"):
+        list(iter_rows(str(jsonl)))
+
+
+def test_one_replay_per_row(tmp_path):
+    data = write_csv(tmp_path / "rows.csv", [(1, 2, 'a'), (3, 4, 'b')])
+    backend = RecordingBackend()
+    assert run_dataset(MACRO, data, 0.0, ReplayControl(), backend=backend) == (2, 0)
+    assert [args for name, args in events(backend) if name in ('click', 'write')] == [
+        (1, 2, 'left'), (10, 20, 'left'), ('Hello a!',), (3, 4, 'left'), (10, 20, 'left'), ('Hello b!',)]
+    # Finished jobs leave no checkpoint behind
+    assert not (tmp_path / ("rows.csv" + CHECKPOINT_SUFFIX)).exists()
+
+
+def test_a_stopped_job_resumes_after_the_last_finished_row(tmp_path):
+    data = write_csv(tmp_path / "rows.csv", [(1, 1, 'a'), (2, 2, 'b'), ('bad', 3, 'c'), (4, 4, 'd')])
+    with pytest.raises(ValueError, match="Row 3"):
+        run_dataset(MACRO, data, 0.0, ReplayControl(), backend=RecordingBackend())
+    assert Checkpoint(data, MacroTemplate(MACRO).digest()).load() == 2
+
+    write_csv(tmp_path / "rows.csv", [(1, 1, 'a'), (2, 2, 'b'), (3, 3, 'c'), (4, 4, 'd')])
+    backend = RecordingBackend()
+    assert run_dataset(MACRO, data, 0.0, ReplayControl(), backend=backend) == (2, 2)
+    assert [args[0] for name, args in events(backend) if name == 'write'] == ['Hello c!', 'Hello d!']
+
+
+def test_checkpoint_of_another_macro_is_refused(tmp_path):
+    data = str(tmp_path / "rows.csv")
+    Checkpoint(data, "abc").save(5)
+    with open(data + CHECKPOINT_SUFFIX, encoding='utf-8') as f:
+        assert json.load(f) == {"macro": "abc", "done": 5}
+    with pytest.raises(ValueError, match="different macro"):
+        Checkpoint(data, "xyz").load()
+
+
+def test_restart_ignores_the_checkpoint(tmp_path):
+    data = write_csv(tmp_path / "rows.csv", [(1, 1, 'a'), (2, 2, 'b')])
+    Checkpoint(data, MacroTemplate(MACRO).digest()).save(1)
+    assert run_dataset(MACRO, data, 0.0, ReplayControl(), backend=RecordingBackend(),
+                       resume=False) == (2, 0)
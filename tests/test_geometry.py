@@ -0,0 +1,73 @@
+import geometry
+from geometry import fit_to_screen, fit_stream, transform_rows
+from backends import RecordingBackend
+from replay import ReplayControl, run_actions
+
+RECORDED = [
+    ('click', 1, 1),
+    ('show_screen', 1000, 500),
+    ('move', 500, 250, {'dt': 0.1}),
+    ('click', 999, 499, 'right'),
+    ('type', 'hi', 100, 50),
+    ('type', 'no position'),
+    ('scroll', 0, 0, 3),
+    ('wait_until', 'stable', 100, 100, 200, 100, 0.2, 5.0, 0.05),
+    ('shortcut', 'Enter'),
+]
+
+
+def test_coordinates_follow_the_screen_size():
+    fitted = fit_to_screen(RECORDED, (2000, 1000))
+    assert fitted == [
+        ('click', 1, 1),
+        ('show_screen', 2000, 1000),
+        ('move', 1001, 501, {'dt': 0.1}),
+        ('click', 1999, 999, 'right'),
+        ('type', 'hi', 201, 101),
+        ('type', 'no position'),
+        ('scroll', 1, 1, 3),
+        ('wait_until', 'stable', 201, 201, 400, 200, 0.2, 5.0, 0.05),
+        ('shortcut', 'Enter'),
+    ]
+
+
+def test_shrinking_stays_on_the_screen():
+    fitted = fit_to_screen([('show_screen', 1000, 500), ('click', 999, 499)], (640, 480))
+    assert fitted[1] == ('click', 639, 479)
+
+
+def test_fitting_twice_changes_nothing():
+    fitted = fit_to_screen(RECORDED, (1280, 720))
+    assert fit_to_screen(fitted, (1280, 720)) is fitted
+
+
+def test_same_size_returns_the_actions_themselves():
+    assert fit_to_screen(RECORDED, (1000, 500)) is RECORDED
+
+
+def test_vectorized_and_plain_mapping_agree(monkeypatch):
+    actions = [('show_screen', 1920, 1080)] + [('click', i * 7 % 1920, i * 3 % 1080) for i in range(300)]
+    geometry._fit_cache.clear()
+    vectorized = fit_to_screen(actions, (1366, 768))
+    geometry._fit_cache.clear()
+    monkeypatch.setattr(geometry, 'VECTOR_MIN', 10 ** 9)
+    assert fit_to_screen(actions, (1366, 768)) == vectorized
+
+
+def test_streamed_fitting_matches():
+    assert list(fit_stream(iter(RECORDED), (1600, 900))) == fit_to_screen(RECORDED, (1600, 900))
+
+
+def test_transform_rows_moves_and_scales_the_chosen_rows():
+    actions = [('click', 10, 10), ('move', 20, 30), ('shortcut', 'Tab')]
+    assert transform_rows(actions, [1, 2], 1, 1, dx=5, dy=-5) == [('move', 25, 25), ('shortcut', 'Tab')]
+    assert transform_rows(actions, [0], 1.5, 2) == [('click', 15, 20)]
+
+
+def test_replay_fits_to_the_backend_screen():
+    backend = RecordingBackend(screen=(500, 250))
+    run_actions(RECORDED[1:4], 1, 0.0, ReplayControl(), backend=backend)
+    assert [args[:2] for _, _, args in backend.events] == [(250, 125), (499, 249)]
+    backend = RecordingBackend(screen=(500, 250))
+    run_actions(RECORDED[1:4], 1, 0.0, ReplayControl(), backend=backend, fit=False)
+    assert [args[:2] for _, _, args in backend.events] == [(500, 250), (999, 499)]
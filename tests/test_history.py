@@ -0,0 +1,121 @@
+from store import ActionStore
+from history import (History, InsertAction, DeleteAction, MoveAction, EditAction, EditRows,
+                     InsertBlock, ReplaceStore, ENTRY_OVERHEAD)
+
+
+class ListTarget:
+    """The model interface History drives, over a plain list"""
+
+    def __init__(self, actions=()):
+        self.actions = list(actions)
+
+    def insert_action(self, row, action):
+        self.actions.insert(row, action)
+
+    def remove_action(self, row):
+        return self.actions.pop(row)
+
+    def insert_actions(self, row, actions):
+        self.actions[row:row] = actions
+
+    def remove_actions(self, row, count):
+        del self.actions[row:row + count]
+
+    def move_row(self, src, dst):
+        self.actions.insert(dst, self.actions.pop(src))
+
+    def set_action(self, row, action):
+        self.actions[row] = action
+
+    def set_store(self, actions):
+        self.actions = actions
+
+
+def test_every_command_undoes_and_redoes():
+    target = ListTarget([('click', 0, 0), ('click', 1, 1), ('click', 2, 2)])
+    history = History(target)
+    states = [list(target.actions)]
+    commands = (
+        lambda rows: InsertAction(1, ('move', 5, 5)),
+        lambda rows: DeleteAction(0, rows[0]),
+        lambda rows: MoveAction(0, 2),
+        lambda rows: EditAction(1, rows[1], ('click', 9, 9)),
+        lambda rows: EditRows([0, 2], [rows[0], rows[2]], [('move', 6, 6), ('move', 7, 7)]),
+        lambda rows: InsertBlock(1, [('scroll', 1, 1, 1), ('scroll', 2, 2, 2)]),
+    )
+    for make in commands:
+        history.do(make(target.actions))
+        states.append(list(target.actions))
+    assert states[-1] == [('move', 6, 6), ('scroll', 1, 1, 1), ('scroll', 2, 2, 2),
+                          ('click', 9, 9), ('move', 7, 7)]
+    for state in reversed(states[:-1]):
+        assert history.undo()
+        assert target.actions == state
+    assert not history.undo()
+    for state in states[1:]:
+        assert history.redo()
+        assert target.actions == state
+    assert not history.redo()
+
+
+def test_a_new_edit_drops_the_redo_entries():
+    target = ListTarget()
+    history = History(target)
+    history.do(InsertAction(0, ('click', 0, 0)))
+    history.undo()
+    history.do(InsertAction(0, ('click', 1, 1)))
+    assert not history.can_redo()
+    assert history.nbytes == history._undo[0].size
+
+
+def test_oldest_entries_are_dropped_over_the_cap():
+    target = ListTarget()
+    history = History(target, max_bytes=ENTRY_OVERHEAD * 20)
+    for i in range(100):
+        history.do(InsertAction(i, ('click', i, i)))
+    assert history.nbytes <= ENTRY_OVERHEAD * 20
+    assert history.dropped > 0
+    undone = 0
+    while history.undo():
+        undone += 1
+    assert undone + history.dropped == 100
+    # Evicted steps can't be undone; the rows they added stay
+    assert len(target.actions) == history.dropped
+
+
+def test_undo_to_a_mark_abandons_the_later_steps():
+    target = ListTarget()
+    history = History(target)
+    for i in range(30):
+        history.do(InsertAction(i, ('click', i, i)))
+    mark = history.mark()
+    for i in range(30, 60):
+        history.do(InsertAction(i, ('click', i, i)))
+    history.undo_to(mark)
+    assert target.actions == [('click', i, i) for i in range(30)]
+    assert not history.can_redo()
+    assert history.nbytes == sum(cmd.size for cmd in history._undo)
+
+
+def test_undo_to_an_evicted_mark_stops_at_the_oldest_step():
+    target = ListTarget()
+    history = History(target, max_bytes=ENTRY_OVERHEAD * 50)
+    mark = history.mark()
+    for i in range(60):
+        history.do(InsertAction(i, ('click', i, i)))
+    history.undo_to(mark)
+    assert len(target.actions) == history.dropped > 0
+    assert not history.can_undo()
+
+
+def test_a_replaced_store_is_counted_once_filled():
+    target = ListTarget()
+    history = History(target)
+    command = ReplaceStore(target.actions, ActionStore())
+    history.do(command)
+    before = history.nbytes
+    target.actions.extend(('click', i, i) for i in range(1000))
+    history.remeasure(command)
+    assert history.nbytes == before + target.actions.nbytes()
+    history.undo()
+    assert target.actions == []
@@ -0,0 +1,71 @@
+import time
+import threading
+from hooks import EventRing, HookService
+
+
+def test_drain_returns_events_oldest_first_across_the_wrap():
+    ring = EventRing(4)
+    for i in range(3):
+        ring.push(i)
+    assert ring.drain() == [0, 1, 2]
+    for i in range(3, 7):
+        ring.push(i)
+    assert len(ring) == 4
+    assert ring.drain() == [3, 4, 5, 6]
+    assert ring.drain() == []
+
+
+def test_overflow_drops_the_oldest_events():
+    ring = EventRing(8)
+    for i in range(20):
+        ring.push(i)
+    assert ring.dropped == 12
+    assert ring.drain() == list(range(12, 20))
+    ring.push(20)
+    ring.clear()
+    assert len(ring) == 0 and ring.drain() == []
+
+
+def test_nothing_is_lost_or_duplicated_under_concurrent_pushes():
+    ring = EventRing(1024)
+    drained = []
+    done = threading.Event()
+
+    def produce(base):
+        for i in range(20000):
+            ring.push(base + i)
+
+    def consume():
+        while not done.is_set():
+            drained.extend(ring.drain())
+        drained.extend(ring.drain())
+
+    consumer = threading.Thread(target=consume)
+    consumer.start()
+    producers = [threading.Thread(target=produce, args=(k * 100000,)) for k in range(4)]
+    for thread in producers:
+        thread.start()
+    for thread in producers:
+        thread.join()
+    done.set()
+    consumer.join()
+    assert len(drained) + ring.dropped == 80000
+    assert len(set(drained)) == len(drained)
+    # Each producer's events come out in the order it pushed them
+    for k in range(4):
+        mine = [e for e in drained if k * 100000 <= e < (k + 1) * 100000]
+        assert mine == sorted(mine)
+
+
+def test_collect_hands_over_one_batch_and_counts_latency():
+    service = HookService(capacity=16)
+    now = time.perf_counter()
+    for i in range(5):
+        service.ring.push((now - 0.01, 'move', i, i))
+    batch = service.collect()
+    assert [event[2] for event in batch] == list(range(5))
+    assert service.collect() == []
+    stats = service.stats()
+    assert stats['delivered'] == 5 and stats['dropped'] == 0 and stats['buffered'] == 0
+    assert 0.01 <= stats['latency_mean'] <= stats['latency_max'] < 1.0
+    assert not service.running
@@ -0,0 +1,70 @@
+import os
+import pytest
+import recfile
+from library import MacroLibrary, ScanCancelled, summarize
+
+
+@pytest.fixture
+def folder(tmp_path):
+    root = tmp_path / "macros"
+    (root / "sub").mkdir(parents=True)
+    recfile.save_actions(str(root / "login.rec"), [
+        ('click', 10, 20), ('type', 'hello world', 30, 40), ('shortcut', 'Ctrl+S'),
+        ('shortcut', 'Enter'), ('shortcut', 'Ctrl+S')])
+    recfile.save_actions(str(root / "sub" / "form.rec"), [
+        ('move', 5, 5, {'dt': 0.1}), ('type', 'سلام دنیا'), ('click', '{{x}}', '{{y}}')])
+    (root / "notes.txt").write_text("not a macro", encoding='utf-8')
+    return root
+
+
+@pytest.fixture
+def library(tmp_path):
+    with MacroLibrary(str(tmp_path / "db" / "library.sqlite")) as library:
+        yield library
+
+
+def test_summary_keeps_text_shortcuts_and_numeric_bounds(folder):
+    info = summarize(str(folder / "login.rec"))
+    assert info == {'actions': 5, 'counts': {'click': 1, 'type': 1, 'shortcut': 3},
+                    'texts': ['hello world'], 'shortcuts': ['Ctrl+S', 'Enter'], 'bounds': (10, 20, 30, 40)}
+    # Dataset placeholders are not coordinates
+    assert summarize(str(folder / "sub" / "form.rec"))['bounds'] == (5, 5, 5, 5)
+
+
+def test_update_reads_only_changed_files(folder, library):
+    assert library.update(str(folder)) == (2, 0, 0)
+    assert library.roots() == [str(folder)]
+    assert library.update(str(folder)) == (0, 0, 2)
+    recfile.save_actions(str(folder / "login.rec"), [('click', 1, 1)] * 3)
+    os.remove(folder / "sub" / "form.rec")
+    assert library.update_all() == (1, 1, 0)
+    assert library.count() == 1
+    assert library.search()[0]['actions'] == 3
+
+
+def test_search_matches_every_word_as_a_prefix(folder, library):
+    library.update(str(folder))
+    assert [r['name'] for r in library.search("hel wor")] == ["login.rec"]
+    assert [r['name'] for r in library.search("دنیا")] == ["form.rec"]
+    assert [r['name'] for r in library.search("form")] == ["form.rec"]
+    assert library.search("hello nothing") == []
+    [result] = library.search("ctrl")
+    assert result['shortcuts'] == ['Ctrl+S', 'Enter'] and result['counts']['shortcut'] == 3
+    assert result['snippet'] is not None and result['error'] is None
+    assert len(library.search()) == 2 and len(library.search(limit=1)) == 1
+
+
+def test_unreadable_files_are_kept_with_their_error(folder, library):
+    (folder / "broken.rec").write_text('{"format": "other"}\n', encoding='utf-8')
+    assert library.update(str(folder)) == (3, 0, 0)
+    [broken] = library.search("broken")
+    assert "Not a .rec file" in broken['error'] and broken['bounds'] is None
+
+
+def test_a_cancelled_scan_keeps_what_it_read_and_says_so(folder, library):
+    seen = []
+    with pytest.raises(ScanCancelled):
+        library.update(str(folder), lambda n, path: seen.append(path), lambda: len(seen) >= 1)
+    assert library.count() == 1
+    # The next scan picks up where the cancelled one stopped
+    assert library.update(str(folder)) == (1, 0, 1)
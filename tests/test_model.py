@@ -0,0 +1,42 @@
+import os
+import pytest
+
+# No display needed: Qt renders offscreen and pynput gets its dummy backend
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ.setdefault("PYNPUT_BACKEND", "dummy")
+QtWidgets = pytest.importorskip("PySide6.QtWidgets")
+gui = pytest.importorskip("gui")
+from store import ActionStore
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+def test_a_block_is_inserted_as_one_change(app):
+    model = gui.ActionListModel(ActionStore([('move', i, i) for i in range(5)]))
+    inserted = []
+    model.rowsInserted.connect(lambda parent, first, last: inserted.append((first, last)))
+    model.insert_actions(2, [('click', 1, 1), ('type', 'x', 2, 2), ('loop', 2)])
+    assert inserted == [(2, 4)]
+    assert model.rowCount() == 8
+    assert list(model.actions)[2:6] == [('click', 1, 1), ('type', 'x', 2, 2), ('loop', 2), ('move', 2, 2)]
+    model.insert_actions(8, [('click', 3, 3)])
+    assert inserted[-1] == (8, 8)
+    model.remove_actions(2, 3)
+    assert list(model.actions) == [('move', i, i) for i in range(5)] + [('click', 3, 3)]
+
+
+def test_closing_the_library_mid_scan_leaves_the_index_closed(app, tmp_path):
+    import recfile
+    for i in range(300):
+        recfile.save_actions(str(tmp_path / f"m{i}.rec"), [('type', f"text {i}")])
+    dialog = gui.LibraryDialog(db_path=str(tmp_path / "library.sqlite"))
+    dialog.start_index(str(tmp_path))
+    worker = dialog.index_worker
+    dialog.reject()
+    worker.thread.join()
+    app.processEvents()
+    assert dialog.index_worker is None
+    assert dialog.library._db is None
@@ -0,0 +1,56 @@
+import pytest
+from optimize import optimize, optimize_report
+
+
+def test_move_onto_the_next_click_is_dropped_with_its_gap_carried():
+    actions = [('move', 5, 5, {'dt': 0.2}), ('click', 5, 5, {'dt': 0.3})]
+    new, origin = optimize(actions)
+    assert new == [('click', 5, 5, {'dt': 0.5})]
+    assert origin == [1]
+
+
+def test_move_elsewhere_is_kept():
+    actions = [('move', 5, 5), ('click', 6, 6)]
+    assert optimize(actions)[0] == actions
+
+
+def test_move_to_where_the_pointer_already_is_is_dropped():
+    new, origin = optimize([('click', 1, 1), ('move', 1, 1), ('scroll', 2, 2, 1), ('move', 2, 2)])
+    assert new == [('click', 1, 1), ('scroll', 2, 2, 1)]
+    assert origin == [0, 2]
+
+
+def test_back_to_back_typing_is_merged():
+    new, origin = optimize([('type', 'ab'), ('type', 'cd'), ('type', 'x', 1, 2), ('type', 'y', 1, 2)])
+    assert new == [('type', 'abcd'), ('type', 'xy', 1, 2)]
+    assert origin == [0, 2]
+
+
+def test_typing_with_its_own_recorded_gap_is_not_merged():
+    actions = [('type', 'a'), ('type', 'b', {'dt': 0.5})]
+    assert optimize(actions)[0] == actions
+
+
+def test_typing_with_different_entry_modes_is_not_merged():
+    actions = [('type', 'a', {'entry': 'paste'}), ('type', 'b', {'entry': 'keys'})]
+    assert optimize(actions)[0] == actions
+
+
+def test_repeated_screen_size_is_dropped():
+    new, _ = optimize([('show_screen', 800, 600), ('click', 1, 1), ('show_screen', 800, 600)])
+    assert new == [('show_screen', 800, 600), ('click', 1, 1)]
+
+
+def test_control_markers_forget_the_pointer():
+    # The second pass of a loop starts wherever the body left the pointer
+    actions = [('loop', 2), ('move', 1, 1), ('click', 2, 2), ('end_loop',)]
+    assert optimize(actions)[0] == actions
+    actions = [('click', 1, 1), ('end_loop',), ('move', 1, 1)]
+    assert optimize(actions)[0] == actions
+
+
+def test_report_counts_removed_steps_and_saved_pause():
+    actions = [('move', 5, 5), ('click', 5, 5), ('type', 'a'), ('type', 'b')]
+    new, origin, removed, saved = optimize_report(actions, 0.1)
+    assert len(new) == 2 and removed == 2
+    assert saved == pytest.approx(0.2)
@@ -0,0 +1,25 @@
+import pytest
+import parallel
+
+
+class Started(Exception):
+    pass
+
+
+@pytest.mark.parametrize("workers, runs, expected", [(8, 3, 3), (2, 5, 2), (None, 1, 1)])
+def test_no_more_displays_than_runs(monkeypatch, workers, runs, expected):
+    asked = []
+
+    def free_display_numbers(count):
+        asked.append(count)
+        raise Started()
+
+    monkeypatch.setattr(parallel, 'free_display_numbers', free_display_numbers)
+    with pytest.raises(Started):
+        parallel.run_parallel([('click', 1, 1)], runs, 0.0, workers=workers)
+    assert asked == [expected]
+
+
+def test_no_runs_is_refused():
+    with pytest.raises(ValueError, match="At least one worker"):
+        parallel.run_parallel([('click', 1, 1)], 0, 0.0, workers=4)
@@ -0,0 +1,139 @@
+import json
+import pytest
+import recfile
+from backends import RecordingBackend
+from replay import ReplayControl, run_actions, run_stream
+
+ACTIONS = [
+    ('show_screen', 1920, 1080),
+    ('move', 1, 2, {'dt': 0.25}),
+    ('click', 3, 4, 'right'),
+    ('type', 'سلام', 5, 6),
+    ('shortcut', 'Ctrl+S'),
+    ('scroll', 7, 8, -3),
+]
+
+
+def test_v2_round_trip(tmp_path):
+    path = str(tmp_path / "m.rec")
+    recfile.save_actions(path, ACTIONS)
+    assert recfile.detect_version(path) == recfile.VERSION_JSONL
+    assert recfile.load_actions(path) == ACTIONS
+    assert list(recfile.iter_chunks(path, 4)) == [ACTIONS[:4], ACTIONS[4:]]
+    with open(path, encoding='utf-8') as f:
+        assert json.loads(f.readline()) == {"format": recfile.FORMAT_NAME, "version": 2}
+        assert len(f.readlines()) == len(ACTIONS)
+
+
+def test_v1_files_still_load(tmp_path):
+    path = tmp_path / "old.rec"
+    path.write_text(json.dumps([list(action) for action in ACTIONS]), encoding='utf-8')
+    assert recfile.detect_version(str(path)) == recfile.VERSION_JSON
+    assert recfile.load_actions(str(path)) == ACTIONS
+
+
+def test_append_extends_a_file_and_creates_a_missing_one(tmp_path):
+    path = str(tmp_path / "m.rec")
+    recfile.append_actions(path, ACTIONS[:2])
+    recfile.append_actions(path, ACTIONS[2:])
+    assert recfile.load_actions(path) == ACTIONS
+
+
+def test_torn_last_line_is_skipped_and_cut_on_append(tmp_path):
+    path = str(tmp_path / "m.rec")
+    recfile.save_actions(path, ACTIONS[:3])
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('["click", 9')
+    # An interrupted append leaves half a line; readers stop before it
+    assert recfile.load_actions(path) == ACTIONS[:3]
+    recfile.append_actions(path, ACTIONS[3:])
+    assert recfile.load_actions(path) == ACTIONS
+
+
+def test_corrupt_line_in_the_middle_names_the_line(tmp_path):
+    path = tmp_path / "m.rec"
+    recfile.save_actions(str(path), ACTIONS)
+    lines = path.read_text(encoding='utf-8').splitlines(True)
+    lines[3] = '{"not": "an action"}\n'
+    path.write_text("".join(lines), encoding='utf-8')
+    with pytest.raises(ValueError, match="line 4"):
+        recfile.load_actions(str(path))
+
+
+def test_files_of_other_programs_are_refused(tmp_path):
+    path = tmp_path / "m.rec"
+    path.write_text('{"format": "other"}\n', encoding='utf-8')
+    with pytest.raises(ValueError, match="Not a .rec file"):
+        recfile.load_actions(str(path))
+    path.write_text('', encoding='utf-8')
+    with pytest.raises(ValueError, match="Empty"):
+        recfile.detect_version(str(path))
+
+
+def test_stream_and_compiled_replays_send_the_same_input(tmp_path):
+    path = str(tmp_path / "m.rec")
+    recfile.save_actions(path, ACTIONS[1:3] + ACTIONS[5:])
+    compiled, streamed = RecordingBackend(), RecordingBackend()
+    run_actions(recfile.load_actions(path), 2, 0.0, ReplayControl(), backend=compiled)
+    run_stream(lambda: recfile.iter_actions(path), 2, 0.0, ReplayControl(), backend=streamed)
+    assert [e[1:] for e in streamed.events] == [e[1:] for e in compiled.events]
+    assert len(streamed.events) == 6
+
+
+BINARY = ACTIONS + [
+    ('click', 1, 1, 'left'),
+    ('click', 2, 2, {'dt': 0.5, 'delay': 0.125}),
+    ('type', 'typed where the focus is', {'dt': 0.01}),
+    ('shortcut', 'Enter', {'delay': 0.3}),
+    ('move', 3, 3, {'dt': 1}),
+    ('type', 'x', {'entry': 'paste'}),
+    ('loop', 2),
+    ('end_loop',),
+    ('move', 2**40, 0),
+]
+
+
+def test_v3_round_trip(tmp_path):
+    path = str(tmp_path / "m.rec")
+    recfile.save_actions_binary(path, BINARY)
+    assert recfile.detect_version(path) == recfile.VERSION_BINARY
+    assert recfile.load_actions(path) == BINARY
+    with recfile.BinaryRecFile(path) as rec:
+        assert len(rec) == len(BINARY)
+        assert [rec[i] for i in range(-len(BINARY), 0)] == BINARY
+        assert rec[2:5] == BINARY[2:5]
+        with pytest.raises(IndexError):
+            rec[len(BINARY)]
+
+
+def test_v3_keeps_recorded_timing_in_fixed_records(tmp_path):
+    path = str(tmp_path / "m.rec")
+    recorded = [('move', i, i, {'dt': 0.01 * i}) for i in range(100)]
+    recorded.append(('click', 5, 5, 'right', {'dt': 0.2}))
+    recfile.save_actions_binary(path, recorded)
+    with recfile.BinaryRecFile(path) as rec:
+        assert list(rec) == recorded
+        # One record plus one double per action, no JSON strings
+        assert rec._offsets_at - rec._records_at == len(recorded) * (recfile.RECORD.size + 8)
+        assert rec._data_at - rec._offsets_at == recfile.OFFSET.size
+
+
+def test_v3_string_cache_is_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(recfile, 'STRING_CACHE_SIZE', 10)
+    path = str(tmp_path / "m.rec")
+    texts = [('type', f"text {i}", 0, 0) for i in range(50)] + [('loop', i) for i in range(50)]
+    recfile.save_actions_binary(path, texts)
+    with recfile.BinaryRecFile(path) as rec:
+        assert list(rec) == texts
+        assert len(rec._strings) == 10
+
+
+def test_conversion_between_formats(tmp_path):
+    v2, v3, back = (str(tmp_path / name) for name in ("a.rec", "b.rec", "c.rec"))
+    recfile.save_actions(v2, BINARY)
+    recfile.convert(v2, v3)
+    recfile.convert(v3, back, recfile.VERSION_JSONL)
+    assert recfile.detect_version(back) == recfile.VERSION_JSONL
+    assert recfile.load_actions(back) == BINARY
+    with pytest.raises(ValueError, match="Cannot write"):
+        recfile.save_actions_as(back, BINARY, recfile.VERSION_JSON)
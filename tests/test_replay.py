@@ -0,0 +1,102 @@
+import time
+import threading
+import pytest
+from backends import RecordingBackend
+from replay import (ReplayControl, ReplayAborted, run_actions, total_pause, lateness_summary,
+                    action_meta, with_meta)
+
+
+def times(backend, name=None):
+    return [t for t, event, _ in backend.events if name is None or event == name]
+
+
+def assert_schedule(backend, due, slack=0.05):
+    """Each event happened at its due time (seconds after the first one), never early"""
+    seen = times(backend)
+    assert len(seen) == len(due)
+    for t, expected in zip(seen, due):
+        assert expected - 0.003 <= t - seen[0] < expected + slack
+
+
+def test_steps_follow_the_delay():
+    backend = RecordingBackend()
+    actions = [('click', i, i) for i in range(6)]
+    run_actions(actions, 1, 0.05, ReplayControl(), backend=backend)
+    assert [args[:2] for _, _, args in backend.events] == [(i, i) for i in range(6)]
+    assert_schedule(backend, [0.05 * i for i in range(6)])
+
+
+def test_recorded_gaps_and_tuned_delays_win_over_the_delay():
+    backend = RecordingBackend()
+    actions = [('click', 1, 1, {'delay': 0.12}), ('click', 2, 2),
+               ('click', 3, 3, {'dt': 0.08}), ('click', 4, 4)]
+    run_actions(actions, 1, 0.02, ReplayControl(), backend=backend)
+    assert_schedule(backend, [0.0, 0.12, 0.20, 0.22])
+
+
+def test_speed_scales_every_pause():
+    backend = RecordingBackend()
+    run_actions([('click', i, i) for i in range(5)], 1, 0.1, ReplayControl(), backend=backend, speed=4.0)
+    assert_schedule(backend, [0.025 * i for i in range(5)])
+
+
+def test_deadlines_absorb_overshoot():
+    # 50 steps of 10 ms end close to 0.5 s instead of drifting with every sleep
+    backend = RecordingBackend()
+    elapsed = run_actions([('click', 0, 0)] * 50, 1, 0.01, ReplayControl(), backend=backend)
+    assert 0.49 <= elapsed < 0.6
+
+
+def test_abort_stops_the_replay():
+    backend = RecordingBackend()
+    control = ReplayControl()
+    threading.Timer(0.1, control.abort).start()
+    with pytest.raises(ReplayAborted):
+        run_actions([('click', 0, 0)] * 100, 1, 0.02, control, backend=backend)
+    assert 2 <= len(backend.events) < 20
+
+
+def test_time_spent_paused_does_not_count():
+    control = ReplayControl()
+    backend = RecordingBackend()
+
+    def pause_then_resume():
+        control.pause()
+        time.sleep(0.15)
+        control.resume()
+
+    threading.Timer(0.05, pause_then_resume).start()
+    elapsed = run_actions([('click', 0, 0)] * 11, 1, 0.02, control, backend=backend)
+    assert len(backend.events) == 11
+    assert elapsed < 0.3
+
+
+def test_total_pause_counts_what_the_scheduler_waits():
+    actions = [('click', 0, 0), ('click', 1, 1, {'dt': 0.5}), ('click', 2, 2, {'delay': 0.2}),
+               ('click', 3, 3)]
+    assert total_pause(actions, 0.1) == pytest.approx(0.1 + 0.5 + 0.2 + 0.1)
+
+
+def test_metadata_helpers():
+    assert action_meta(('move', 1, 2)) == (('move', 1, 2), None)
+    assert action_meta(('move', 1, 2, {'dt': 0.1})) == (('move', 1, 2), {'dt': 0.1})
+    action = with_meta(('move', 1, 2), delay=0.3)
+    assert action == ('move', 1, 2, {'delay': 0.3})
+    assert with_meta(action, delay=None) == ('move', 1, 2)
+
+
+def test_lateness_is_collected_and_summarised():
+    lateness = []
+    run_actions([('click', 0, 0)] * 10, 1, 0.01, ReplayControl(), backend=RecordingBackend(),
+                lateness=lateness)
+    assert len(lateness) == 10
+    summary = lateness_summary(lateness)
+    assert summary['count'] == 10
+    assert min(lateness) >= 0 and summary['max'] < 0.05
+    assert lateness_summary([]) == {'count': 0, 'mean': 0.0, 'p50': 0.0, 'p95': 0.0, 'max': 0.0}
+    assert lateness_summary([0.3, 0.1, 0.2])['p50'] == 0.2
+
+
+def test_speed_outside_the_range_is_refused():
+    with pytest.raises(ValueError, match="between"):
+        run_actions([('click', 0, 0)], 1, 0.0, ReplayControl(), backend=RecordingBackend(), speed=100)
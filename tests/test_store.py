@@ -0,0 +1,125 @@
+import random
+import recfile
+from store import ActionStore, COMPACT_MIN
+
+ACTIONS = [
+    ('move', 1, 2),
+    ('click', 3, 4),
+    ('click', 3, 4, 'right'),
+    ('type', 'سلام', 5, 6),
+    ('type', 'no position'),
+    ('shortcut', 'Ctrl+S'),
+    ('show_screen', 1920, 1080),
+    ('move', 1, 2, {'dt': 0.25}),
+    ('move', 2**40, 0),
+]
+
+
+def test_behaves_like_a_list():
+    store = ActionStore(ACTIONS)
+    assert list(store) == ACTIONS
+    assert [store[i] for i in range(len(store))] == ACTIONS
+    assert list(store[2:5]) == ACTIONS[2:5]
+    store.insert(1, ('scroll', 0, 0, 1))
+    store.move(0, 3)
+    assert store.pop(2) == ACTIONS[2]
+    del store[0:2]
+    store[0] = ('type', 'x', 1, 1)
+    expected = list(ACTIONS)
+    expected.insert(1, ('scroll', 0, 0, 1))
+    expected.insert(3, expected.pop(0))
+    expected.pop(2)
+    del expected[0:2]
+    expected[0] = ('type', 'x', 1, 1)
+    assert list(store) == expected
+    assert list(store.copy()) == expected
+
+
+def test_edits_do_not_grow_the_pools_without_bound():
+    store = ActionStore(ACTIONS * 10)
+    reference = list(store)
+    rnd = random.Random(1)
+    for n in range(COMPACT_MIN * 8):
+        i = rnd.randrange(len(reference))
+        action = ('type', f"t{n}", 1, 1) if n % 2 else ('loop', n)
+        if n % 3:
+            store[i] = reference[i] = action
+        else:
+            del store[i], reference[i]
+            store.insert(i, action)
+            reference.insert(i, action)
+    assert list(store) == reference
+    assert len(store._strings) + len(store._objects) < 2 * COMPACT_MIN + len(reference)
+
+
+def test_store_over_a_binary_file_reads_it_lazily(tmp_path):
+    path = str(tmp_path / "m.rec")
+    recfile.save_actions_binary(path, ACTIONS)
+    store = ActionStore.over(recfile.BinaryRecFile(path))
+    assert len(store) == len(ACTIONS)
+    assert store[3] == ACTIONS[3] and store[-1] == ACTIONS[-1]
+    assert list(store) == ACTIONS
+    assert store.nbytes() == 0
+    copy = store.copy()
+    # The first change decodes the file into the columns
+    store[0] = ('click', 0, 0)
+    assert store.source is None
+    assert list(store) == [('click', 0, 0)] + ACTIONS[1:]
+    assert list(copy) == ACTIONS
+
+
+def test_detach_closes_the_file(tmp_path):
+    path = str(tmp_path / "m.rec")
+    recfile.save_actions_binary(path, ACTIONS)
+    source = recfile.BinaryRecFile(path)
+    store = ActionStore.over(source)
+    store.detach()
+    assert store.source is None and source._mm is None
+    assert list(store) == ACTIONS
+
+
+def test_recorded_timing_lives_in_columns():
+    recorded = [('move', i, i, {'dt': 0.01 * i}) for i in range(50)]
+    recorded += [('click', 5, 5, 'right', {'dt': 0.2, 'delay': 0.5}), ('type', 'hi', {'dt': 0.3}),
+                 ('scroll', 1, 1, -2, {'delay': 0.1}), ('shortcut', 'Enter')]
+    store = ActionStore(recorded)
+    assert list(store) == recorded
+    assert store[-3] == ('type', 'hi', {'dt': 0.3})
+    assert store._objects == []
+    assert store.nbytes() == len(recorded) * (1 + 4 * 3 + 8 * 2) + len('hi') + len('Enter')
+
+
+def test_metadata_columns_follow_edits():
+    store = ActionStore([('move', 1, 1), ('move', 2, 2)])
+    assert store._dt is None and store._delay is None
+    store.insert(1, ('click', 3, 3, {'dt': 0.5}))
+    store.append(('shortcut', 'Tab', {'delay': 0.25}))
+    store.move(0, 3)
+    del store[0]
+    store[0] = ('move', 4, 4, {'dt': 0.125, 'delay': 0.5})
+    expected = [('move', 4, 4, {'dt': 0.125, 'delay': 0.5}), ('shortcut', 'Tab', {'delay': 0.25}),
+                ('move', 1, 1)]
+    assert list(store) == expected
+    assert list(store.copy()) == expected
+
+
+def test_irregular_metadata_is_kept_whole():
+    odd = [('type', 'x', {'entry': 'paste'}), ('move', 1, 1, {'dt': 1}), ('click', 1, 1, {}),
+           ('click', 1, 1, 'left'), ('loop', 3)]
+    store = ActionStore(odd)
+    assert list(store) == odd
+    assert len(store._objects) == len(odd)
+
+
+def test_insert_many_matches_inserting_one_by_one():
+    block = [('click', 9, 9, {'dt': 0.5}), ('type', 'block', 1, 1), ('loop', 2),
+             ('scroll', 1, 2, 3, {'delay': 0.25})]
+    for at in (0, 3, len(ACTIONS), -2):
+        store = ActionStore(ACTIONS)
+        store.insert_many(at, block)
+        expected = list(ACTIONS)
+        expected[at:at] = block
+        assert list(store) == expected
+    store = ActionStore()
+    store.insert_many(0, [])
+    assert len(store) == 0
@@ -0,0 +1,86 @@
+import pytest
+from PIL import Image
+import recfile
+from backends import RecordingBackend
+from replay import ReplayControl, run_actions, iter_program
+from structure import parse
+
+
+class ColourProbe:
+    """Stands in for the screen: every pixel has the colour in `rgb`"""
+
+    def __init__(self, rgb):
+        self.rgb = rgb
+
+    def grab(self, region):
+        return Image.new('RGB', region[2:], self.rgb)
+
+
+def replay(actions, probe=None, base_dir=None):
+    backend = RecordingBackend()
+    run_actions(actions, 1, 0.0, ReplayControl(), backend=backend, probe=probe, base_dir=base_dir)
+    return [args[:2] for _, _, args in backend.events]
+
+
+def test_loops_repeat_their_body():
+    actions = [('click', 0, 0), ('loop', 3), ('click', 1, 1), ('loop', 2), ('click', 2, 2),
+               ('end_loop',), ('end_loop',), ('click', 9, 9)]
+    assert replay(actions) == [(0, 0)] + [(1, 1), (2, 2), (2, 2)] * 3 + [(9, 9)]
+
+
+def test_loop_of_zero_skips_its_body():
+    assert replay([('loop', 0), ('click', 1, 1), ('end_loop',), ('click', 2, 2)]) == [(2, 2)]
+
+
+def test_pixel_condition_picks_a_branch():
+    actions = [('if_pixel', 3, 3, '#ff0000', 10), ('click', 1, 1), ('else',), ('click', 2, 2),
+               ('end_if',)]
+    assert replay(actions, ColourProbe((250, 5, 0))) == [(1, 1)]
+    assert replay(actions, ColourProbe((0, 0, 255))) == [(2, 2)]
+
+
+def test_condition_is_tested_again_on_every_pass():
+    probe = ColourProbe((0, 0, 0))
+    backend = RecordingBackend()
+
+    class Flip(RecordingBackend):
+        def click(self, x, y, button='left'):
+            backend.click(x, y, button)
+            probe.rgb = (255, 255, 255) if probe.rgb == (0, 0, 0) else (0, 0, 0)
+
+    actions = [('loop', 4), ('if_pixel', 0, 0, '#000000', 0), ('click', 1, 1), ('else',),
+               ('click', 2, 2), ('end_if',), ('end_loop',)]
+    run_actions(actions, 1, 0.0, ReplayControl(), backend=Flip(), probe=probe)
+    assert [args[:2] for _, _, args in backend.events] == [(1, 1), (2, 2), (1, 1), (2, 2)]
+
+
+def test_calls_are_found_next_to_the_calling_macro(tmp_path):
+    sub = tmp_path / "sub"
+    sub.mkdir()
+    recfile.save_actions(str(sub / "inner.rec"), [('click', 7, 7)])
+    recfile.save_actions(str(sub / "outer.rec"), [('call', 'inner.rec'), ('click', 8, 8)])
+    actions = [('call', 'sub/outer.rec'), ('loop', 2), ('call', 'sub/inner.rec'), ('end_loop',)]
+    assert replay(actions, base_dir=str(tmp_path)) == [(7, 7), (8, 8), (7, 7), (7, 7)]
+
+
+def test_a_macro_that_calls_itself_is_rejected(tmp_path):
+    path = tmp_path / "self.rec"
+    recfile.save_actions(str(path), [('click', 1, 1), ('call', 'self.rec')])
+    with pytest.raises(ValueError, match="calls itself"):
+        replay([('call', 'self.rec')], base_dir=str(tmp_path))
+
+
+@pytest.mark.parametrize("actions, message", [
+    ([('loop', 2), ('click', 1, 1)], "never closed"),
+    ([('end_loop',)], "without an open loop"),
+    ([('else',)], "without an open condition"),
+    ([('if_pixel', 1, 1, 'red', 0), ('end_if',)], "Action 1"),
+])
+def test_unbalanced_markers_name_the_action(actions, message):
+    with pytest.raises(ValueError, match=message):
+        parse(actions)
+
+
+def test_streamed_replay_refuses_control_flow():
+    with pytest.raises(ValueError, match="compiled replay"):
+        list(iter_program([('loop', 2), ('end_loop',)], 0.0, ReplayControl(), RecordingBackend()))
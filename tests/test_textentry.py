@@ -0,0 +1,85 @@
+import pytest
+import textentry
+from backends import RecordingBackend, InputBackend
+from replay import ReplayControl, run_actions
+from textentry import ENTRY_PASTE, ENTRY_BATCH, ENTRY_KEYS, PASTE_MIN_LENGTH, choose_entry, paste_text
+
+
+class AsciiOnly(InputBackend):
+    unicode_keys = False
+
+
+def test_choose_entry_picks_the_fastest_correct_mode():
+    assert choose_entry("hello", RecordingBackend()) == ENTRY_BATCH
+    assert choose_entry("x" * PASTE_MIN_LENGTH, RecordingBackend()) == ENTRY_PASTE
+    assert choose_entry("سلام", RecordingBackend()) == ENTRY_BATCH
+    # Backends that can't type Persian would skip it; the clipboard can
+    assert choose_entry("سلام", AsciiOnly()) == ENTRY_PASTE
+    assert choose_entry("hello", AsciiOnly()) == ENTRY_BATCH
+
+
+class FakeClipboard:
+    def __init__(self, text):
+        self.text = text
+        self.copied = []
+
+    def copy(self, text):
+        self.copied.append(text)
+        self.text = text
+
+    def paste(self):
+        return self.text
+
+
+@pytest.fixture
+def clipboard(monkeypatch):
+    board = FakeClipboard("what the user had")
+    monkeypatch.setattr(textentry, 'clipboard', lambda: (board.copy, board.paste))
+    monkeypatch.setattr(textentry, 'PASTE_SETTLE', 0.0)
+    return board
+
+
+def test_paste_restores_the_previous_text(clipboard):
+    backend = RecordingBackend()
+    paste_text(backend, ReplayControl(), "pasted")
+    assert [event[1:] for event in backend.events] == [('hotkey', ('ctrl', 'v'))]
+    assert clipboard.copied == ["pasted", "what the user had"]
+
+
+def test_paste_leaves_non_text_clipboard_content_alone(clipboard):
+    clipboard.text = ""
+    paste_text(RecordingBackend(), ReplayControl(), "pasted")
+    assert clipboard.copied == ["pasted"]
+
+
+def test_paste_without_a_clipboard_writes_the_text(monkeypatch):
+    monkeypatch.setattr(textentry, 'clipboard', lambda: None)
+    backend = RecordingBackend()
+    paste_text(backend, ReplayControl(), "text")
+    assert [event[1:] for event in backend.events] == [('write', ("text",))]
+
+
+def test_long_text_is_pasted_at_its_position(clipboard):
+    backend = RecordingBackend()
+    text = "y" * PASTE_MIN_LENGTH
+    run_actions([('type', text, 5, 6)], 1, 0.0, ReplayControl(), backend=backend)
+    assert [event[1:] for event in backend.events] == [('click', (5, 6, 'left')), ('hotkey', ('ctrl', 'v'))]
+    assert clipboard.copied == [text, "what the user had"]
+
+
+def test_keys_are_typed_in_chunks_with_the_interval():
+    backend = RecordingBackend()
+    backend.type_interval = 0.01
+    text = "x" * 60
+    run_actions([('type', text, {'entry': ENTRY_KEYS})], 1, 0.0, ReplayControl(), backend=backend)
+    writes = [args[0] for _, name, args in backend.events if name == 'write']
+    assert "".join(writes) == text
+    assert 1 < len(writes) < len(text)
+
+
+def test_batch_text_is_one_write_at_its_position():
+    backend = RecordingBackend()
+    run_actions([('type', "سلام", 5, 6, {'entry': ENTRY_BATCH})], 1, 0.0, ReplayControl(),
+                backend=backend)
+    assert [(name, args) for _, name, args in backend.events] == [
+        ('click', (5, 6, 'left')), ('write', ("سلام",))]
@@ -0,0 +1,69 @@
+import json
+import pytest
+from backends import RecordingBackend
+from replay import ReplayControl, run_actions
+from tracing import BUCKETS, ReplayTrace, distribution
+
+
+def test_distribution_percentiles_and_buckets():
+    values = [0.00005, 0.0002, 0.0002, 0.002, 0.05, 5.0, 5.0] + [0.001] * 93
+    dist = distribution(values)
+    assert dist['count'] == 100
+    assert dist['p50'] == 0.001 and dist['p95'] == 0.001 and dist['p99'] == 5.0
+    assert dist['max'] == 5.0
+    # The upper edge belongs to its bucket; above the last edge is the open bucket
+    assert dist['buckets'] == [1, 2, 93, 1, 0, 0, 1, 0, 0, 2]
+    assert sum(dist['buckets']) == 100
+    empty = distribution([])
+    assert empty['count'] == 0 and empty['buckets'] == [0] * (len(BUCKETS) + 1)
+
+
+def make_trace():
+    trace = ReplayTrace()
+    trace.kinds = ['click', 'move']
+    # (run, index, due, start, call, slept)
+    trace.records = [(0, 0, 0.0, 0.001, 0.002, 0.0), (0, 1, 0.1, 0.1005, 0.001, 0.09),
+                     (1, 0, 0.2, 0.2, 0.003, 0.05)]
+    return trace
+
+
+def test_chrome_events_place_actions_and_sleeps():
+    events = make_trace().chrome_events()
+    assert events['displayTimeUnit'] == 'ms'
+    spans = [e for e in events['traceEvents'] if e['ph'] == 'X']
+    assert [(e['name'], e['tid']) for e in spans] == [('click', 1), ('sleep', 2), ('move', 1),
+                                                      ('sleep', 2), ('click', 1)]
+    sleep, move = spans[1], spans[2]
+    assert sleep['ts'] + sleep['dur'] == pytest.approx(move['ts'])
+    assert move['dur'] == pytest.approx(1000.0)
+    assert move['args'] == {'run': 1, 'step': 2, 'late_ms': 0.5}
+    assert spans[4]['args']['run'] == 2
+
+
+def test_summary_groups_by_action_type(tmp_path):
+    trace = make_trace()
+    summary = trace.summary()
+    assert list(summary) == ['click', 'move']
+    assert summary['click']['call']['count'] == 2
+    assert summary['click']['late']['max'] == pytest.approx(0.001)
+    assert len(trace.format_summary().splitlines()) == 3
+    path = tmp_path / "trace.json"
+    trace.save_chrome(str(path))
+    assert json.loads(path.read_text(encoding='utf-8')) == trace.chrome_events()
+
+
+def test_remap_numbers_steps_by_their_source_rows():
+    trace = make_trace()
+    trace.remap([1, 4])
+    assert trace.kinds == ['step', 'click', 'step', 'step', 'move']
+    assert [r[1] for r in trace.records] == [1, 4, 1]
+
+
+def test_a_traced_replay_records_every_step():
+    trace = ReplayTrace()
+    run_actions([('click', 1, 1), ('move', 2, 2), ('shortcut', 'Enter')], 2, 0.01, ReplayControl(),
+                backend=RecordingBackend(), trace=trace)
+    assert [(r[0], r[1]) for r in trace.records] == [(0, 0), (0, 1), (0, 2), (1, 0), (1, 1), (1, 2)]
+    assert trace.kinds == ['click', 'move', 'shortcut']
+    for run, index, due, start, call, slept in trace.records:
+        assert start >= due - 0.001 and call >= 0 and slept >= 0
@@ -0,0 +1,74 @@
+import sys
+
+# How a 'type' action gets its text into the target field
+ENTRY_PASTE = 'paste'    # through the clipboard, restoring the text that was there before
+ENTRY_BATCH = 'batch'    # one injection call for the whole text, no pause between keys
+ENTRY_KEYS = 'keys'      # one key at a time with the backend's type_interval
+ENTRY_MODES = (ENTRY_PASTE, ENTRY_BATCH, ENTRY_KEYS)
+
+# Texts at least this long are pasted when a clipboard is available
+PASTE_MIN_LENGTH = 32
+# Time the target application gets to read the clipboard before it is restored
+PASTE_SETTLE = 0.15
+
+
+def _clipboard():
+    """(copy, paste) functions, or None when no clipboard can be used"""
+    try:
+        import pyperclip
+    except ImportError:
+        return None
+    try:
+        pyperclip.paste()
+    except pyperclip.PyperclipException:
+        return None
+    return pyperclip.copy, pyperclip.paste
+
+
+_clipboard_funcs = []
+
+
+def clipboard():
+    # Probing the clipboard can be slow (it may start a helper process); do it once
+    if not _clipboard_funcs:
+        _clipboard_funcs.append(_clipboard())
+    return _clipboard_funcs[0]
+
+
+def choose_entry(text, backend):
+    """The fastest mode that will type `text` correctly on `backend`"""
+    needs_unicode = not text.isascii()
+    if needs_unicode and not backend.unicode_keys:
+        # e.g. pyautogui.write() silently skips Persian letters
+        return ENTRY_PASTE
+    if len(text) >= PASTE_MIN_LENGTH:
+        return ENTRY_PASTE
+    return ENTRY_BATCH
+
+
+def paste_text(backend, control, text):
+    """Paste `text` and put the previous clipboard text back afterwards.
+
+    Only text can be saved and restored. When the clipboard held
+    something else (an image, files) it reads as empty, and the pasted
+    text is left in place rather than clearing it. Falls back to a
+    batched write when there is no usable clipboard.
+    """
+    funcs = clipboard()
+    if funcs is None:
+        backend.write(text)
+        return
+    copy, paste = funcs
+    try:
+        saved = paste()
+    except Exception:
+        saved = None
+    copy(text)
+    try:
+        backend.hotkey('command' if sys.platform == 'darwin' else 'ctrl', 'v')
+        backend.flush()
+        control.sleep(PASTE_SETTLE)
+    finally:
+        # Empty: nothing, or content that isn't text; copying '' would lose it
+        if saved:
+            copy(saved)
@@ -0,0 +1,101 @@
+import json
+
+# Upper edges (seconds) of the histogram buckets; the last bucket is open
+BUCKETS = (0.0001, 0.0003, 0.001, 0.003, 0.01, 0.03, 0.1, 0.3, 1.0)
+
+
+def _percentile(values, q):
+    # `values` sorted; nearest-rank, like lateness_summary
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def distribution(values):
+    """count / p50 / p95 / p99 / max (seconds) and bucket counts of `values`"""
+    if not values:
+        return {'count': 0, 'p50': 0.0, 'p95': 0.0, 'p99': 0.0, 'max': 0.0,
+                'buckets': [0] * (len(BUCKETS) + 1)}
+    values = sorted(values)
+    buckets = [0] * (len(BUCKETS) + 1)
+    edge = 0
+    for v in values:
+        while edge < len(BUCKETS) and v > BUCKETS[edge]:
+            edge += 1
+        buckets[edge] += 1
+    return {
+        'count': len(values),
+        'p50': values[(len(values) - 1) // 2],
+        'p95': _percentile(values, 0.95),
+        'p99': _percentile(values, 0.99),
+        'max': values[-1],
+        'buckets': buckets,
+    }
+
+
+# --- Replay Trace ---
+class ReplayTrace:
+    """Per-step timings of a replay; pass it as `trace` to run_actions / run_program.
+
+    One record per executed step: (run, index, due, start, call, slept),
+    all in seconds since the replay started (paused time excluded). `due`
+    is when the scheduler wanted the step to start, `call` how long the
+    backend call took and `slept` how long the scheduler waited before it.
+    `kinds[index]` is the action type of step `index` when known.
+    """
+
+    def __init__(self):
+        self.records = []
+        self.kinds = []
+
+    def remap(self, rows):
+        """Renumber the steps of an optimized program to the rows they came from"""
+        kinds = ["step"] * (rows[-1] + 1 if rows else 0)
+        for i, row in enumerate(rows):
+            kinds[row] = self.kind(i)
+        self.kinds = kinds
+        self.records = [(r[0], rows[r[1]]) + r[2:] for r in self.records]
+
+    def kind(self, index):
+        return self.kinds[index] if index < len(self.kinds) else "step"
+
+    def summary(self):
+        """{action type: {'call': distribution, 'late': distribution}}"""
+        calls = {}
+        late = {}
+        for run, index, due, start, call, slept in self.records:
+            kind = self.kind(index)
+            calls.setdefault(kind, []).append(call)
+            late.setdefault(kind, []).append(start - due)
+        return {kind: {'call': distribution(calls[kind]), 'late': distribution(late[kind])}
+                for kind in sorted(calls)}
+
+    def format_summary(self):
+        lines = [f"{'action':12}{'count':>8}{'call p50':>10}{'p95':>8}{'p99':>8}"
+                 f"{'late p50':>10}{'p95':>8}{'p99':>8}  (ms)"]
+        for kind, dist in self.summary().items():
+            c, l = dist['call'], dist['late']
+            lines.append(f"{kind:12}{c['count']:8}{c['p50'] * 1000:10.2f}{c['p95'] * 1000:8.2f}"
+                         f"{c['p99'] * 1000:8.2f}{l['p50'] * 1000:10.2f}{l['p95'] * 1000:8.2f}"
+                         f"{l['p99'] * 1000:8.2f}")
+        return "\n".join(lines)
+
+    def chrome_events(self):
+        """The trace as Chrome trace-event JSON (chrome://tracing, Perfetto)"""
+        events = [
+            {'ph': 'M', 'name': 'process_name', 'pid': 1, 'args': {'name': 'replay'}},
+            {'ph': 'M', 'name': 'thread_name', 'pid': 1, 'tid': 1, 'args': {'name': 'actions'}},
+            {'ph': 'M', 'name': 'thread_name', 'pid': 1, 'tid': 2, 'args': {'name': 'scheduler sleep'}},
+        ]
+        for run, index, due, start, call, slept in self.records:
+            if slept > 0:
+                events.append({'ph': 'X', 'name': 'sleep', 'cat': 'sleep', 'pid': 1, 'tid': 2,
+                               'ts': (start - slept) * 1e6, 'dur': slept * 1e6})
+            events.append({'ph': 'X', 'name': self.kind(index), 'cat': 'action', 'pid': 1, 'tid': 1,
+                           'ts': start * 1e6, 'dur': call * 1e6,
+                           'args': {'run': run + 1, 'step': index + 1,
+                                    'late_ms': round((start - due) * 1000, 3)}})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def save_chrome(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.chrome_events(), f)
+# ----------------------------------